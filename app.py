@@ -1,20 +1,38 @@
 import streamlit as st
-import pdfplumber
-import docx
-import re
 import pandas as pd
-from io import BytesIO
-import tempfile
-import os
+import time
 from datetime import datetime, timedelta
-import uuid
-import json
+import requests
+
+from cv_extraction import extract_text, extract_fields
+from upload_spool import checked_upload, get_upload_key, release_uploads
+from cv_store import CVStore, compute_stream_sha256
+from message_templates import render_message
+from slot_solver import DURATION_MAP
+from business_calendar import get_holiday_name, get_slots, get_working_hours, is_business_day, next_business_day
+from extraction_worker import WORKER_URL, ExtractionClient
+from memory_diagnostics import (
+    DIAGNOSTICS_ENABLED,
+    ALLOCATION_REPORTS,
+    SESSION_STORE,
+    format_bytes,
+    get_rss,
+    get_session_value,
+    set_session_value,
+    pop_session_value,
+    start_session_run,
+    session_size_report,
+    track_allocations
+)
 
 # Import de la configuration Google Meet
 try:
     from google_meet_config import (
         create_google_calendar_service, 
         create_google_meet_event, 
+        reschedule_google_meet_event,
+        new_event_id,
+        get_meet_link,
         get_available_slots,
         handle_oauth_authentication,
         check_oauth_status,
@@ -34,242 +52,239 @@ st.set_page_config(
     layout="wide"
 )
 
+# Session active ; purge des données des sessions inactives
+start_session_run()
+
 # Titre de l'application
 st.title("📄 Extracteur Automatique de CV")
 st.markdown("---")
 
+# Fragments Streamlit (1.37+) : seul le bloc concerné est réexécuté lors d'une
+# interaction. Sur les versions antérieures le décorateur est neutre ; la
+# mémoïsation par session évite alors tout de même extraction et appels API.
+fragment = getattr(st, 'fragment', None) or getattr(st, 'experimental_fragment', None) or (lambda func: func)
+
+# Durée de validité des valeurs mémoïsées en session (secondes)
+OAUTH_STATUS_TTL = 60
+SLOTS_CACHE_TTL = 120
+
+def get_session_cached(key, ttl, compute):
+    """Retourne une valeur mémoïsée dans la session, recalculée après `ttl` secondes"""
+    cached = get_session_value(key)
+    if cached and time.monotonic() - cached[0] < ttl:
+        return cached[1]
+    value = compute()
+    set_session_value(key, (time.monotonic(), value))
+    return value
+
+def get_oauth_status():
+    """Statut OAuth mémoïsé (évite de relire le fichier de token à chaque rerun)"""
+    return get_session_cached('oauth_status', OAUTH_STATUS_TTL, check_oauth_status)
+
 # Affichage du bouton Se déconnecter en haut de page (plus de sidebar)
 if GOOGLE_MEET_AVAILABLE:
-    is_authenticated, status_message = check_oauth_status()
+    is_authenticated, status_message = get_oauth_status()
     if is_authenticated:
         st.success(status_message)
         if st.button("🔓 Se déconnecter"):
             clear_oauth_tokens()
+            pop_session_value('oauth_status')
             st.rerun()
     else:
         st.warning(status_message)
         credentials = handle_oauth_authentication()
         if credentials:
+            pop_session_value('oauth_status')
             st.rerun()
 
-def extract_text_from_pdf(pdf_file):
-    """Extrait le texte d'un fichier PDF"""
-    try:
-        with pdfplumber.open(pdf_file) as pdf:
-            text = ""
-            for page in pdf.pages:
-                text += page.extract_text() or ""
-        return text
-    except Exception as e:
-        st.error(f"Erreur lors de la lecture du PDF: {e}")
-        return ""
-
-def extract_text_from_docx(docx_file):
-    """Extrait le texte d'un fichier DOCX"""
-    try:
-        doc = docx.Document(docx_file)
-        text = ""
-        for paragraph in doc.paragraphs:
-            text += paragraph.text + "\n"
-        return text
-    except Exception as e:
-        st.error(f"Erreur lors de la lecture du DOCX: {e}")
-        return ""
-
-def extract_email(text):
-    """Extrait l'adresse email du texte"""
-    email_pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
-    emails = re.findall(email_pattern, text)
-    return emails[0] if emails else ""
-
-def extract_phone(text):
-    """Extrait le numéro de téléphone du texte"""
-    # Patterns pour différents formats de téléphone
-    phone_patterns = [
-        r'(\+33|0)[1-9](\d{8})',  # Format français
-        r'(\+33|0)[1-9][\s.-]?(\d{2}[\s.-]?){4}',  # Avec espaces/points/tirets
-        r'(\+33|0)[1-9][\s.-]?(\d{2}[\s.-]?){3}\d{2}',  # Format alternatif
-    ]
-    
-    for pattern in phone_patterns:
-        phones = re.findall(pattern, text)
-        if phones:
-            # Nettoyer et formater le numéro
-            phone = ''.join(phones[0])
-            phone = re.sub(r'[\s.-]', '', phone)
-            if phone.startswith('0'):
-                phone = '+33' + phone[1:]
-            return phone
-    
-    return ""
-
-def detect_contract_type(text):
-    """Détecte le type de contrat dans le texte"""
-    text_lower = text.lower()
-    
-    contract_keywords = {
-        'Alternance': ['alternance', 'apprentissage', 'contrat d\'apprentissage'],
-        'Stage': ['stage', 'internship', 'stagiare'],
-        'CDI': ['cdi', 'contrat à durée indéterminée', 'permanent'],
-        'CDD': ['cdd', 'contrat à durée déterminée', 'temporaire', 'mission'],
-        'Freelance': ['freelance', 'freelancer', 'indépendant', 'consultant'],
-        'Intérim': ['intérim', 'interim', 'temporaire']
-    }
-    
-    for contract_type, keywords in contract_keywords.items():
-        for keyword in keywords:
-            if keyword in text_lower:
-                return contract_type
-    
-    return "À compléter"
-
-def extract_duration(text):
-    """Extrait la durée mentionnée dans le texte"""
-    duration_patterns = [
-        r'(\d+)\s*(mois|month)',  # 6 mois, 3 months
-        r'(\d+)\s*(semaines?|weeks?)',  # 2 semaines, 1 week
-        r'(\d+)\s*(jours?|days?)',  # 5 jours, 3 days
-        r'(\d+)\s*(ans?|years?)',  # 2 ans, 1 year
-    ]
-    
-    text_lower = text.lower()
-    for pattern in duration_patterns:
-        matches = re.findall(pattern, text_lower)
-        if matches:
-            number, unit = matches[0]
-            return f"{number} {unit}"
-    
-    return "À compléter"
-
 def generate_message(email, contract_type, duration):
     """Génère un message automatique"""
-    if contract_type == "À compléter":
-        contract_phrase = "un poste"
-    else:
-        contract_phrase = f"un poste en {contract_type}"
-    
-    message = f"""Bonjour,
-
-Merci pour votre candidature. Nous avons bien reçu votre CV pour {contract_phrase}."""
-    
-    
-    
-    message += """
-
-Nous reviendrons vers vous sous peu.
-
-Cordialement,
-L'équipe RH"""
-    
-    return message
+    return render_message(
+        'reception', email=email, contract_type=contract_type, duration=duration
+    )
 
 def generate_interview_message(email, contract_type, interview_date, interview_time, visio_link, interviewer_name="Jean Jean"):
     """Génère un message pour un entretien avec lien Visio"""
-    if contract_type == "À compléter":
-        contract_phrase = "un poste"
-    else:
-        contract_phrase = f"un poste en {contract_type}"
-    
-    # Formatage de la date
-    date_obj = datetime.strptime(interview_date, "%Y-%m-%d")
-    formatted_date = date_obj.strftime("%d/%m/%Y")
-    
-    message = f"""Bonjour,
-
-Merci pour votre candidature pour {contract_phrase}.
-
-Nous avons le plaisir de vous convier à un entretien :
-📅 Date : {formatted_date}
-🕐 Heure : {interview_time}
-👤 Avec : {interviewer_name}
+    return render_message(
+        'entretien', email=email, contract_type=contract_type, date=interview_date,
+        time=interview_time, interviewer=interviewer_name, visio_link=visio_link
+    )
 
-🔗 Lien Visio : {visio_link}
+@st.cache_resource
+def get_cv_store():
+    """Base SQLite partagée par les sessions (planning des entretiens)"""
+    return CVStore()
 
-En cas d'impossibilité, merci de nous contacter au plus vite.
+def schedule_meet_event(service, meeting_title, start_time, duration_minutes, email, interview_type, sha256):
+    """
+    Crée l'événement Meet d'un entretien, ou déplace celui déjà planifié
+    pour ce candidat et ce type d'entretien, et l'enregistre dans le planning
 
-Cordialement,
-L'équipe RH"""
-    
-    return message
+    Returns:
+        Lien Meet ou None si erreur
+    """
+    store = get_cv_store()
+    existing = store.find_interview(email, interview_type)
+    if existing:
+        event = reschedule_google_meet_event(
+            service, existing['event_id'], meeting_title, start_time, duration_minutes
+        )
+        if event is None:
+            return None
+        if event.get('status') != 'cancelled':
+            store.save_interview(
+                existing['event_id'], 'primary', email, start_time, duration_minutes, summary=meeting_title,
+                interview_type=interview_type, sha256=sha256, timezone='Europe/Paris'
+            )
+            return get_meet_link(event) or existing['meet_link']
+        # Supprimé dans l'agenda depuis : un nouvel événement est créé
+        store.cancel_interviews([existing['event_id']])
 
-def generate_visio_link():
-    """Génère un lien Visio fictif (fallback)"""
-    meeting_id = str(uuid.uuid4())[:8]
-    return f"https://meet.google.com/{meeting_id}"
+    event_id = new_event_id()
+    meet_link = create_google_meet_event(
+        service=service,
+        meeting_title=meeting_title,
+        start_time=start_time,
+        duration_minutes=duration_minutes,
+        event_id=event_id
+    )
+    if meet_link:
+        store.save_interview(
+            event_id, 'primary', email, start_time, duration_minutes, summary=meeting_title,
+            interview_type=interview_type, sha256=sha256, timezone='Europe/Paris', meet_link=meet_link
+        )
+    return meet_link
 
-def create_google_meet_link(meeting_title, start_time, duration_minutes=60):
+def create_google_meet_link(meeting_title, start_time, duration_minutes=60, email=None, interview_type=None,
+                            sha256=None):
     """
     Crée un lien Google Meet via OAuth 2.0
+
+    Si l'email du candidat est fourni, l'entretien est enregistré dans le
+    planning (réconciliation avec calendar_sync.py) et une replanification
+    déplace l'événement existant au lieu d'en créer un second.
+
+    Returns:
+        Lien Meet, ou None si l'événement n'a pas pu être créé (aucun lien
+        fictif n'est généré : l'entretien n'est alors pas planifié)
     """
     if not GOOGLE_MEET_AVAILABLE:
-        st.warning("⚠️ Module Google Meet non disponible. Utilisation d'un lien fictif.")
-        return generate_visio_link()
+        st.error("❌ Module Google Meet non disponible")
+        return None
     
     try:
         # Créer le service Google Calendar avec OAuth 2.0
         service = create_google_calendar_service()
+        if not service:
+            st.error("❌ Impossible de se connecter à Google Calendar")
+            return None
         
-        if service:
-            # Créer l'événement Meet
-            meet_link = create_google_meet_event(
-                service=service,
-                meeting_title=meeting_title,
-                start_time=start_time,
-                duration_minutes=duration_minutes
+        # Créer (ou déplacer) l'événement Meet ; les échecs sont signalés par google_meet_config
+        if email:
+            return schedule_meet_event(
+                service, meeting_title, start_time, duration_minutes, email, interview_type, sha256
             )
-            
-            if meet_link:
-                return meet_link
-            else:
-                st.warning("⚠️ Impossible de créer le lien Meet. Utilisation d'un lien fictif.")
-                return generate_visio_link()
-        else:
-            st.warning("⚠️ Impossible de se connecter à Google Calendar. Utilisation d'un lien fictif.")
-            return generate_visio_link()
+        return create_google_meet_event(
+            service=service,
+            meeting_title=meeting_title,
+            start_time=start_time,
+            duration_minutes=duration_minutes
+        )
             
     except Exception as e:
-        st.warning(f"⚠️ Erreur lors de la création du lien Google Meet: {e}")
-        return generate_visio_link()
-
-def is_working_day(date):
-    """Vérifie si la date est un jour ouvrable"""
-    return date.weekday() < 5  # Lundi à vendredi
-
-def get_available_hours():
-    """Retourne les heures disponibles pour les entretiens (9h à 20h, toutes les 15 minutes)"""
-    hours = []
-    for hour in range(9, 21):  # 9h à 20h
-        for minute in [0, 15, 30, 45]:  # Toutes les 15 minutes
-            time_str = f"{hour:02d}:{minute:02d}"
-            hours.append(time_str)
-    return hours
-
-def get_available_slots_for_date(date):
-    """Récupère les créneaux disponibles pour une date donnée via OAuth 2.0"""
+        st.error(f"❌ Erreur lors de la création du lien Google Meet: {e}")
+        return None
+
+def is_working_day(date, interviewer=None):
+    """Vérifie si la date est un jour ouvrable (jours de l'interviewer, hors jours fériés)"""
+    return is_business_day(date, interviewer)
+
+def get_available_hours(interviewer=None, duration_minutes=60):
+    """Retourne les heures de début possibles d'un entretien (horaires de l'interviewer, toutes les 15 minutes)"""
+    return get_slots(interviewer, duration_minutes)
+
+def get_available_slots_for_date(date, interviewer=None, duration_minutes=60):
+    """
+    Récupère les créneaux disponibles pour une date donnée via OAuth 2.0
+
+    Une liste vide (jour non travaillé, journée complète) est retournée telle
+    quelle ; les horaires par défaut de l'interviewer ne servent que si
+    l'agenda est inaccessible.
+    """
+    if not is_working_day(date, interviewer):
+        return []
+    if not GOOGLE_MEET_AVAILABLE:
+        return get_available_hours(interviewer, duration_minutes)
+    
+    # Tentative de récupération depuis Google Calendar avec OAuth 2.0
+    service = create_google_calendar_service()
+    if not service:
+        return get_available_hours(interviewer, duration_minutes)
     try:
-        if not GOOGLE_MEET_AVAILABLE:
-            return get_available_hours()
-        
-        # Tentative de récupération depuis Google Calendar avec OAuth 2.0
-        service = create_google_calendar_service()
-        
-        if service:
-            try:
-                available_slots = get_available_slots(service, date.strftime("%Y-%m-%d"))
-                if available_slots:
-                    return available_slots
-                else:
-                    return get_available_hours()
-            except Exception as e:
-                # En cas d'erreur, on utilise les créneaux par défaut
-                st.info("ℹ️ Utilisation des créneaux par défaut (Google Calendar non accessible)")
-                return get_available_hours()
-        else:
-            return get_available_hours()
-    except Exception as e:
-        # En cas d'erreur, on utilise les créneaux par défaut
+        available_slots = get_available_slots(service, date.strftime("%Y-%m-%d"), interviewer, duration_minutes)
+    except Exception:
+        available_slots = None
+    if available_slots is None:
         st.info("ℹ️ Utilisation des créneaux par défaut (Google Calendar non accessible)")
-        return get_available_hours()
+        return get_available_hours(interviewer, duration_minutes)
+    return available_slots
+
+def get_cached_slots_for_date(date, interviewer=None, duration_minutes=60):
+    """Créneaux disponibles mémoïsés par date, interviewer et durée dans la session"""
+    return get_session_cached(
+        f"slots_{date.isoformat()}_{interviewer}_{duration_minutes}", SLOTS_CACHE_TTL,
+        lambda: get_available_slots_for_date(date, interviewer, duration_minutes)
+    )
+
+def invalidate_slots_cache(date, interviewer=None):
+    """Force le rechargement des créneaux d'une date, pour toutes les durées (après une réservation)"""
+    for duration_minutes in set(DURATION_MAP.values()):
+        pop_session_value(f"slots_{date.isoformat()}_{interviewer}_{duration_minutes}")
+
+def extract_with_worker(cv_file, filename):
+    """
+    Extrait un CV via le service d'extraction (EXTRACTION_WORKER_URL)
+
+    Returns:
+        Tuple (texte, champs) ; (None, None) si le service est indisponible,
+        auquel cas l'extraction est faite localement
+    """
+    try:
+        # UploadedFile est un BytesIO : getvalue() retourne son contenu sans copie
+        text, fields = ExtractionClient(WORKER_URL).extract(cv_file.getvalue(), filename)
+        return text, fields
+    except (requests.RequestException, RuntimeError) as e:
+        st.info(f"ℹ️ Service d'extraction indisponible ({e}), extraction locale")
+        return None, None
+
+def get_cached_extraction(uploaded_file):
+    """
+    Extrait le texte et les champs d'un upload, une seule fois par fichier
+
+    Seule la dernière extraction est conservée en session.
+
+    Returns:
+        Dictionnaire {key, text, fields}, ou None si le format n'est pas supporté
+    """
+    key = get_upload_key(uploaded_file)
+    cached = get_session_value('extraction')
+    if cached and cached['key'] == key:
+        return cached
+
+    with checked_upload(uploaded_file) as cv_file, track_allocations(uploaded_file.name):
+        if cv_file is None:
+            st.stop()
+        sha256 = compute_stream_sha256(cv_file)
+        text, fields = extract_with_worker(cv_file, uploaded_file.name) if WORKER_URL else (None, None)
+        if text is None and fields is None:
+            text = extract_text(cv_file, uploaded_file.name)
+            fields = extract_fields(text) if text is not None else None
+    if text is None:
+        return None
+
+    extraction = {'key': key, 'sha256': sha256, 'text': text, 'fields': fields}
+    set_session_value('extraction', extraction)
+    return extraction
 
 def save_to_csv(data, filename="cv_extracted_data.csv"):
     """Sauvegarde les données dans un fichier CSV"""
@@ -281,35 +296,231 @@ def save_interview_to_csv(data, filename="entretiens.csv"):
     df = pd.DataFrame([data])
     return df.to_csv(index=False)
 
+def render_memory_diagnostics():
+    """Affiche la mémoire du processus, la taille de la session et les dernières extractions"""
+    with st.expander("🧠 Diagnostic mémoire"):
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Mémoire résidente", format_bytes(get_rss()))
+        col2.metric("Sessions conservées", len(SESSION_STORE))
+        col3.metric("Données des sessions", format_bytes(SESSION_STORE.total_size()))
+
+        sizes = session_size_report(st.session_state)
+        if sizes:
+            st.markdown("**Session courante**")
+            st.dataframe(pd.DataFrame(
+                [{'Clé': key, 'Taille': format_bytes(size)} for key, size in sizes]
+            ), hide_index=True)
+
+        for report in reversed(ALLOCATION_REPORTS):
+            st.markdown(
+                f"**{report['label']}** : {report['elapsed'] * 1000:.0f} ms, "
+                f"RSS {format_bytes(report['rss_before'])} → {format_bytes(report['rss_after'])}, "
+                f"pic tracé {format_bytes(report['traced_peak'])}"
+            )
+            st.dataframe(pd.DataFrame(
+                [{'Ligne': line, 'Écart': format_bytes(size), 'Blocs': count}
+                 for line, size, count in report['top']]
+            ), hide_index=True)
+
 # Interface principale
 uploaded_file = st.file_uploader(
     "Choisissez un fichier CV (PDF ou DOCX)",
     type=['pdf', 'docx'],
     help="Formats acceptés : PDF, DOCX"
 )
+# Quota de session : les fichiers remplacés ou retirés ne comptent plus
+release_uploads([uploaded_file] if uploaded_file is not None else [])
+
+@fragment
+def render_interview_form():
+    """
+    Formulaire de planification d'entretien
+
+    Exécuté en fragment : modifier la date, l'heure, la durée ou l'interviewer
+    ne relance que ce bloc. Les valeurs sont lues via st.session_state.
+    """
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        # Titre de la réunion
+        st.text_input(
+            "📝 Titre de la réunion",
+            value="Entretien - Marie Dupont",
+            help="Titre qui apparaîtra dans Google Meet",
+            key="meeting_title"
+        )
+        
+        # Interviewer du rendu précédent : ses horaires déterminent jours et créneaux
+        interviewer = st.session_state.get('interviewer_name', "Marie Dupont")
+        hours = get_working_hours(interviewer)
+
+        # Sélection de la date avec un calendrier (premier jour ouvré par défaut)
+        min_date = datetime.now().date() + timedelta(days=1)
+        max_date = datetime.now().date() + timedelta(days=30)
+        
+        selected_date = st.date_input(
+            "📅 Choisir une date",
+            min_value=min_date,
+            max_value=max_date,
+            value=min(next_business_day(min_date, interviewer), max_date),
+            help="Sélectionnez une date pour l'entretien (jours ouvrables uniquement)",
+            key="interview_date"
+        )
+        
+        # Vérification que la date sélectionnée est un jour ouvrable
+        if selected_date:
+            if not is_working_day(selected_date, interviewer):
+                holiday = get_holiday_name(selected_date)
+                if holiday:
+                    st.warning(f"⚠️ Attention : La date sélectionnée est un jour férié ({holiday}).")
+                else:
+                    st.warning("⚠️ Attention : La date sélectionnée n'est pas un jour travaillé. Veuillez choisir un autre jour.")
+        
+        # Sélection de l'heure : seules les heures où l'entretien entier est libre sont
+        # proposées (durée du rendu précédent, 45 minutes par défaut), mémoïsées par
+        # date, interviewer et durée
+        duration_minutes = DURATION_MAP.get(st.session_state.get('interview_duration', "45 minutes"), 60)
+        available_hours = get_cached_slots_for_date(selected_date, interviewer, duration_minutes)
+        if not available_hours and is_working_day(selected_date, interviewer):
+            st.info("ℹ️ Aucun créneau disponible à cette date. Veuillez choisir un autre jour.")
+        
+        st.selectbox(
+            "🕐 Choisir une heure",
+            options=available_hours,
+            help=f"Sélectionnez une heure pour l'entretien (de {hours['start']}, toutes les 15 minutes, fin de l'entretien au plus tard à {hours['end']})",
+            key="interview_time"
+        )
+        
+        # Nom de l'interviewer
+        st.text_input(
+            "👤 Nom de l'interviewer",
+            value="Marie Dupont",
+            placeholder="Nom de la personne qui mènera l'entretien",
+            key="interviewer_name"
+        )
+    
+    with col2:
+        # Durée de l'entretien
+        st.selectbox(
+            "⏱️ Durée de l'entretien",
+            options=list(DURATION_MAP),
+            index=2,
+            key="interview_duration"
+        )
+        
+        # Type d'entretien
+        st.selectbox(
+            "🎯 Type d'entretien",
+            options=["Premier entretien", "Entretien technique", "Entretien final", "Entretien RH"],
+            key="interview_type"
+        )
+
+def send_message_button(email, subject, message, key, success_message, error_message):
+    """Bouton d'envoi d'un message par Gmail"""
+    if st.button("✉️ Envoyer par email", key=key):
+        with st.spinner("Envoi de l'email en cours..."):
+            service = create_gmail_service()
+            if service:
+                success = send_gmail_message(service, email, subject, message)
+                if success:
+                    st.success(success_message)
+                else:
+                    st.error(error_message)
+            else:
+                st.error("❌ Service Google non disponible.")
+
+@fragment
+def render_generated_messages(email, phone, contract_type, source_filename):
+    """
+    Affichage des messages générés côte à côte
+
+    Exécuté en fragment : l'envoi ou la sauvegarde d'un message ne relance
+    pas le reste de la page.
+    """
+    st.markdown("---")
+    st.subheader("📝 Messages générés")
+    
+    # Créer deux colonnes pour les messages
+    msg_col1, msg_col2 = st.columns(2)
+    
+    # Message de réception CV (colonne gauche)
+    with msg_col1:
+        if st.session_state.get('show_msg_auto') and get_session_value('msg_auto'):
+            st.markdown("**💬 Message de réception CV**")
+            message = get_session_value('msg_auto')
+            st.text_area("", message, height=200, key="msg_auto_display")
+            
+            col_btn1, col_btn2 = st.columns([1, 3])
+            with col_btn1:
+                st.button("📋", key="copy_msg_auto")
+            with col_btn2:
+                if GOOGLE_MEET_AVAILABLE and email:
+                    send_message_button(
+                        email, "Votre candidature chez Lizia", message, "send_msg_auto",
+                        f"✉️ Email envoyé à {email}", "❌ L'envoi de l'email a échoué."
+                    )
+            
+            if GOOGLE_MEET_AVAILABLE and email:
+                st.markdown(f"**📧 Email :** `{email}`")
+    
+    # Message d'entretien (colonne droite)
+    with msg_col2:
+        if st.session_state.get('show_plan_entretien') and get_session_value('msg_entretien'):
+            st.markdown("**📅 Message d'entretien**")
+            interview_message = get_session_value('msg_entretien')
+            st.text_area("", interview_message, height=200, key="msg_entretien_display")
+            
+            col_btn3, col_btn4 = st.columns([1, 3])
+            with col_btn3:
+                st.button("📋", key="copy_msg_entretien")
+            with col_btn4:
+                if GOOGLE_MEET_AVAILABLE and email:
+                    send_message_button(
+                        email, "Convocation à un entretien chez Lizia", interview_message,
+                        "send_msg_entretien", f"✉️ Email d'entretien envoyé à {email}",
+                        "❌ L'envoi de l'email d'entretien a échoué."
+                    )
+            
+            if GOOGLE_MEET_AVAILABLE and email:
+                st.markdown(f"**📧 Email :** `{email}`")
+            
+            # Bouton pour sauvegarder l'entretien (valeurs figées lors de la planification)
+            if st.button("💾 Sauvegarder l'entretien", key="save_entretien"):
+                interview_data = {
+                    'Email': email,
+                    'Téléphone': phone,
+                    'Type de contrat': contract_type,
+                    **get_session_value('planned_interview', {}),
+                    'Fichier source': source_filename
+                }
+                csv = save_interview_to_csv(interview_data)
+                st.download_button(
+                    label="📥 Télécharger CSV entretien",
+                    data=csv,
+                    file_name="entretien_planifie.csv",
+                    mime="text/csv"
+                )
 
 if uploaded_file is not None:
-    # Extraction du texte
-    file_extension = uploaded_file.name.split('.')[-1].lower()
+    # Extraction du texte (une seule fois par fichier uploadé)
+    extraction = get_cached_extraction(uploaded_file)
     
-    if file_extension == 'pdf':
-        text = extract_text_from_pdf(uploaded_file)
-    elif file_extension == 'docx':
-        text = extract_text_from_docx(uploaded_file)
-    else:
+    if extraction is None:
         st.error("Format de fichier non supporté")
         st.stop()
     
+    text = extraction['text']
+    
     if text:
         # Affichage du texte extrait (optionnel)
         with st.expander("📄 Texte extrait du CV"):
             st.text_area("Contenu du CV", text, height=200)
         
-        # Extraction automatique des informations
-        extracted_email = extract_email(text)
-        extracted_phone = extract_phone(text)
-        detected_contract = detect_contract_type(text)
-        detected_duration = extract_duration(text)
+        # Informations extraites automatiquement
+        extracted_email = extraction['fields']['email']
+        extracted_phone = extraction['fields']['phone']
+        detected_contract = extraction['fields']['contract_type']
+        detected_duration = extraction['fields']['duration']
         
         # Formulaire avec les données extraites
         st.subheader("📋 Informations extraites")
@@ -350,66 +561,15 @@ if uploaded_file is not None:
         if 'show_plan_entretien' not in st.session_state:
             st.session_state['show_plan_entretien'] = False
         
-        col1, col2 = st.columns(2)
+        render_interview_form()
         
-        with col1:
-            # Titre de la réunion
-            meeting_title = st.text_input(
-                "📝 Titre de la réunion",
-                value="Entretien - Marie Dupont",
-                help="Titre qui apparaîtra dans Google Meet"
-            )
-            
-            # Sélection de la date avec un calendrier
-            min_date = datetime.now().date() + timedelta(days=1)
-            max_date = datetime.now().date() + timedelta(days=30)
-            
-            selected_date = st.date_input(
-                "📅 Choisir une date",
-                min_value=min_date,
-                max_value=max_date,
-                value=min_date,
-                help="Sélectionnez une date pour l'entretien (jours ouvrables uniquement)"
-            )
-            
-            # Vérification que la date sélectionnée est un jour ouvrable
-            if selected_date:
-                if not is_working_day(selected_date):
-                    st.warning("⚠️ Attention : La date sélectionnée n'est pas un jour ouvrable. Veuillez choisir un jour de semaine.")
-            
-            # Sélection de l'heure (avec créneaux disponibles)
-            available_hours = get_available_slots_for_date(selected_date)
-            
-            selected_time = st.selectbox(
-                "🕐 Choisir une heure",
-                options=available_hours,
-                help="Sélectionnez une heure pour l'entretien (9h à 20h, toutes les 15 minutes)"
-            )
-            
-            # Nom de l'interviewer
-            interviewer_name = st.text_input(
-                "👤 Nom de l'interviewer",
-                value="Marie Dupont",
-                placeholder="Nom de la personne qui mènera l'entretien"
-            )
-        
-        with col2:
-            # Durée de l'entretien
-            interview_duration = st.selectbox(
-                "⏱️ Durée de l'entretien",
-                options=["15 minutes","30 minutes", "45 minutes", "1 heure", "1h30"],
-                index=2
-            )
-            
-            # Type d'entretien
-            interview_type = st.selectbox(
-                "🎯 Type d'entretien",
-                options=["Premier entretien", "Entretien technique", "Entretien final", "Entretien RH"]
-            )
-            
-            # Mise à jour du titre de la réunion
-            if 'interviewer_name' in locals() and 'interview_type' in locals():
-                meeting_title = f"Entretien {interview_type} - {interviewer_name}"
+        # Valeurs courantes du formulaire d'entretien
+        selected_date = st.session_state['interview_date']
+        selected_time = st.session_state['interview_time']
+        interviewer_name = st.session_state['interviewer_name']
+        interview_duration = st.session_state['interview_duration']
+        interview_type = st.session_state['interview_type']
+        meeting_title = f"Entretien {interview_type} - {interviewer_name}"
         
         # Boutons d'action
         st.markdown("---")
@@ -418,40 +578,53 @@ if uploaded_file is not None:
         with col1:
             # Générer le message et le stocker dans la session
             if st.button("💬 Message réception CV", type="primary"):
-                st.session_state['msg_auto'] = generate_message(email, contract_type, duration)
+                set_session_value('msg_auto', generate_message(email, contract_type, duration))
                 st.session_state['show_msg_auto'] = True
         
         with col2:
             if st.button("📅 Planifier entretien", type="secondary"):
-                if selected_date and selected_time and email and is_working_day(selected_date):
+                if selected_date and selected_time and email and is_working_day(selected_date, interviewer_name):
                     # Calculer la durée en minutes
-                    duration_map = {
-                        "15 minutes": 15,
-                        "30 minutes": 30,
-                        "45 minutes": 45,
-                        "1 heure": 60,
-                        "1h30": 90
-                    }
-                    duration_minutes = duration_map.get(interview_duration, 60)
+                    duration_minutes = DURATION_MAP.get(interview_duration, 60)
                     
                     # Générer le lien Visio (Google Meet automatiquement)
                     visio_link = create_google_meet_link(
                         meeting_title, 
                         f"{selected_date} {selected_time}",
-                        duration_minutes
-                    )
-                    
-                    # Générer le message d'entretien
-                    interview_message = generate_interview_message(
-                        email, contract_type, selected_date.strftime("%Y-%m-%d"), selected_time, 
-                        visio_link, interviewer_name
+                        duration_minutes,
+                        email=email,
+                        interview_type=interview_type,
+                        sha256=extraction['sha256']
                     )
-                    st.session_state['msg_entretien'] = interview_message
-                    st.session_state['show_msg_entretien'] = True
-                    st.session_state['show_plan_entretien'] = True
+                    if visio_link:
+                        # Le créneau vient d'être réservé : les disponibilités du jour sont à recharger
+                        invalidate_slots_cache(selected_date, interviewer_name)
+                        
+                        # Générer le message d'entretien
+                        interview_message = generate_interview_message(
+                            email, contract_type, selected_date.strftime("%Y-%m-%d"), selected_time, 
+                            visio_link, interviewer_name
+                        )
+                        set_session_value('msg_entretien', interview_message)
+                        set_session_value('planned_interview', {
+                            'Date entretien': selected_date.strftime("%Y-%m-%d"),
+                            'Heure entretien': selected_time,
+                            'Durée': interview_duration,
+                            'Type entretien': interview_type,
+                            'Interviewer': interviewer_name,
+                            'Lien Visio': visio_link
+                        })
+                        st.session_state['show_msg_entretien'] = True
+                        st.session_state['show_plan_entretien'] = True
+                    else:
+                        # Pas de lien réel : aucun message d'entretien (ni celui d'une planification précédente)
+                        pop_session_value('msg_entretien')
+                        pop_session_value('planned_interview')
+                        st.session_state['show_plan_entretien'] = False
+                        st.error("❌ Aucun lien Google Meet n'a pu être créé : l'entretien n'est pas planifié")
                 else:
-                    if not is_working_day(selected_date):
-                        st.error("❌ Veuillez sélectionner un jour ouvrable (lundi à vendredi)")
+                    if not is_working_day(selected_date, interviewer_name):
+                        st.error("❌ Veuillez sélectionner un jour ouvrable (hors week-end, jours fériés et jours non travaillés de l'interviewer)")
                     elif not email:
                         st.error("❌ Veuillez renseigner l'adresse email du candidat")
                     else:
@@ -481,89 +654,7 @@ if uploaded_file is not None:
 
         # Affichage des messages côte à côte
         if st.session_state.get('show_msg_auto') or st.session_state.get('show_plan_entretien'):
-            st.markdown("---")
-            st.subheader("📝 Messages générés")
-            
-            # Créer deux colonnes pour les messages
-            msg_col1, msg_col2 = st.columns(2)
-            
-            # Message de réception CV (colonne gauche)
-            with msg_col1:
-                if st.session_state.get('show_msg_auto') and st.session_state.get('msg_auto'):
-                    st.markdown("**💬 Message de réception CV**")
-                    message = st.session_state['msg_auto']
-                    st.text_area("", message, height=200, key="msg_auto_display")
-                    
-                    col_btn1, col_btn2 = st.columns([1, 3])
-                    with col_btn1:
-                        st.button("📋", key="copy_msg_auto")
-                    with col_btn2:
-                        if GOOGLE_MEET_AVAILABLE and email:
-                            if st.button("✉️ Envoyer par email", key="send_msg_auto"):
-                                with st.spinner("Envoi de l'email en cours..."):
-                                    service = create_gmail_service()
-                                    if service:
-                                        subject = "Votre candidature chez Lizia"
-                                        success = send_gmail_message(service, email, subject, message)
-                                        if success:
-                                            st.success(f"✉️ Email envoyé à {email}")
-                                        else:
-                                            st.error("❌ L'envoi de l'email a échoué.")
-                                    else:
-                                        st.error("❌ Service Google non disponible.")
-                    
-                    if GOOGLE_MEET_AVAILABLE and email:
-                        st.markdown(f"**📧 Email :** `{email}`")
-            
-            # Message d'entretien (colonne droite)
-            with msg_col2:
-                if st.session_state.get('show_plan_entretien') and st.session_state.get('msg_entretien'):
-                    st.markdown("**📅 Message d'entretien**")
-                    interview_message = st.session_state['msg_entretien']
-                    st.text_area("", interview_message, height=200, key="msg_entretien_display")
-                    
-                    col_btn3, col_btn4 = st.columns([1, 3])
-                    with col_btn3:
-                        st.button("📋", key="copy_msg_entretien")
-                    with col_btn4:
-                        if GOOGLE_MEET_AVAILABLE and email:
-                            if st.button("✉️ Envoyer par email", key="send_msg_entretien"):
-                                with st.spinner("Envoi de l'email en cours..."):
-                                    service = create_gmail_service()
-                                    if service:
-                                        subject = "Convocation à un entretien chez Lizia"
-                                        success = send_gmail_message(service, email, subject, interview_message)
-                                        if success:
-                                            st.success(f"✉️ Email d'entretien envoyé à {email}")
-                                        else:
-                                            st.error("❌ L'envoi de l'email d'entretien a échoué.")
-                                    else:
-                                        st.error("❌ Service Google non disponible.")
-                    
-                    if GOOGLE_MEET_AVAILABLE and email:
-                        st.markdown(f"**📧 Email :** `{email}`")
-                    
-                    # Bouton pour sauvegarder l'entretien
-                    if st.button("💾 Sauvegarder l'entretien", key="save_entretien"):
-                        interview_data = {
-                            'Email': email,
-                            'Téléphone': phone,
-                            'Type de contrat': contract_type,
-                            'Date entretien': selected_date.strftime("%Y-%m-%d"),
-                            'Heure entretien': selected_time,
-                            'Durée': interview_duration,
-                            'Type entretien': interview_type,
-                            'Interviewer': interviewer_name,
-                            'Lien Visio': visio_link,
-                            'Fichier source': uploaded_file.name
-                        }
-                        csv = save_interview_to_csv(interview_data)
-                        st.download_button(
-                            label="📥 Télécharger CSV entretien",
-                            data=csv,
-                            file_name="entretien_planifie.csv",
-                            mime="text/csv"
-                        )
+            render_generated_messages(email, phone, contract_type, uploaded_file.name)
 
 else:
     # Page d'accueil
@@ -589,3 +680,6 @@ else:
     - ✅ Export en CSV
     - ✅ Interface intuitive et responsive
     """)
+
+if DIAGNOSTICS_ENABLED:
+    render_memory_diagnostics()
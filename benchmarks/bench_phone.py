@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Benchmark de débit de l'extraction des numéros de téléphone
+
+Compare l'ancien extract_phone (trois patterns successifs) au tokenizer
+compilé de cv_extraction sur de grands textes, avec et sans numéro.
+
+Utilisation :
+    python benchmarks/bench_phone.py [--size 2000000] [--repeat 5]
+"""
+
+import os
+import re
+import sys
+import random
+import argparse
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cv_extraction import extract_phone, extract_phones
+
+def legacy_extract_phone(text):
+    """Ancienne implémentation (référence)"""
+    phone_patterns = [
+        r'(\+33|0)[1-9](\d{8})',  # Format français
+        r'(\+33|0)[1-9][\s.-]?(\d{2}[\s.-]?){4}',  # Avec espaces/points/tirets
+        r'(\+33|0)[1-9][\s.-]?(\d{2}[\s.-]?){3}\d{2}',  # Format alternatif
+    ]
+
+    for pattern in phone_patterns:
+        phones = re.findall(pattern, text)
+        if phones:
+            phone = ''.join(phones[0])
+            phone = re.sub(r'[\s.-]', '', phone)
+            if phone.startswith('0'):
+                phone = '+33' + phone[1:]
+            return phone
+
+    return ""
+
+WORDS = (
+    "expérience développeur python stage alternance mois projet équipe 2019 2021 "
+    "client gestion données analyse réseau paris lyon 12 rue 75011 anglais "
+).split()
+
+def build_text(size, with_phone, seed=42):
+    """Construit un texte de CV synthétique d'environ `size` caractères"""
+    rng = random.Random(seed)
+    words = []
+    length = 0
+    while length < size:
+        word = rng.choice(WORDS)
+        words.append(word)
+        length += len(word) + 1
+    if with_phone:
+        # Numéro placé en fin de texte : pire cas pour un balayage linéaire
+        words.append("06 12 34 56 78")
+    return ' '.join(words)
+
+def bench(func, text, repeat):
+    """Meilleur temps sur `repeat` exécutions"""
+    return min(timeit.repeat(lambda: func(text), number=1, repeat=repeat))
+
+def main():
+    """Fonction principale"""
+    parser = argparse.ArgumentParser(description="Benchmark extract_phone")
+    parser.add_argument('--size', type=int, default=2_000_000, help="Taille du texte (caractères)")
+    parser.add_argument('--repeat', type=int, default=5, help="Nombre de répétitions")
+    args = parser.parse_args()
+
+    print(f"📏 Texte de {args.size:,} caractères, meilleur de {args.repeat} essais")
+    print("-" * 50)
+    slower = False
+    for with_phone in (False, True):
+        text = build_text(args.size, with_phone)
+        legacy = bench(legacy_extract_phone, text, args.repeat)
+        current = bench(extract_phone, text, args.repeat)
+        all_phones = bench(extract_phones, text, args.repeat)
+        label = "avec numéro" if with_phone else "sans numéro"
+        print(f"{label:12} ancien : {args.size / legacy / 1e6:7.1f} Mcar/s | "
+              f"nouveau : {args.size / current / 1e6:7.1f} Mcar/s | "
+              f"tous les numéros : {args.size / all_phones / 1e6:7.1f} Mcar/s")
+        slower = slower or current > legacy
+    print("-" * 50)
+    if slower:
+        print("❌ Le nouveau tokenizer est plus lent que l'ancienne implémentation")
+        sys.exit(1)
+    print("✅ Le nouveau tokenizer est au moins aussi rapide")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Test d'endurance mémoire de la chaîne d'extraction
+
+Génère des milliers de CV distincts (PDF et DOCX), les fait passer par le même
+chemin que l'application (upload en mémoire passé tel quel aux parseurs,
+extraction du texte puis des champs) et conserve les résultats
+dans un IdleSessionStore sous des sessions simulées qui se succèdent. La
+mémoire résidente (RSS) est mesurée après l'échauffement puis en fin de test :
+le script échoue si elle a augmenté de plus de --max-growth-mb.
+
+Utilisation :
+    python benchmarks/soak_memory.py [--files 2000] [--max-growth-mb 30]
+"""
+
+import io
+import os
+import sys
+import gc
+import random
+import argparse
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import docx
+
+from cv_extraction import extract_text, extract_fields
+from memory_diagnostics import IdleSessionStore, format_bytes, get_rss
+
+WORDS = (
+    "expérience développeur python stage alternance mois projet équipe client "
+    "gestion données analyse réseau paris lyon anglais formation master licence "
+    "compétences responsable marketing commercial comptabilité logistique"
+).split()
+
+CONTRACTS = ("CDI", "CDD de 6 mois", "stage de 4 mois", "alternance", "freelance")
+
+def build_lines(index, rng, line_count=40):
+    """Lignes d'un CV synthétique, uniques pour chaque index"""
+    lines = [
+        f"Candidat {index}",
+        f"candidat.{index}@example.com",
+        f"06 {index % 100:02d} {rng.randint(10, 99)} {rng.randint(10, 99)} {rng.randint(10, 99)}",
+        f"Recherche {rng.choice(CONTRACTS)}",
+    ]
+    for _ in range(line_count):
+        lines.append(' '.join(rng.choice(WORDS) for _ in range(10)))
+    return lines
+
+def escape_pdf_text(line):
+    """Échappe une ligne pour un littéral de chaîne PDF (WinAnsi)"""
+    encoded = line.encode('cp1252', errors='replace')
+    return encoded.replace(b'\\', b'\\\\').replace(b'(', b'\\(').replace(b')', b'\\)')
+
+def build_pdf(lines):
+    """PDF minimal d'une page (police Helvetica, table xref correcte)"""
+    content = b"BT /F1 10 Tf 40 800 Td 12 TL\n"
+    content += b"".join(b"(" + escape_pdf_text(line) + b") Tj T*\n" for line in lines)
+    content += b"ET"
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+        b"/Resources << /Font << /F1 4 0 R >> >> /Contents 5 0 R >>",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+        b"<< /Length " + str(len(content)).encode() + b" >>\nstream\n" + content + b"\nendstream",
+    ]
+    pdf = io.BytesIO()
+    pdf.write(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(pdf.tell())
+        pdf.write(f"{number} 0 obj\n".encode() + body + b"\nendobj\n")
+    xref_offset = pdf.tell()
+    pdf.write(f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode())
+    for offset in offsets:
+        pdf.write(f"{offset:010d} 00000 n \n".encode())
+    pdf.write(f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\n"
+              f"startxref\n{xref_offset}\n%%EOF\n".encode())
+    return pdf.getvalue()
+
+def build_docx(lines):
+    """DOCX d'un paragraphe par ligne"""
+    document = docx.Document()
+    for line in lines:
+        document.add_paragraph(line)
+    output = io.BytesIO()
+    document.save(output)
+    return output.getvalue()
+
+def process_upload(content, filename):
+    """Même chemin que l'application : upload en mémoire (BytesIO), extraction"""
+    text = extract_text(io.BytesIO(content), filename)
+    return text, extract_fields(text)
+
+def main():
+    """Fonction principale"""
+    parser = argparse.ArgumentParser(description="Test d'endurance mémoire de l'extraction")
+    parser.add_argument('--files', type=int, default=2000, help="Nombre de CV traités")
+    parser.add_argument('--warmup', type=int, default=200, help="CV traités avant la mesure de référence")
+    parser.add_argument('--files-per-session', type=int, default=5, help="CV par session simulée")
+    parser.add_argument('--session-ttl', type=float, default=60, help="Inactivité avant purge (secondes simulées)")
+    parser.add_argument('--max-growth-mb', type=float, default=30, help="Croissance RSS tolérée (Mo)")
+    parser.add_argument('--trace', action='store_true', help="Affiche les plus fortes allocations restantes")
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    store = IdleSessionStore(ttl=args.session_ttl)
+    # Horloge simulée : une seconde par CV, les sessions terminées sont purgées après le TTL
+    clock = 0.0
+    baseline = None
+    snapshot = None
+    start = time.perf_counter()
+
+    print(f"🧪 {args.files} CV (PDF/DOCX), {args.files_per_session} par session, TTL {args.session_ttl:.0f}s")
+    print("-" * 50)
+    for index in range(args.files):
+        if index == args.warmup:
+            gc.collect()
+            baseline = get_rss()
+            if args.trace:
+                tracemalloc.start(10)
+                snapshot = tracemalloc.take_snapshot()
+            print(f"📏 RSS de référence après {index} CV : {format_bytes(baseline)}")
+
+        lines = build_lines(index, rng)
+        if index % 2:
+            filename, content = f"cv_{index}.docx", build_docx(lines)
+        else:
+            filename, content = f"cv_{index}.pdf", build_pdf(lines)
+        text, fields = process_upload(content, filename)
+        if not text or fields['email'] != f"candidat.{index}@example.com":
+            print(f"❌ Extraction incorrecte pour {filename}")
+            sys.exit(1)
+
+        clock += 1
+        session_id = f"session-{index // args.files_per_session}"
+        store.set(session_id, 'extraction', {'text': text, 'fields': fields}, now=clock)
+        store.set(session_id, 'msg_auto', f"Bonjour {fields['email']}", now=clock)
+        store.evict_idle(now=clock)
+
+        if index and index % 500 == 0:
+            print(f"   {index:6} CV | RSS {format_bytes(get_rss())} | sessions {len(store)}")
+
+    gc.collect()
+    final = get_rss()
+    elapsed = time.perf_counter() - start
+    print("-" * 50)
+    print(f"⏱️  {args.files} CV en {elapsed:.1f}s ({args.files / elapsed:.0f} CV/s)")
+    print(f"📦 Sessions conservées : {len(store)} ({format_bytes(store.total_size())})")
+    if baseline is None:
+        print("⚠️ Pas assez de CV pour dépasser l'échauffement")
+        return
+
+    if snapshot is not None:
+        print("🔎 Plus fortes allocations restantes depuis la référence :")
+        for stat in tracemalloc.take_snapshot().compare_to(snapshot, 'lineno')[:10]:
+            print(f"   {stat}")
+
+    growth = final - baseline
+    print(f"📈 RSS finale : {format_bytes(final)} (croissance {format_bytes(growth)})")
+    if growth > args.max_growth_mb * 1024 * 1024:
+        print(f"❌ Croissance supérieure à {args.max_growth_mb:.0f} Mo : fuite probable")
+        sys.exit(1)
+    print("✅ Mémoire bornée")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+"""
+Calendrier ouvré et grille des créneaux d'entretien
+
+- Jours fériés français (dates fixes et fêtes mobiles calculées à partir de
+  Pâques), calculés une fois par année puis mis en cache : savoir si une date
+  est ouvrée est une simple recherche dans un dictionnaire.
+- Grille des créneaux ("HH:MM" toutes les SLOT_MINUTES minutes) construite une
+  fois par plage horaire ; le filtrage des créneaux occupés marque les
+  créneaux par calcul d'indice, sans reparcourir la grille pour chaque
+  événement. Un créneau n'est proposé que si l'entretien entier (sa durée)
+  tient dans les horaires et ne chevauche aucun événement.
+- Horaires par interviewer, optionnels, dans un fichier JSON (variable
+  INTERVIEWER_HOURS_FILE) ; les interviewers absents du fichier ont les
+  horaires par défaut (9h-20h, du lundi au vendredi) :
+
+    {
+        "Marie Dupont": {"start": "10:00", "end": "18:00", "weekdays": [0, 1, 2, 3]}
+    }
+
+Les jours fériés propres à l'Alsace-Moselle (Vendredi saint, 26 décembre)
+sont ajoutés avec HOLIDAY_REGION=alsace-moselle.
+"""
+
+import os
+import json
+from datetime import date, timedelta
+from functools import lru_cache
+
+# Pas des créneaux (minutes)
+SLOT_MINUTES = 15
+
+# Horaires par défaut : de 9h à 20h (tout entretien doit être terminé à `end`)
+DEFAULT_HOURS = {
+    'start': '09:00',
+    'end': '20:00',
+    'weekdays': (0, 1, 2, 3, 4),  # lundi à vendredi
+}
+
+# Fichier d'horaires par interviewer (optionnel)
+INTERVIEWER_HOURS_FILE = os.environ.get('INTERVIEWER_HOURS_FILE')
+
+# Jours fériés régionaux ('alsace-moselle' ou vide)
+HOLIDAY_REGION = os.environ.get('HOLIDAY_REGION', '')
+
+# Recherche du prochain jour ouvré : au-delà, l'interviewer n'a aucun jour travaillé
+MAX_SEARCH_DAYS = 366
+
+def time_to_minutes(value):
+    """Convertit "HH:MM" en minutes depuis minuit"""
+    hours, minutes = value.split(':')
+    return int(hours) * 60 + int(minutes)
+
+def minutes_to_time(value):
+    """Convertit des minutes depuis minuit en "HH:MM" """
+    return f"{value // 60:02d}:{value % 60:02d}"
+
+def get_easter_sunday(year):
+    """Date du dimanche de Pâques (calendrier grégorien, algorithme de Meeus/Jones/Butcher)"""
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return date(year, month, day + 1)
+
+@lru_cache(maxsize=32)
+def get_holidays(year, region=HOLIDAY_REGION):
+    """
+    Jours fériés d'une année
+
+    Returns:
+        Dictionnaire {date: nom du jour férié}
+    """
+    easter = get_easter_sunday(year)
+    holidays = {
+        date(year, 1, 1): "Jour de l'an",
+        easter + timedelta(days=1): "Lundi de Pâques",
+        date(year, 5, 1): "Fête du Travail",
+        date(year, 5, 8): "Victoire 1945",
+        easter + timedelta(days=39): "Ascension",
+        easter + timedelta(days=50): "Lundi de Pentecôte",
+        date(year, 7, 14): "Fête nationale",
+        date(year, 8, 15): "Assomption",
+        date(year, 11, 1): "Toussaint",
+        date(year, 11, 11): "Armistice 1918",
+        date(year, 12, 25): "Noël",
+    }
+    if region == 'alsace-moselle':
+        holidays[easter - timedelta(days=2)] = "Vendredi saint"
+        holidays[date(year, 12, 26)] = "Saint-Étienne"
+    return holidays
+
+def get_holiday_name(day):
+    """Nom du jour férié, ou None si la date n'est pas fériée"""
+    return get_holidays(day.year).get(day)
+
+def validate_hours(name, hours):
+    """Vérifie des horaires (plage alignée sur la grille, jours 0 à 6)"""
+    start = time_to_minutes(hours['start'])
+    end = time_to_minutes(hours['end'])
+    if start % SLOT_MINUTES or end % SLOT_MINUTES or not 0 <= start < end <= 24 * 60:
+        raise ValueError(f"Horaires invalides pour {name} : {hours['start']}-{hours['end']}")
+    if not set(hours['weekdays']) <= set(range(7)):
+        raise ValueError(f"Jours invalides pour {name} : {hours['weekdays']}")
+
+@lru_cache(maxsize=8)
+def load_interviewer_hours(hours_file=None):
+    """
+    Charge les horaires par interviewer d'un fichier JSON
+
+    Returns:
+        Dictionnaire {interviewer: {start, end, weekdays}} (horaires par
+        défaut complétés par ceux du fichier)
+    """
+    if not hours_file:
+        return {}
+    with open(hours_file, 'r', encoding='utf-8') as f:
+        configured = json.load(f)
+    hours = {}
+    for interviewer, values in configured.items():
+        merged = {**DEFAULT_HOURS, **values}
+        merged['weekdays'] = tuple(merged['weekdays'])
+        validate_hours(interviewer, merged)
+        hours[interviewer] = merged
+    return hours
+
+def get_working_hours(interviewer=None, hours_file=INTERVIEWER_HOURS_FILE):
+    """Horaires d'un interviewer (horaires par défaut s'il n'est pas configuré)"""
+    return load_interviewer_hours(hours_file).get(interviewer, DEFAULT_HOURS)
+
+def is_business_day(day, interviewer=None):
+    """Indique si la date est un jour travaillé (jour de semaine de l'interviewer, hors jours fériés)"""
+    return day.weekday() in get_working_hours(interviewer)['weekdays'] and day not in get_holidays(day.year)
+
+def next_business_day(day, interviewer=None):
+    """Premier jour travaillé à partir de `day` (inclus), `day` si aucun n'est trouvé"""
+    for offset in range(MAX_SEARCH_DAYS):
+        candidate = day + timedelta(days=offset)
+        if is_business_day(candidate, interviewer):
+            return candidate
+    return day
+
+def get_slot_count(duration_minutes):
+    """Nombre de créneaux de la grille occupés par un entretien (arrondi au créneau supérieur)"""
+    return max(1, -(-duration_minutes // SLOT_MINUTES))
+
+@lru_cache(maxsize=64)
+def get_slot_grid(start=DEFAULT_HOURS['start'], end=DEFAULT_HOURS['end'], duration_minutes=SLOT_MINUTES):
+    """
+    Heures de début "HH:MM", toutes les SLOT_MINUTES minutes, d'un entretien
+    de `duration_minutes` terminé au plus tard à `end`
+
+    Returns:
+        Tuple (immuable : partagé entre les appels)
+    """
+    last_start = time_to_minutes(end) - get_slot_count(duration_minutes) * SLOT_MINUTES
+    return tuple(
+        minutes_to_time(minute)
+        for minute in range(time_to_minutes(start), last_start + 1, SLOT_MINUTES)
+    )
+
+def get_slots(interviewer=None, duration_minutes=SLOT_MINUTES):
+    """Heures de début possibles d'un entretien dans les horaires d'un interviewer"""
+    hours = get_working_hours(interviewer)
+    return get_slot_grid(hours['start'], hours['end'], duration_minutes)
+
+def get_free_slots(busy_intervals, interviewer=None, duration_minutes=SLOT_MINUTES):
+    """
+    Heures de début d'un entretien qui tient dans les horaires d'un interviewer
+    sans chevaucher aucun intervalle occupé
+
+    Args:
+        busy_intervals: Intervalles (début, fin) en minutes depuis minuit du
+            jour concerné ; les bornes hors de la journée sont acceptées
+        interviewer: Interviewer dont on utilise les horaires
+        duration_minutes: Durée de l'entretien (défaut : un créneau)
+
+    Returns:
+        Liste de créneaux "HH:MM"
+    """
+    hours = get_working_hours(interviewer)
+    grid = get_slot_grid(hours['start'], hours['end'])
+    grid_start = time_to_minutes(hours['start'])
+    free = bytearray(b'\x01') * len(grid)
+    for busy_start, busy_end in busy_intervals:
+        # Créneaux [first, last[ chevauchant l'intervalle
+        first = max(0, (busy_start - grid_start) // SLOT_MINUTES)
+        last = min(len(grid), -(-(busy_end - grid_start) // SLOT_MINUTES))
+        if first < last:
+            free[first:last] = bytes(last - first)
+    # Créneaux libres consécutifs à partir de chaque créneau (parcours à rebours) :
+    # l'entretien peut commencer là où il en reste assez pour sa durée
+    needed = get_slot_count(duration_minutes)
+    run = 0
+    free_run = [0] * len(grid)
+    for i in range(len(grid) - 1, -1, -1):
+        run = run + 1 if free[i] else 0
+        free_run[i] = run
+    return [slot for slot, length in zip(grid, free_run) if length >= needed]
@@ -0,0 +1,372 @@
+#!/usr/bin/env python3
+"""
+Réconciliation du planning des entretiens avec Google Calendar
+
+Le planning local (table `interviews` de la base) est l'état voulu : chaque
+entretien créé depuis l'application y est enregistré avec l'identifiant de
+son événement. La réconciliation :
+1. lit les événements modifiés depuis la dernière exécution (synchronisation
+   incrémentale par syncToken ; synchronisation complète au premier lancement
+   ou si le jeton a expiré) et enregistre leur état côté Google ;
+2. compare planning local et agenda ;
+3. applique les écarts par requêtes groupées (batch) : création des
+   événements manquants, mise à jour des horaires, annulations.
+
+Un événement supprimé directement dans l'agenda est considéré comme annulé
+par le recruteur : l'entretien est marqué annulé dans le planning local.
+
+Le candidat n'est pas invité aux événements (il reçoit le lien Meet par le
+message d'entretien) : Google ne le prévient donc pas d'une annulation. Les
+candidats dont l'entretien a été annulé sont listés en fin d'exécution.
+
+Utilisation :
+    python calendar_sync.py                             # synchronise et applique les écarts
+    python calendar_sync.py --dry-run                   # affiche les écarts sans rien modifier
+    python calendar_sync.py --cancel-date 2026-03-12    # annule les entretiens d'une journée
+    python calendar_sync.py --cancel-email a@b.fr       # annule les entretiens d'un candidat
+"""
+
+import sys
+import time
+import argparse
+from datetime import datetime
+from zoneinfo import ZoneInfo
+from collections import Counter
+
+from googleapiclient.errors import HttpError
+
+from cv_store import CVStore, INTERVIEW_CANCELLED
+from google_calls import (
+    BACKGROUND_DEADLINE,
+    CircuitOpenError,
+    MAX_RETRIES,
+    execute_request,
+    get_retry_delay,
+    is_retryable
+)
+from google_meet_config import build_event_body, build_event_times, get_meet_link
+
+DEFAULT_CALENDAR_ID = 'primary'
+DEFAULT_TIMEZONE = 'Europe/Paris'
+
+# Requêtes par batch (limite Google : 1000, 50 recommandé pour Calendar)
+BATCH_SIZE = 50
+# Événements par page lors de la synchronisation
+PAGE_SIZE = 250
+
+# Actions de réconciliation
+ACTION_CREATE = 'create'  # confirmé localement, absent de l'agenda
+ACTION_UPDATE = 'update'  # horaire ou titre différent dans l'agenda
+ACTION_CANCEL = 'cancel'  # annulé localement, encore présent dans l'agenda
+ACTION_LOST = 'lost'  # supprimé dans l'agenda, encore confirmé localement
+
+ACTION_LABELS = {
+    ACTION_CREATE: "à créer",
+    ACTION_UPDATE: "à déplacer",
+    ACTION_CANCEL: "à annuler",
+    ACTION_LOST: "supprimés dans l'agenda",
+}
+
+def get_remote_state(event):
+    """État d'un événement Google Calendar au format de CVStore.update_remote_many"""
+    return {
+        'event_id': event['id'],
+        'remote_status': event.get('status', 'confirmed'),
+        'remote_start': event.get('start', {}).get('dateTime'),
+        'remote_end': event.get('end', {}).get('dateTime'),
+        'remote_summary': event.get('summary'),
+        'etag': event.get('etag'),
+        'meet_link': get_meet_link(event),
+    }
+
+def list_changed_events(service, calendar_id, sync_token, tracked_ids):
+    """
+    Événements suivis modifiés depuis `sync_token` (tous si None)
+
+    Returns:
+        Tuple (événements, nouveau jeton de synchronisation)
+
+    Raises:
+        HttpError 410: si le jeton a expiré
+    """
+    events = []
+    page_token = None
+    while True:
+        params = {'calendarId': calendar_id, 'maxResults': PAGE_SIZE, 'showDeleted': True}
+        if sync_token:
+            params['syncToken'] = sync_token
+        if page_token:
+            params['pageToken'] = page_token
+        response = execute_request(service.events().list(**params), 'calendar', deadline=BACKGROUND_DEADLINE)
+        # Seuls les événements des entretiens sont conservés (mémoire bornée sur un gros agenda)
+        events.extend(event for event in response.get('items', []) if event['id'] in tracked_ids)
+        page_token = response.get('nextPageToken')
+        if not page_token:
+            return events, response.get('nextSyncToken')
+
+def sync_calendar(service, store, calendar_id=DEFAULT_CALENDAR_ID, full=False):
+    """
+    Enregistre dans la base l'état des événements des entretiens
+
+    Args:
+        full: Ignore le jeton stocké et relit tout l'agenda
+
+    Returns:
+        Nombre d'événements d'entretiens modifiés dans l'agenda
+    """
+    tracked_ids = {interview['event_id'] for interview in store.list_interviews(calendar_id)}
+    sync_token = None if full else store.get_sync_token(calendar_id)
+    try:
+        events, next_sync_token = list_changed_events(service, calendar_id, sync_token, tracked_ids)
+    except HttpError as e:
+        if e.resp.status != 410 or sync_token is None:
+            raise
+        # Jeton expiré : synchronisation complète
+        events, next_sync_token = list_changed_events(service, calendar_id, None, tracked_ids)
+    store.update_remote_many([get_remote_state(event) for event in events])
+    store.set_sync_token(calendar_id, next_sync_token)
+    return len(events)
+
+def parse_event_time(value, timezone):
+    """Date RFC 3339 d'un événement Google en datetime avec fuseau (`timezone` si non précisé)"""
+    parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone)
+
+def is_same_schedule(interview):
+    """Indique si l'horaire et le titre de l'agenda correspondent au planning local"""
+    if not interview['remote_start'] or not interview['remote_end']:
+        return False
+    local = build_event_times(
+        interview['start_time'], interview['duration_minutes'], interview['timezone'] or DEFAULT_TIMEZONE
+    )
+    timezone = ZoneInfo(local['start']['timeZone'])
+    local_start = parse_event_time(local['start']['dateTime'], timezone)
+    local_end = parse_event_time(local['end']['dateTime'], timezone)
+    return (
+        parse_event_time(interview['remote_start'], timezone) == local_start
+        and parse_event_time(interview['remote_end'], timezone) == local_end
+        and (interview['remote_summary'] or '') == (interview['summary'] or '')
+    )
+
+def diff_schedule(interviews, since=None):
+    """
+    Compare le planning local à l'état connu de l'agenda
+
+    Args:
+        interviews: Entretiens (CVStore.list_interviews), avec l'état distant synchronisé
+        since: Ignore les entretiens commençant avant cette date ("YYYY-MM-DD HH:MM")
+
+    Returns:
+        Liste de tuples (action, entretien)
+    """
+    actions = []
+    for interview in interviews:
+        if since and interview['start_time'] < since:
+            continue
+        remote_status = interview['remote_status']
+        if interview['status'] == INTERVIEW_CANCELLED:
+            if remote_status not in (None, 'cancelled'):
+                actions.append((ACTION_CANCEL, interview))
+        elif remote_status is None:
+            actions.append((ACTION_CREATE, interview))
+        elif remote_status == 'cancelled':
+            actions.append((ACTION_LOST, interview))
+        elif not is_same_schedule(interview):
+            actions.append((ACTION_UPDATE, interview))
+    return actions
+
+def build_action_request(service, action, interview):
+    """Requête Google Calendar (non exécutée) d'une action de réconciliation"""
+    calendar_id = interview['calendar_id']
+    event_id = interview['event_id']
+    timezone = interview['timezone'] or DEFAULT_TIMEZONE
+    if action == ACTION_CREATE:
+        body = build_event_body(
+            event_id, interview['summary'], interview['start_time'], interview['duration_minutes'], timezone
+        )
+        return service.events().insert(calendarId=calendar_id, body=body, conferenceDataVersion=1)
+    if action == ACTION_UPDATE:
+        body = {
+            'summary': interview['summary'],
+            **build_event_times(interview['start_time'], interview['duration_minutes'], timezone),
+        }
+        return service.events().patch(calendarId=calendar_id, eventId=event_id, body=body)
+    # Annulation : Google ne prévient que les invités de l'événement (co-interviewers
+    # ajoutés à la main) ; le candidat n'en fait pas partie, main() liste les
+    # candidats à prévenir
+    return service.events().delete(calendarId=calendar_id, eventId=event_id, sendUpdates='all')
+
+def execute_batch(service, requests):
+    """
+    Exécute des requêtes en un seul appel HTTP (batch)
+
+    Returns:
+        Liste de tuples (réponse, erreur) dans l'ordre des requêtes
+    """
+    responses = {}
+
+    def on_response(request_id, response, exception):
+        responses[request_id] = (response, exception)
+
+    batch = service.new_batch_http_request(callback=on_response)
+    for index, request in enumerate(requests):
+        batch.add(request, request_id=str(index))
+    # Les requêtes du batch sont idempotentes (identifiant d'événement fixé) : réessai sans risque
+    execute_request(batch, 'calendar', deadline=BACKGROUND_DEADLINE)
+    return [responses[str(index)] for index in range(len(requests))]
+
+def apply_actions(service, store, actions, batch_size=BATCH_SIZE, max_retries=MAX_RETRIES):
+    """
+    Applique les écarts par batch et enregistre le nouvel état de l'agenda
+
+    Les requêtes refusées temporairement (429, 5xx) sont regroupées dans un
+    nouveau batch après un délai, au plus `max_retries` fois.
+
+    Returns:
+        Tuple (Counter {action: nombre appliqué}, liste (action, entretien, erreur) des échecs)
+    """
+    applied = Counter()
+    failures = []
+
+    lost = [interview['event_id'] for action, interview in actions if action == ACTION_LOST]
+    if lost:
+        store.cancel_interviews(lost)
+        applied[ACTION_LOST] = len(lost)
+
+    pending = [(action, interview) for action, interview in actions if action != ACTION_LOST]
+    attempt = 0
+    while pending:
+        retry = []
+        retry_delay = 0
+        for offset in range(0, len(pending), batch_size):
+            chunk = pending[offset:offset + batch_size]
+            results = execute_batch(service, [build_action_request(service, *item) for item in chunk])
+            updates = []
+            for (action, interview), (response, error) in zip(chunk, results):
+                status = error.resp.status if isinstance(error, HttpError) else None
+                if error is None and action == ACTION_CANCEL:
+                    updates.append({'event_id': interview['event_id'], 'remote_status': 'cancelled'})
+                elif error is None:
+                    updates.append(get_remote_state(response))
+                elif action == ACTION_CANCEL and status in (404, 410):
+                    # Déjà supprimé
+                    updates.append({'event_id': interview['event_id'], 'remote_status': 'cancelled'})
+                elif action == ACTION_CREATE and status == 409:
+                    # Déjà créé (réponse perdue lors d'une exécution précédente) : état relu
+                    event = execute_request(
+                        service.events().get(calendarId=interview['calendar_id'], eventId=interview['event_id']),
+                        'calendar', deadline=BACKGROUND_DEADLINE
+                    )
+                    updates.append(get_remote_state(event))
+                elif is_retryable(error) and attempt < max_retries:
+                    retry.append((action, interview))
+                    retry_delay = max(retry_delay, get_retry_delay(error, attempt))
+                    continue
+                else:
+                    failures.append((action, interview, error))
+                    continue
+                applied[action] += 1
+            store.update_remote_many(updates)
+        if retry:
+            time.sleep(retry_delay)
+            attempt += 1
+        pending = retry
+    return applied, failures
+
+def select_interviews_to_cancel(interviews, emails=None, date=None):
+    """Identifiants des entretiens confirmés d'une liste d'emails et/ou d'une journée (YYYY-MM-DD)"""
+    emails = {email.lower() for email in emails or []}
+    return [
+        interview['event_id'] for interview in interviews
+        if interview['status'] != INTERVIEW_CANCELLED
+        and (not emails or interview['email'].lower() in emails)
+        and (not date or interview['start_time'].startswith(date))
+    ]
+
+def get_cancelled_interviews(actions, failures):
+    """Entretiens annulés avec succès (candidats à prévenir)"""
+    failed = {interview['event_id'] for _, interview, _ in failures}
+    return [
+        (action, interview) for action, interview in actions
+        if action in (ACTION_CANCEL, ACTION_LOST) and interview['event_id'] not in failed
+    ]
+
+def main():
+    """Fonction principale"""
+    parser = argparse.ArgumentParser(description="Réconciliation des entretiens avec Google Calendar")
+    parser.add_argument('--db', help="Fichier de base SQLite (défaut : CV_DB_PATH ou cv_data.db)")
+    parser.add_argument('--calendar', default=DEFAULT_CALENDAR_ID, help="Agenda à réconcilier")
+    parser.add_argument('--dry-run', action='store_true', help="Affiche les écarts sans rien modifier")
+    parser.add_argument('--full', action='store_true', help="Synchronisation complète (ignore le jeton)")
+    parser.add_argument('--all', action='store_true', help="Inclut les entretiens passés")
+    parser.add_argument('--cancel-email', nargs='+', help="Annule les entretiens de ces candidats")
+    parser.add_argument('--cancel-date', help="Annule les entretiens de cette journée (YYYY-MM-DD)")
+    args = parser.parse_args()
+
+    if args.cancel_date:
+        try:
+            datetime.strptime(args.cancel_date, "%Y-%m-%d")
+        except ValueError:
+            parser.error(f"date invalide : {args.cancel_date}")
+
+    from google_meet_config import create_google_calendar_service
+    service = create_google_calendar_service()
+    if service is None:
+        print("❌ Authentification Google requise : connectez-vous depuis l'application")
+        sys.exit(1)
+
+    store = CVStore(args.db)
+    print(f"📅 Réconciliation de l'agenda {args.calendar} ({store.db_file})")
+    start = time.perf_counter()
+    try:
+        changed = sync_calendar(service, store, args.calendar, full=args.full)
+        print(f"🔄 {changed} événement(s) d'entretien modifié(s) dans l'agenda")
+
+        if args.cancel_email or args.cancel_date:
+            to_cancel = select_interviews_to_cancel(
+                store.list_interviews(args.calendar), args.cancel_email, args.cancel_date
+            )
+            if args.dry_run:
+                print(f"🗑️ {len(to_cancel)} entretien(s) seraient annulés")
+            else:
+                store.cancel_interviews(to_cancel)
+                print(f"🗑️ {len(to_cancel)} entretien(s) annulé(s) dans le planning")
+
+        since = None if args.all else datetime.now().strftime("%Y-%m-%d %H:%M")
+        actions = diff_schedule(store.list_interviews(args.calendar), since)
+        if not actions:
+            print("✅ Planning et agenda sont identiques")
+            return
+        for action, count in Counter(action for action, _ in actions).items():
+            print(f"   {count} entretien(s) {ACTION_LABELS[action]}")
+        if args.dry_run:
+            for action, interview in actions:
+                print(f"   {ACTION_LABELS[action]:24} {interview['start_time']}  {interview['email']}")
+            return
+
+        applied, failures = apply_actions(service, store, actions)
+    except CircuitOpenError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    except HttpError as e:
+        print(f"❌ Erreur Google Calendar : {e}")
+        sys.exit(1)
+    finally:
+        store.close()
+
+    for action, count in applied.items():
+        print(f"   ✅ {ACTION_LABELS[action]} : {count}")
+    for action, interview, error in failures:
+        print(f"   ❌ {ACTION_LABELS[action]} {interview['start_time']} {interview['email']} : {error}")
+    cancelled = get_cancelled_interviews(actions, failures)
+    if cancelled:
+        print(f"📧 {len(cancelled)} candidat(s) à prévenir de l'annulation (Google ne les notifie pas) :")
+        for action, interview in cancelled:
+            origin = "supprimé dans l'agenda" if action == ACTION_LOST else "annulé"
+            print(f"   {interview['email']:32} {interview['start_time']}  ({origin})")
+    print(f"⏱️ Terminé en {time.perf_counter() - start:.1f}s")
+    if failures:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,333 @@
+"""
+Fonctions d'extraction d'informations depuis les CV (PDF / DOCX)
+
+Ce module est partagé entre l'application Streamlit et les outils
+en ligne de commande (démon d'ingestion, etc.).
+"""
+
+import os
+import re
+import json
+import hashlib
+import inspect
+from functools import lru_cache
+import streamlit as st
+import pdfplumber
+import docx
+
+from language_detection import LANGUAGE_MODEL_VERSION, detect_language, get_language_model, get_trigrams
+
+# Extensions de fichiers prises en charge
+SUPPORTED_EXTENSIONS = ('pdf', 'docx')
+
+# Règles d'extraction
+# Toute modification (règles ou fonctions listées dans FIELD_EXTRACTORS) change
+# la version du champ concerné (voir get_extractor_versions) : reextraction.py
+# ne recalcule alors que ce champ.
+EMAIL_PATTERN = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
+
+# Tokenizer unique des numéros de téléphone (une seule passe sur le texte)
+# Le motif commence par une classe de caractères [+0(] : le moteur de regex
+# saute directement aux positions candidates, puis une assertion arrière
+# aiguille vers la bonne variante selon ce premier caractère.
+_PHONE_FR_TAIL = r'[\s.-]?(?:\(0\)[\s.-]?|0)?[1-9](?:[\s.-]?\d{2}){4}'
+_PHONE_INTL_TAIL = (r'[1-9]\d{0,2}\)?[\s.-]?(?:\(0\)[\s.-]?)?'
+                    r'\(?\d{1,4}\)?(?:[\s.-]?\(?\d{1,4}\)?){1,4}')
+PHONE_PATTERN = (
+    r'[+0(](?<![\d+].)(?:'                          # début de nombre
+    r'(?<=\+)\s?33' + _PHONE_FR_TAIL +              # +33 6 12 34 56 78, +33 (0)6..., +33 06...
+    r'|(?<=0)033' + _PHONE_FR_TAIL +                # 0033 6 12 34 56 78
+    r'|(?<=0)[1-9](?:[\s.-]?\d{2}){4}' +            # 06 12 34 56 78, 06.12.34.56.78
+    r'|(?<=\+)\s?' + _PHONE_INTL_TAIL +             # +44 20 7946 0958, +1 (415) 555-1234
+    r'|(?<=0)0' + _PHONE_INTL_TAIL +                # 0049 30 1234567
+    r'|(?<=\()(?:\+\s?|00)' + _PHONE_INTL_TAIL +    # (+49) 30 1234567
+    r')(?!\d)'                                      # fin de nombre
+)
+PHONE_REGEX = re.compile(PHONE_PATTERN)
+NON_DIGIT_REGEX = re.compile(r'\D')
+
+# Longueurs valides (E.164 : 15 chiffres maximum, indicatif compris)
+PHONE_MIN_DIGITS = 8
+PHONE_MAX_DIGITS = 15
+
+# Règles par langue (voir language_detection) : un CV n'est analysé qu'avec
+# les mots-clés de sa langue et les termes communs. Les types de contrat sont
+# testés dans l'ordre.
+CONTRACT_KEYWORDS = {
+    'fr': {
+        'Alternance': ['alternance', 'apprentissage', 'contrat d\'apprentissage',
+                       'contrat de professionnalisation'],
+        'Stage': ['stage', 'stages', 'stagiaire', 'stagiare'],
+        'CDI': ['cdi', 'contrat à durée indéterminée'],
+        'CDD': ['cdd', 'contrat à durée déterminée'],
+        'Freelance': ['freelance', 'indépendant', 'indépendante', 'consultant', 'consultante'],
+        'Intérim': ['intérim', 'interim', 'intérimaire', 'travail temporaire'],
+    },
+    'en': {
+        'Alternance': ['apprenticeship', 'work-study', 'work study'],
+        'Stage': ['internship', 'internships', 'intern', 'trainee'],
+        'CDI': ['permanent contract', 'permanent position', 'permanent role', 'permanent'],
+        'CDD': ['fixed-term', 'fixed term'],
+        'Freelance': ['freelance', 'freelancer', 'self-employed', 'consultant'],
+        'Intérim': ['temp agency', 'temporary', 'interim'],
+    },
+}
+
+# Termes français sans ambiguïté en anglais, fréquents dans les CV anglophones
+# envoyés à un recruteur français ("Looking for a CDI in Paris") : appliqués
+# quelle que soit la langue. "stage" seul reste réservé au français (an early
+# stage, stage manager...).
+CONTRACT_KEYWORDS_SHARED = {
+    'Alternance': ['alternance', 'apprentissage', 'contrat d\'apprentissage',
+                   'contrat de professionnalisation'],
+    'Stage': ['stagiaire', 'stage de', 'stage d\'', 'stage en'],
+    'CDI': ['cdi'],
+    'CDD': ['cdd'],
+    'Intérim': ['intérim', 'intérimaire'],
+}
+
+DURATION_PATTERNS = {
+    'fr': [
+        r'(\d+)\s*(mois)\b',  # 6 mois
+        r'(\d+)\s*(semaines?)\b',  # 2 semaines
+        r'(\d+)\s*(jours?)\b',  # 5 jours
+        r'(\d+)\s*(ans?)\b',  # 2 ans
+    ],
+    'en': [
+        r'(\d+)\s*(months?)\b',  # 3 months
+        r'(\d+)\s*(weeks?)\b',  # 1 week
+        r'(\d+)\s*(days?)\b',  # 3 days
+        r'(\d+)\s*(years?)\b',  # 1 year
+    ],
+}
+
+def compile_contract_rules(keywords):
+    """
+    Compile les mots-clés d'une langue en une seule regex (mots entiers)
+
+    Chaque type de contrat correspond à un groupe nommé c0, c1... dans l'ordre
+    de priorité ; l'apostrophe accepte aussi sa variante typographique.
+    """
+    groups = []
+    for index, words in enumerate(keywords.values()):
+        alternatives = '|'.join(
+            re.escape(word).replace("'", "['’]")
+            for word in sorted(words, key=len, reverse=True)
+        )
+        groups.append(f'(?P<c{index}>{alternatives})')
+    return re.compile(r'\b(?:' + '|'.join(groups) + r')\b')
+
+def merge_contract_keywords(keywords, shared):
+    """Ajoute les termes communs aux mots-clés d'une langue (ordre des types conservé)"""
+    return {
+        contract_type: words + [word for word in shared.get(contract_type, []) if word not in words]
+        for contract_type, words in keywords.items()
+    }
+
+CONTRACT_REGEXES = {
+    language: (compile_contract_rules(merge_contract_keywords(keywords, CONTRACT_KEYWORDS_SHARED)), list(keywords))
+    for language, keywords in CONTRACT_KEYWORDS.items()
+}
+DURATION_REGEXES = {
+    language: [re.compile(pattern) for pattern in patterns]
+    for language, patterns in DURATION_PATTERNS.items()
+}
+
+def extract_text_from_pdf(pdf_file):
+    """Extrait le texte d'un fichier PDF"""
+    try:
+        with pdfplumber.open(pdf_file) as pdf:
+            page_texts = []
+            for page in pdf.pages:
+                page_texts.append(page.extract_text() or "")
+                # Libère les objets de mise en page de la page (conservés sinon jusqu'à la fermeture)
+                page.flush_cache()
+        return "".join(page_texts)
+    except Exception as e:
+        st.error(f"Erreur lors de la lecture du PDF: {e}")
+        return ""
+
+def extract_text_from_docx(docx_file):
+    """Extrait le texte d'un fichier DOCX"""
+    try:
+        doc = docx.Document(docx_file)
+        return "".join(paragraph.text + "\n" for paragraph in doc.paragraphs)
+    except Exception as e:
+        st.error(f"Erreur lors de la lecture du DOCX: {e}")
+        return ""
+
+def get_file_extension(filename):
+    """Retourne l'extension du fichier en minuscules (sans le point)"""
+    return os.path.splitext(filename)[1].lstrip('.').lower()
+
+def extract_text(cv_file, filename):
+    """
+    Extrait le texte d'un CV selon son extension
+
+    Args:
+        cv_file: Chemin ou objet fichier du CV
+        filename: Nom du fichier (utilisé pour déterminer le format)
+
+    Returns:
+        Texte extrait, ou None si le format n'est pas supporté
+    """
+    file_extension = get_file_extension(filename)
+    if file_extension == 'pdf':
+        return extract_text_from_pdf(cv_file)
+    elif file_extension == 'docx':
+        return extract_text_from_docx(cv_file)
+    return None
+
+def extract_email(text):
+    """Extrait l'adresse email du texte"""
+    emails = re.findall(EMAIL_PATTERN, text)
+    return emails[0] if emails else ""
+
+def normalize_phone_match(match):
+    """
+    Valide et normalise au format E.164 un numéro trouvé par PHONE_REGEX
+
+    Returns:
+        Numéro normalisé (ex: +33612345678), ou None s'il est invalide
+    """
+    raw = match.group(0)
+    if raw[0] == '0' and raw[1] != '0':
+        # Numéro national français
+        return '+33' + NON_DIGIT_REGEX.sub('', raw)[1:]
+    # Le (0) de "+33 (0)6..." ou "+44 (0)20..." ne se compose pas depuis l'étranger
+    digits = NON_DIGIT_REGEX.sub('', raw.replace('(0)', ''))
+    if raw.lstrip('(').startswith('00'):
+        digits = digits[2:]
+    if digits.startswith('330'):
+        # "+33 06..." : le 0 national n'est pas composé après l'indicatif
+        digits = '33' + digits[3:]
+    if digits.startswith('33') and len(digits) != 11:
+        return None
+    if not PHONE_MIN_DIGITS <= len(digits) <= PHONE_MAX_DIGITS:
+        return None
+    return '+' + digits
+
+def extract_phones(text):
+    """
+    Extrait tous les numéros de téléphone du texte, normalisés en E.164
+
+    Returns:
+        Liste des numéros distincts, dans l'ordre d'apparition
+    """
+    phones = []
+    for match in PHONE_REGEX.finditer(text):
+        phone = normalize_phone_match(match)
+        if phone and phone not in phones:
+            phones.append(phone)
+    return phones
+
+def extract_phone(text):
+    """Extrait le numéro de téléphone du texte (le premier trouvé)"""
+    for match in PHONE_REGEX.finditer(text):
+        phone = normalize_phone_match(match)
+        if phone:
+            return phone
+    return ""
+
+def detect_contract_type(text, language=None):
+    """
+    Détecte le type de contrat dans le texte
+
+    Args:
+        text: Texte du CV
+        language: Langue du CV ('fr' ou 'en', détectée si absente)
+    """
+    regex, contract_types = CONTRACT_REGEXES[language or detect_language(text)]
+    # Un seul passage : on retient le type le plus prioritaire rencontré
+    best = None
+    for match in regex.finditer(text.lower()):
+        index = int(match.lastgroup[1:])
+        if best is None or index < best:
+            best = index
+            if best == 0:
+                break
+
+    return contract_types[best] if best is not None else "À compléter"
+
+def extract_duration(text, language=None):
+    """
+    Extrait la durée mentionnée dans le texte
+
+    Args:
+        text: Texte du CV
+        language: Langue du CV ('fr' ou 'en', détectée si absente)
+    """
+    text_lower = text.lower()
+    for regex in DURATION_REGEXES[language or detect_language(text)]:
+        match = regex.search(text_lower)
+        if match:
+            number, unit = match.groups()
+            return f"{number} {unit}"
+
+    return "À compléter"
+
+# Règles et fonctions de la détection de langue
+LANGUAGE_RULES = [LANGUAGE_MODEL_VERSION, detect_language, get_trigrams, get_language_model]
+
+# Extracteur et règles associés à chaque champ
+# Les règles listent aussi les fonctions auxiliaires appelées par l'extracteur :
+# leur code entre dans la version du champ.
+FIELD_EXTRACTORS = {
+    'email': (extract_email, [EMAIL_PATTERN]),
+    'phone': (extract_phone, [PHONE_PATTERN, PHONE_MIN_DIGITS, PHONE_MAX_DIGITS, normalize_phone_match]),
+    'contract_type': (detect_contract_type, [CONTRACT_KEYWORDS, CONTRACT_KEYWORDS_SHARED, merge_contract_keywords,
+                                             compile_contract_rules, *LANGUAGE_RULES]),
+    'duration': (extract_duration, [DURATION_PATTERNS, *LANGUAGE_RULES]),
+}
+
+# Champs dont les règles dépendent de la langue du CV
+LANGUAGE_FIELDS = ('contract_type', 'duration')
+
+def compute_rule_version(extractor, rules):
+    """
+    Empreinte courte des règles et du code d'un extracteur
+
+    Les fonctions présentes dans `rules` comptent par leur code source, les
+    autres règles par leur valeur.
+    """
+    digest = hashlib.sha256()
+    for rule in [extractor, *rules]:
+        if callable(rule):
+            digest.update(inspect.getsource(rule).encode('utf-8'))
+        else:
+            digest.update(json.dumps(rule, ensure_ascii=False).encode('utf-8'))
+    return digest.hexdigest()[:12]
+
+@lru_cache(maxsize=1)
+def get_extractor_versions():
+    """
+    Retourne la version courante de chaque extracteur
+
+    Returns:
+        Dictionnaire {champ: empreinte}
+    """
+    return {
+        field: compute_rule_version(extractor, rules)
+        for field, (extractor, rules) in FIELD_EXTRACTORS.items()
+    }
+
+def extract_fields(text, fields=None):
+    """
+    Applique les fonctions d'extraction sur le texte d'un CV
+
+    Args:
+        text: Texte brut du CV
+        fields: Champs à extraire (défaut : tous)
+
+    Returns:
+        Dictionnaire {champ: valeur}, par défaut {email, phone, contract_type, duration}
+    """
+    if fields is None:
+        fields = FIELD_EXTRACTORS.keys()
+    # La langue n'est détectée qu'une fois pour tous les champs qui en dépendent
+    language = detect_language(text) if any(field in LANGUAGE_FIELDS for field in fields) else None
+    return {
+        field: FIELD_EXTRACTORS[field][0](text, language) if field in LANGUAGE_FIELDS
+        else FIELD_EXTRACTORS[field][0](text)
+        for field in fields
+    }
@@ -0,0 +1,462 @@
+"""
+Stockage persistant (SQLite) des CV traités et des résultats d'extraction
+"""
+
+import os
+import json
+import hashlib
+import sqlite3
+import threading
+from datetime import datetime
+
+# Fichier de base de données (surchargeable par variable d'environnement)
+DB_FILE = os.environ.get('CV_DB_PATH', 'cv_data.db')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS candidates (
+    sha256 TEXT PRIMARY KEY,
+    filename TEXT NOT NULL,
+    source TEXT,
+    raw_text TEXT,
+    email TEXT,
+    phone TEXT,
+    contract_type TEXT,
+    duration TEXT,
+    field_versions TEXT,
+    created_at TEXT,
+    updated_at TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_candidates_email ON candidates(email);
+CREATE INDEX IF NOT EXISTS idx_candidates_contract ON candidates(contract_type, duration);
+CREATE TABLE IF NOT EXISTS ingested_messages (
+    message_id TEXT PRIMARY KEY,
+    label TEXT,
+    ingested_at TEXT
+);
+CREATE TABLE IF NOT EXISTS candidate_terms (
+    sha256 TEXT NOT NULL,
+    category TEXT NOT NULL,
+    term TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (sha256, category, term)
+);
+CREATE INDEX IF NOT EXISTS idx_candidate_terms_term ON candidate_terms(term, category);
+CREATE TABLE IF NOT EXISTS interviews (
+    event_id TEXT PRIMARY KEY,
+    calendar_id TEXT NOT NULL,
+    email TEXT NOT NULL,
+    sha256 TEXT,
+    interview_type TEXT,
+    summary TEXT,
+    start_time TEXT NOT NULL,
+    duration_minutes INTEGER NOT NULL,
+    timezone TEXT,
+    status TEXT NOT NULL,
+    meet_link TEXT,
+    remote_status TEXT,
+    remote_start TEXT,
+    remote_end TEXT,
+    remote_summary TEXT,
+    etag TEXT,
+    created_at TEXT,
+    updated_at TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_interviews_email ON interviews(email, interview_type, status);
+CREATE INDEX IF NOT EXISTS idx_interviews_sha256 ON interviews(sha256);
+CREATE TABLE IF NOT EXISTS calendar_sync (
+    calendar_id TEXT PRIMARY KEY,
+    sync_token TEXT,
+    synced_at TEXT
+);
+"""
+
+# Statuts d'un entretien dans le planning local (état voulu)
+INTERVIEW_CONFIRMED = 'confirmed'
+INTERVIEW_CANCELLED = 'cancelled'
+
+# Colonnes des champs extraits
+FIELD_COLUMNS = ('email', 'phone', 'contract_type', 'duration')
+
+# Colonnes ajoutées après la création initiale du schéma : {table: [(colonne, type)]}
+MIGRATIONS = {
+    'candidates': [('field_versions', 'TEXT'), ('terms_version', 'TEXT')],
+}
+
+def compute_sha256(data):
+    """Calcule l'empreinte SHA-256 d'un contenu binaire"""
+    return hashlib.sha256(data).hexdigest()
+
+def compute_stream_sha256(fileobj, chunk_size=1024 * 1024):
+    """Calcule l'empreinte SHA-256 d'un objet fichier lu par blocs depuis le début"""
+    digest = hashlib.sha256()
+    fileobj.seek(0)
+    for chunk in iter(lambda: fileobj.read(chunk_size), b''):
+        digest.update(chunk)
+    fileobj.seek(0)
+    return digest.hexdigest()
+
+def compute_file_sha256(path, chunk_size=1024 * 1024):
+    """Calcule l'empreinte SHA-256 d'un fichier sans le charger entièrement"""
+    with open(path, 'rb') as f:
+        return compute_stream_sha256(f, chunk_size)
+
+class CVStore:
+    """
+    Accès à la base SQLite des CV
+
+    La connexion est partagée entre threads et protégée par un verrou :
+    les écritures viennent des callbacks du pool de workers.
+    """
+
+    def __init__(self, db_file=None):
+        self.db_file = db_file or DB_FILE
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_file, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock:
+            # WAL : lectures concurrentes (Streamlit) pendant l'ingestion
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(SCHEMA)
+            self._migrate()
+            self._conn.commit()
+
+    def _migrate(self):
+        """Ajoute les colonnes manquantes aux bases créées par une version antérieure"""
+        for table, columns in MIGRATIONS.items():
+            existing = {row['name'] for row in self._conn.execute(f"PRAGMA table_info({table})")}
+            for column, column_type in columns:
+                if column not in existing:
+                    self._conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {column_type}")
+
+    def close(self):
+        """Ferme la connexion"""
+        with self._lock:
+            self._conn.close()
+
+    def has_candidate(self, sha256):
+        """Indique si un CV (par empreinte) a déjà été traité"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM candidates WHERE sha256 = ?", (sha256,)
+            ).fetchone()
+        return row is not None
+
+    def save_candidate(self, sha256, filename, raw_text, fields, source=None, versions=None):
+        """
+        Enregistre (ou met à jour) un CV et ses champs extraits
+
+        Args:
+            sha256: Empreinte du fichier
+            filename: Nom du fichier d'origine
+            raw_text: Texte brut extrait
+            fields: Dictionnaire {email, phone, contract_type, duration}
+            source: Origine du fichier (dossier, label Gmail, upload...)
+            versions: Versions des extracteurs utilisés {champ: empreinte}
+        """
+        now = datetime.now().isoformat(timespec='seconds')
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT INTO candidates (sha256, filename, source, raw_text, email, phone,
+                                        contract_type, duration, field_versions,
+                                        created_at, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(sha256) DO UPDATE SET
+                    filename = excluded.filename,
+                    source = excluded.source,
+                    raw_text = excluded.raw_text,
+                    email = excluded.email,
+                    phone = excluded.phone,
+                    contract_type = excluded.contract_type,
+                    duration = excluded.duration,
+                    field_versions = excluded.field_versions,
+                    updated_at = excluded.updated_at
+                """,
+                (sha256, filename, source, raw_text, fields.get('email'), fields.get('phone'),
+                 fields.get('contract_type'), fields.get('duration'),
+                 json.dumps(versions or {}), now, now)
+            )
+            self._conn.commit()
+
+    def update_fields_many(self, updates):
+        """
+        Met à jour des champs extraits sur plusieurs CV en une transaction
+
+        Args:
+            updates: Liste de tuples (sha256, champs, versions) ; seuls les
+                champs présents dans le dictionnaire sont modifiés, et
+                `versions` remplace les versions stockées
+        """
+        now = datetime.now().isoformat(timespec='seconds')
+        with self._lock:
+            for sha256, fields, versions in updates:
+                columns = [f"{column} = ?" for column in fields if column in FIELD_COLUMNS]
+                values = [fields[column] for column in fields if column in FIELD_COLUMNS]
+                self._conn.execute(
+                    f"UPDATE candidates SET {', '.join(columns + ['field_versions = ?', 'updated_at = ?'])} "
+                    "WHERE sha256 = ?",
+                    values + [json.dumps(versions), now, sha256]
+                )
+            self._conn.commit()
+
+    def save_terms_many(self, items, version):
+        """
+        Remplace le vecteur de termes (compétences, langues...) de plusieurs CV
+
+        Args:
+            items: Liste de tuples (sha256, {catégorie: {terme: occurrences}})
+            version: Version du dictionnaire de termes utilisé
+        """
+        with self._lock:
+            for sha256, terms in items:
+                self._conn.execute("DELETE FROM candidate_terms WHERE sha256 = ?", (sha256,))
+                self._conn.executemany(
+                    "INSERT INTO candidate_terms (sha256, category, term, count) VALUES (?, ?, ?, ?)",
+                    [(sha256, category, term, count)
+                     for category, counts in terms.items() for term, count in counts.items()]
+                )
+                self._conn.execute(
+                    "UPDATE candidates SET terms_version = ? WHERE sha256 = ?", (version, sha256)
+                )
+            self._conn.commit()
+
+    def get_terms(self, sha256):
+        """Retourne le vecteur de termes d'un CV {catégorie: {terme: occurrences}}"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT category, term, count FROM candidate_terms WHERE sha256 = ?", (sha256,)
+            ).fetchall()
+        terms = {}
+        for row in rows:
+            terms.setdefault(row['category'], {})[row['term']] = row['count']
+        return terms
+
+    def search_terms(self, terms, match_all=True, limit=50):
+        """
+        Recherche les CV contenant des termes canoniques
+
+        Args:
+            terms: Liste de termes canoniques (ex: ["Python", "Anglais"])
+            match_all: Si True, seuls les CV contenant tous les termes sont retenus
+            limit: Nombre maximal de résultats
+
+        Returns:
+            Liste de dictionnaires (sha256, filename, email, matched, occurrences),
+            classés par nombre de termes trouvés puis d'occurrences
+        """
+        if not terms:
+            return []
+        placeholders = ', '.join('?' * len(terms))
+        having = "HAVING matched = ?" if match_all else ""
+        params = list(terms) + ([len(set(terms))] if match_all else []) + [limit]
+        with self._lock:
+            rows = self._conn.execute(
+                f"""
+                SELECT c.sha256, c.filename, c.email, t.matched, t.occurrences
+                FROM (
+                    SELECT sha256, COUNT(DISTINCT term) AS matched, SUM(count) AS occurrences
+                    FROM candidate_terms
+                    WHERE term IN ({placeholders})
+                    GROUP BY sha256
+                    {having}
+                ) AS t
+                JOIN candidates AS c ON c.sha256 = t.sha256
+                ORDER BY t.matched DESC, t.occurrences DESC, c.sha256
+                LIMIT ?
+                """,
+                params
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def get_candidate(self, sha256):
+        """Retourne un CV sous forme de dictionnaire, ou None"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM candidates WHERE sha256 = ?", (sha256,)
+            ).fetchone()
+        return dict(row) if row else None
+
+    def count_candidates(self):
+        """Nombre de CV stockés"""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM candidates").fetchone()[0]
+
+    def list_sha256(self):
+        """Liste des empreintes de tous les CV stockés"""
+        with self._lock:
+            return [row[0] for row in self._conn.execute("SELECT sha256 FROM candidates")]
+
+    def filter_sha256(self, contract_type=None, duration=None):
+        """Empreintes des CV correspondant au type de contrat et/ou à la durée"""
+        conditions = []
+        params = []
+        if contract_type:
+            conditions.append("contract_type = ?")
+            params.append(contract_type)
+        if duration:
+            conditions.append("duration = ?")
+            params.append(duration)
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+        with self._lock:
+            return [row[0] for row in self._conn.execute(f"SELECT sha256 FROM candidates{where}", params)]
+
+    def has_message(self, message_id):
+        """Indique si un email (Gmail) a déjà été ingéré"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM ingested_messages WHERE message_id = ?", (message_id,)
+            ).fetchone()
+        return row is not None
+
+    def mark_message(self, message_id, label=None):
+        """Marque un email comme ingéré"""
+        now = datetime.now().isoformat(timespec='seconds')
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO ingested_messages (message_id, label, ingested_at) VALUES (?, ?, ?)",
+                (message_id, label, now)
+            )
+            self._conn.commit()
+
+    def iter_candidates(self, batch_size=500):
+        """Parcourt tous les CV stockés par lots (mémoire bornée)"""
+        last_key = ''
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT * FROM candidates WHERE sha256 > ? ORDER BY sha256 LIMIT ?",
+                    (last_key, batch_size)
+                ).fetchall()
+            if not rows:
+                return
+            for row in rows:
+                yield dict(row)
+            last_key = rows[-1]['sha256']
+
+    def save_interview(self, event_id, calendar_id, email, start_time, duration_minutes,
+                       summary=None, interview_type=None, sha256=None, timezone=None, meet_link=None):
+        """
+        Enregistre (ou replanifie) un entretien du planning local
+
+        Args:
+            event_id: Identifiant de l'événement Google Calendar
+            calendar_id: Agenda de l'événement ('primary'...)
+            email: Email du candidat
+            start_time: Début au format "YYYY-MM-DD HH:MM"
+            duration_minutes: Durée en minutes
+            summary: Titre de l'événement
+            interview_type: Type d'entretien (Premier entretien, Entretien RH...)
+            sha256: Empreinte du CV du candidat, si connue
+            timezone: Fuseau horaire de start_time
+            meet_link: Lien Meet de l'événement
+        """
+        now = datetime.now().isoformat(timespec='seconds')
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT INTO interviews (event_id, calendar_id, email, sha256, interview_type, summary,
+                                        start_time, duration_minutes, timezone, status, meet_link,
+                                        created_at, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(event_id) DO UPDATE SET
+                    summary = excluded.summary,
+                    start_time = excluded.start_time,
+                    duration_minutes = excluded.duration_minutes,
+                    timezone = excluded.timezone,
+                    status = excluded.status,
+                    sha256 = COALESCE(excluded.sha256, interviews.sha256),
+                    meet_link = COALESCE(excluded.meet_link, interviews.meet_link),
+                    updated_at = excluded.updated_at
+                """,
+                (event_id, calendar_id, email, sha256, interview_type, summary, start_time,
+                 duration_minutes, timezone, INTERVIEW_CONFIRMED, meet_link, now, now)
+            )
+            self._conn.commit()
+
+    def find_interview(self, email, interview_type=None):
+        """Entretien confirmé d'un candidat (pour un type donné), ou None"""
+        with self._lock:
+            row = self._conn.execute(
+                """
+                SELECT * FROM interviews
+                WHERE email = ? AND interview_type IS ? AND status = ?
+                ORDER BY updated_at DESC LIMIT 1
+                """,
+                (email, interview_type, INTERVIEW_CONFIRMED)
+            ).fetchone()
+        return dict(row) if row else None
+
+    def list_interviews(self, calendar_id=None):
+        """Entretiens du planning local (tous statuts), par date de début"""
+        where = " WHERE calendar_id = ?" if calendar_id else ""
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT * FROM interviews{where} ORDER BY start_time",
+                (calendar_id,) if calendar_id else ()
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def cancel_interviews(self, event_ids):
+        """
+        Marque des entretiens comme annulés dans le planning local
+
+        L'annulation dans Google Calendar est faite à la réconciliation.
+
+        Returns:
+            Nombre d'entretiens annulés
+        """
+        now = datetime.now().isoformat(timespec='seconds')
+        with self._lock:
+            cursor = self._conn.executemany(
+                "UPDATE interviews SET status = ?, updated_at = ? WHERE event_id = ? AND status != ?",
+                [(INTERVIEW_CANCELLED, now, event_id, INTERVIEW_CANCELLED) for event_id in event_ids]
+            )
+            self._conn.commit()
+        return cursor.rowcount
+
+    def update_remote_many(self, updates):
+        """
+        Enregistre l'état des événements observé dans Google Calendar
+
+        Args:
+            updates: Liste de dictionnaires (event_id, remote_status,
+                remote_start, remote_end, remote_summary, etag, et
+                éventuellement meet_link) ; les entretiens inconnus sont ignorés
+        """
+        with self._lock:
+            for update in updates:
+                self._conn.execute(
+                    """
+                    UPDATE interviews SET remote_status = ?, remote_start = ?, remote_end = ?,
+                                          remote_summary = ?, etag = ?,
+                                          meet_link = COALESCE(?, meet_link)
+                    WHERE event_id = ?
+                    """,
+                    (update['remote_status'], update.get('remote_start'), update.get('remote_end'),
+                     update.get('remote_summary'), update.get('etag'), update.get('meet_link'),
+                     update['event_id'])
+                )
+            self._conn.commit()
+
+    def get_sync_token(self, calendar_id):
+        """Jeton de synchronisation incrémentale d'un agenda, ou None"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT sync_token FROM calendar_sync WHERE calendar_id = ?", (calendar_id,)
+            ).fetchone()
+        return row['sync_token'] if row else None
+
+    def set_sync_token(self, calendar_id, sync_token):
+        """Enregistre le jeton de synchronisation d'un agenda (None pour forcer une synchronisation complète)"""
+        now = datetime.now().isoformat(timespec='seconds')
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT INTO calendar_sync (calendar_id, sync_token, synced_at) VALUES (?, ?, ?)
+                ON CONFLICT(calendar_id) DO UPDATE SET
+                    sync_token = excluded.sync_token,
+                    synced_at = excluded.synced_at
+                """,
+                (calendar_id, sync_token, now)
+            )
+            self._conn.commit()
@@ -0,0 +1,347 @@
+#!/usr/bin/env python3
+"""
+Évaluation des extracteurs sur un corpus de CV annotés
+
+Le corpus est un dossier de CV (PDF/DOCX) accompagné d'un fichier CSV
+d'annotations : une colonne `filename` et une colonne par champ attendu
+(email, phone, contract_type, duration ; cellule vide ou "À compléter" =
+champ absent du CV ; numéros au format national ou international).
+Les colonnes absentes ne sont pas évaluées.
+
+Les documents sont traités en parallèle sur tous les cœurs. Le texte extrait
+des fichiers est mis en cache par SHA-256 dans une base dédiée : seules les
+modifications des extracteurs de champs sont mesurées aux exécutions
+suivantes, sans relire les PDF (le cache est invalidé si le code de lecture
+PDF/DOCX ou la version de pdfplumber change).
+
+Le rapport donne, par champ, la précision, le rappel et le temps
+d'extraction, et les documents les plus lents. Avec --output puis
+--baseline, deux exécutions sont comparées et le script échoue si la
+précision ou le rappel d'un champ baisse.
+
+Utilisation :
+    python evaluation.py corpus/ --output eval.json        # référence
+    python evaluation.py corpus/ --baseline eval.json      # après modification des règles
+    python evaluation.py corpus/ --labels annotations.csv --show-errors
+"""
+
+import os
+import sys
+import csv
+import json
+import time
+import hashlib
+import inspect
+import argparse
+import statistics
+from concurrent.futures import ProcessPoolExecutor
+
+import pdfplumber
+
+import cv_extraction
+from cv_extraction import (
+    FIELD_EXTRACTORS,
+    LANGUAGE_FIELDS,
+    SUPPORTED_EXTENSIONS,
+    extract_phone,
+    extract_text,
+    get_file_extension,
+)
+from cv_store import CVStore, compute_file_sha256
+from language_detection import detect_language
+from upload_spool import mapped_file
+
+# Base de cache des textes extraits (distincte de la base des candidats)
+CACHE_DB_FILE = os.environ.get('EVALUATION_CACHE_DB', 'cv_eval_cache.db')
+
+# Nom du fichier d'annotations cherché dans le dossier du corpus
+DEFAULT_LABELS_FILE = 'labels.csv'
+
+# Baisse de précision ou de rappel tolérée par rapport à la référence
+REGRESSION_TOLERANCE = 1e-9
+
+# Nombre de documents envoyés à la fois à chaque worker
+CHUNK_SIZE = 8
+
+# Valeur renvoyée par detect_contract_type / extract_duration quand rien n'est trouvé
+MISSING_VALUE = "À compléter"
+
+def compute_text_version():
+    """Empreinte du code de lecture des fichiers (invalide le cache des textes)"""
+    digest = hashlib.sha256(pdfplumber.__version__.encode('utf-8'))
+    for function in (extract_text, cv_extraction.extract_text_from_pdf, cv_extraction.extract_text_from_docx):
+        digest.update(inspect.getsource(function).encode('utf-8'))
+    return digest.hexdigest()[:12]
+
+def get_cache_source():
+    """Valeur de la colonne `source` des textes mis en cache par cette version"""
+    return f"evaluation:{compute_text_version()}"
+
+def read_labels(labels_file):
+    """
+    Lit le fichier d'annotations
+
+    Returns:
+        Tuple (champs évalués, {nom de fichier: {champ: valeur attendue}})
+    """
+    with open(labels_file, newline='', encoding='utf-8') as f:
+        reader = csv.DictReader(f)
+        if 'filename' not in (reader.fieldnames or []):
+            raise ValueError(f"colonne 'filename' absente de {labels_file}")
+        fields = [field for field in FIELD_EXTRACTORS if field in reader.fieldnames]
+        labels = {
+            row['filename']: {field: row[field] or "" for field in fields}
+            for row in reader
+        }
+    return fields, labels
+
+def normalize_value(field, value):
+    """
+    Forme canonique d'une valeur pour la comparaison
+
+    "À compléter" équivaut à un champ vide ; les numéros de téléphone sont
+    normalisés en E.164 comme par l'extracteur (06 12... = +33 6 12...).
+    """
+    value = ' '.join((value or "").split())
+    if value.casefold() == MISSING_VALUE.casefold():
+        return ""
+    if field == 'phone':
+        return extract_phone(value) or ''.join(char for char in value if char.isdigit() or char == '+')
+    return value.casefold()
+
+def read_document_text(path):
+    """Texte d'un CV (PDF lu via mmap, comme le démon d'ingestion)"""
+    filename = os.path.basename(path)
+    if get_file_extension(filename) == 'pdf':
+        with mapped_file(path) as cv_file:
+            return extract_text(cv_file, filename) or ""
+    return extract_text(path, filename) or ""
+
+def evaluate_document(path, text=None):
+    """
+    Extrait les champs d'un CV en chronométrant chaque étape (exécuté dans un processus du pool)
+
+    Args:
+        path: Chemin du CV
+        text: Texte mis en cache, ou None pour lire le fichier
+
+    Returns:
+        Tuple (texte lu ou None s'il venait du cache, champs extraits, {étape: secondes})
+    """
+    timings = {}
+    parsed_text = None
+    if text is None:
+        start = time.perf_counter()
+        text = parsed_text = read_document_text(path)
+        timings['parse'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    language = detect_language(text)
+    timings['language'] = time.perf_counter() - start
+
+    fields = {}
+    for field, (extractor, _) in FIELD_EXTRACTORS.items():
+        start = time.perf_counter()
+        fields[field] = extractor(text, language) if field in LANGUAGE_FIELDS else extractor(text)
+        timings[field] = time.perf_counter() - start
+    return parsed_text, fields, timings
+
+def _evaluate_chunk(items):
+    """Évalue un lot de documents [(chemin, texte en cache)] dans un worker"""
+    return [evaluate_document(path, text) for path, text in items]
+
+def run_evaluation(corpus_dir, labels, store, workers=None):
+    """
+    Traite en parallèle les documents annotés du corpus
+
+    Args:
+        corpus_dir: Dossier des CV
+        labels: {nom de fichier: {champ: valeur attendue}}
+        store: CVStore servant de cache des textes
+        workers: Nombre de processus (défaut : nombre de cœurs)
+
+    Returns:
+        Liste de dictionnaires par document (filename, sha256, cached,
+        expected, predicted, timings), dans l'ordre des annotations
+    """
+    cache_source = get_cache_source()
+    documents = []
+    for filename, expected in labels.items():
+        path = os.path.join(corpus_dir, filename)
+        if get_file_extension(filename) not in SUPPORTED_EXTENSIONS or not os.path.isfile(path):
+            print(f"⚠️ Ignoré (introuvable ou format non supporté) : {filename}")
+            continue
+        sha256 = compute_file_sha256(path)
+        cached = store.get_candidate(sha256)
+        text = cached['raw_text'] if cached and cached['source'] == cache_source else None
+        documents.append({
+            'filename': filename, 'path': path, 'sha256': sha256,
+            'cached': text is not None, 'text': text, 'expected': expected,
+        })
+
+    items = [(document['path'], document['text']) for document in documents]
+    chunks = [items[i:i + CHUNK_SIZE] for i in range(0, len(items), CHUNK_SIZE)]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        results = [result for chunk_results in executor.map(_evaluate_chunk, chunks) for result in chunk_results]
+
+    new_texts = []
+    for document, (parsed_text, predicted, timings) in zip(documents, results):
+        if parsed_text is not None:
+            new_texts.append((document, parsed_text))
+        del document['text'], document['path']
+        document['predicted'] = predicted
+        document['timings'] = timings
+    for document, text in new_texts:
+        store.save_candidate(document['sha256'], document['filename'], text, {}, source=cache_source)
+    return documents
+
+def compute_field_metrics(documents, fields):
+    """
+    Précision, rappel et temps d'extraction par champ
+
+    Une valeur extraite correcte est un vrai positif ; une valeur extraite
+    fausse ou non attendue est un faux positif ; une valeur attendue non
+    trouvée (ou fausse) est un faux négatif.
+
+    Returns:
+        {champ: {tp, fp, fn, correct, total, precision, recall, mean_ms, p95_ms}}
+    """
+    metrics = {}
+    for field in fields:
+        tp = fp = fn = correct = 0
+        durations = []
+        for document in documents:
+            expected = normalize_value(field, document['expected'][field])
+            predicted = normalize_value(field, document['predicted'][field])
+            durations.append(document['timings'][field])
+            if predicted == expected:
+                correct += 1
+            if predicted and predicted == expected:
+                tp += 1
+            else:
+                fp += bool(predicted)
+                fn += bool(expected)
+        durations.sort()
+        metrics[field] = {
+            'tp': tp, 'fp': fp, 'fn': fn, 'correct': correct, 'total': len(documents),
+            'precision': tp / (tp + fp) if tp + fp else 1.0,
+            'recall': tp / (tp + fn) if tp + fn else 1.0,
+            'mean_ms': statistics.fmean(durations) * 1000 if durations else 0.0,
+            'p95_ms': durations[int(0.95 * (len(durations) - 1))] * 1000 if durations else 0.0,
+        }
+    return metrics
+
+def find_regressions(metrics, baseline_metrics):
+    """Champs dont la précision ou le rappel a baissé : [(champ, mesure, référence, actuel)]"""
+    regressions = []
+    for field, current in metrics.items():
+        reference = baseline_metrics.get(field)
+        if not reference:
+            continue
+        for measure in ('precision', 'recall'):
+            if current[measure] < reference[measure] - REGRESSION_TOLERANCE:
+                regressions.append((field, measure, reference[measure], current[measure]))
+    return regressions
+
+def format_delta(current, reference, scale=100, unit=" pts", digits=1):
+    """Écart formaté avec la référence (vide sans référence)"""
+    if reference is None:
+        return ""
+    return f" ({(current - reference) * scale:+.{digits}f}{unit})"
+
+def print_report(documents, metrics, baseline_metrics, elapsed, slowest, show_errors):
+    """Affiche le rapport d'évaluation"""
+    cached = sum(document['cached'] for document in documents)
+    print(f"📄 {len(documents)} documents ({cached} textes en cache) en {elapsed:.1f}s")
+    print("-" * 50)
+    for field, values in metrics.items():
+        reference = baseline_metrics.get(field, {})
+        print(f"{field:14} précision {values['precision']:6.1%}{format_delta(values['precision'], reference.get('precision'))}"
+              f" | rappel {values['recall']:6.1%}{format_delta(values['recall'], reference.get('recall'))}"
+              f" | {values['mean_ms']:.3f} ms/doc{format_delta(values['mean_ms'], reference.get('mean_ms'), 1, ' ms', 3)}"
+              f" (p95 {values['p95_ms']:.3f} ms)")
+    print("-" * 50)
+
+    parsed = [document for document in documents if 'parse' in document['timings']]
+    if parsed:
+        parse_times = sorted(document['timings']['parse'] for document in parsed)
+        print(f"⏱️ Lecture des fichiers : {statistics.fmean(parse_times) * 1000:.1f} ms/doc "
+              f"(médiane {statistics.median(parse_times) * 1000:.1f} ms, max {parse_times[-1] * 1000:.1f} ms)")
+
+    if slowest:
+        print(f"🐢 {slowest} documents les plus lents (extraction des champs) :")
+        by_extraction = sorted(
+            documents,
+            key=lambda document: sum(t for step, t in document['timings'].items() if step != 'parse'),
+            reverse=True
+        )
+        for document in by_extraction[:slowest]:
+            steps = ', '.join(f"{step} {t * 1000:.2f}" for step, t in document['timings'].items())
+            print(f"   {document['filename']} : {steps} (ms)")
+
+    if show_errors:
+        print("🔎 Erreurs :")
+        for document in documents:
+            for field in metrics:
+                expected = document['expected'][field]
+                predicted = document['predicted'][field]
+                if normalize_value(field, predicted) != normalize_value(field, expected):
+                    print(f"   {document['filename']} [{field}] attendu {expected!r}, extrait {predicted!r}")
+
+def main():
+    """Fonction principale"""
+    parser = argparse.ArgumentParser(description="Évaluation des extracteurs sur un corpus annoté")
+    parser.add_argument('corpus', help="Dossier des CV annotés")
+    parser.add_argument('--labels', help=f"Fichier CSV d'annotations (défaut : <corpus>/{DEFAULT_LABELS_FILE})")
+    parser.add_argument('--cache', help="Base de cache des textes (défaut : EVALUATION_CACHE_DB ou cv_eval_cache.db)")
+    parser.add_argument('--workers', type=int, help="Nombre de processus (1 pour des temps plus stables)")
+    parser.add_argument('--output', help="Écrit le rapport complet (JSON) dans ce fichier")
+    parser.add_argument('--baseline', help="Rapport JSON de référence : échec si précision ou rappel baisse")
+    parser.add_argument('--slowest', type=int, default=5, help="Nombre de documents les plus lents affichés")
+    parser.add_argument('--show-errors', action='store_true', help="Affiche chaque valeur mal extraite")
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.corpus):
+        parser.error(f"dossier introuvable : {args.corpus}")
+    labels_file = args.labels or os.path.join(args.corpus, DEFAULT_LABELS_FILE)
+    try:
+        fields, labels = read_labels(labels_file)
+    except (OSError, ValueError) as e:
+        print(f"❌ Annotations illisibles : {e}")
+        sys.exit(1)
+    if not fields:
+        print(f"❌ Aucune colonne de champ ({', '.join(FIELD_EXTRACTORS)}) dans {labels_file}")
+        sys.exit(1)
+
+    baseline_metrics = {}
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline_metrics = json.load(f)['fields']
+
+    print(f"🧪 Évaluation de {', '.join(fields)} sur {len(labels)} documents annotés")
+    store = CVStore(args.cache or CACHE_DB_FILE)
+    start = time.perf_counter()
+    documents = run_evaluation(args.corpus, labels, store, workers=args.workers)
+    elapsed = time.perf_counter() - start
+    store.close()
+    if not documents:
+        print("❌ Aucun document évaluable")
+        sys.exit(1)
+
+    metrics = compute_field_metrics(documents, fields)
+    print_report(documents, metrics, baseline_metrics, elapsed, args.slowest, args.show_errors)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'fields': metrics, 'documents': documents}, f, ensure_ascii=False, indent=2)
+        print(f"💾 Rapport écrit dans {args.output}")
+
+    regressions = find_regressions(metrics, baseline_metrics)
+    if regressions:
+        for field, measure, reference, current in regressions:
+            print(f"❌ Régression {field} ({measure}) : {reference:.1%} → {current:.1%}")
+        sys.exit(1)
+    print("✅ Évaluation terminée")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Export de l'archive des CV par lots (mémoire bornée)
+
+Formats disponibles :
+- csv.gz : CSV compressé (gzip)
+- parquet : Parquet colonnaire (pyarrow requis)
+- arrow : Arrow IPC / Feather v2 (pyarrow requis)
+
+Les lignes sont lues dans la base par lots de `chunk_size` et écrites au fil
+de l'eau : la mémoire utilisée ne dépend pas de la taille de l'archive.
+
+Utilisation :
+    python export.py --format parquet --output archive.parquet
+"""
+
+import csv
+import gzip
+import time
+import argparse
+from itertools import islice
+
+from cv_store import CVStore
+
+# pyarrow est optionnel : seul l'export CSV compressé est alors disponible
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+    import pyarrow.parquet
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+EXPORT_FORMATS = ('csv.gz', 'parquet', 'arrow')
+
+# Colonnes exportées : champ de la base -> en-tête (identique aux exports CSV de l'app)
+EXPORT_COLUMNS = {
+    'email': 'Email',
+    'phone': 'Téléphone',
+    'contract_type': 'Type de contrat',
+    'duration': 'Durée',
+    'filename': 'Fichier source',
+    'source': 'Origine',
+    'created_at': 'Date de traitement',
+}
+RAW_TEXT_COLUMN = {'raw_text': 'Texte du CV'}
+
+DEFAULT_CHUNK_SIZE = 5000
+
+def iter_chunks(records, chunk_size):
+    """Regroupe un itérable d'enregistrements en listes de `chunk_size` éléments"""
+    iterator = iter(records)
+    while True:
+        chunk = list(islice(iterator, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+def write_csv_gz(records, path, columns, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Écrit les enregistrements en CSV compressé gzip, lot par lot"""
+    count = 0
+    with gzip.open(path, 'wt', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(columns.values())
+        for chunk in iter_chunks(records, chunk_size):
+            writer.writerows([[record.get(field) for field in columns] for record in chunk])
+            count += len(chunk)
+    return count
+
+def build_record_batch(chunk, columns, schema):
+    """Construit un RecordBatch Arrow à partir d'un lot d'enregistrements"""
+    arrays = [pa.array([record.get(field) for record in chunk], type=pa.string()) for field in columns]
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+def write_arrow(records, path, columns, file_format, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Écrit les enregistrements en Parquet ou Arrow IPC, un lot (row group) à la fois"""
+    if not PYARROW_AVAILABLE:
+        raise ImportError("pyarrow est requis pour les exports Parquet/Arrow (pip install pyarrow)")
+    schema = pa.schema([(header, pa.string()) for header in columns.values()])
+    if file_format == 'parquet':
+        writer = pa.parquet.ParquetWriter(path, schema, compression='zstd')
+    else:
+        writer = pa.ipc.new_file(path, schema, options=pa.ipc.IpcWriteOptions(compression='zstd'))
+    count = 0
+    with writer:
+        for chunk in iter_chunks(records, chunk_size):
+            batch = build_record_batch(chunk, columns, schema)
+            if file_format == 'parquet':
+                writer.write_batch(batch)
+            else:
+                writer.write(batch)
+            count += len(chunk)
+    return count
+
+def export_records(records, path, file_format, columns=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Exporte des enregistrements dans le format demandé
+
+    Args:
+        records: Itérable de dictionnaires (ex: CVStore.iter_candidates())
+        path: Fichier de sortie
+        file_format: 'csv.gz', 'parquet' ou 'arrow'
+        columns: {champ: en-tête} (défaut : EXPORT_COLUMNS)
+        chunk_size: Nombre de lignes par lot
+
+    Returns:
+        Nombre de lignes exportées
+    """
+    columns = columns or EXPORT_COLUMNS
+    if file_format == 'csv.gz':
+        return write_csv_gz(records, path, columns, chunk_size)
+    if file_format in ('parquet', 'arrow'):
+        return write_arrow(records, path, columns, file_format, chunk_size)
+    raise ValueError(f"Format d'export inconnu : {file_format}")
+
+def main():
+    """Fonction principale"""
+    parser = argparse.ArgumentParser(description="Export de l'archive des CV")
+    parser.add_argument('--format', choices=EXPORT_FORMATS, default='csv.gz', help="Format de sortie")
+    parser.add_argument('--output', required=True, help="Fichier de sortie")
+    parser.add_argument('--db', help="Fichier de base SQLite (défaut : CV_DB_PATH ou cv_data.db)")
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help="Lignes par lot")
+    parser.add_argument('--with-text', action='store_true', help="Inclut le texte brut des CV")
+    args = parser.parse_args()
+
+    columns = dict(EXPORT_COLUMNS, **RAW_TEXT_COLUMN) if args.with_text else EXPORT_COLUMNS
+    store = CVStore(args.db)
+    print(f"📦 Export de {store.count_candidates()} CV vers {args.output} ({args.format})")
+    start = time.perf_counter()
+    try:
+        count = export_records(
+            store.iter_candidates(batch_size=args.chunk_size), args.output, args.format,
+            columns=columns, chunk_size=args.chunk_size
+        )
+    except ImportError as e:
+        print(f"❌ {e}")
+        return
+    finally:
+        store.close()
+    print(f"✅ {count} lignes exportées en {time.perf_counter() - start:.1f}s")
+
+if __name__ == "__main__":
+    main()
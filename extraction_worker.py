@@ -0,0 +1,408 @@
+#!/usr/bin/env python3
+"""
+Service local d'extraction des CV (pool de processus derrière une API HTTP)
+
+L'extraction pdfplumber est coûteuse en CPU : exécutée dans le serveur
+Streamlit, elle concurrence le rendu de l'interface. Ce service la déporte
+dans un pool de processus partagé par plusieurs instances de l'application et
+par les outils en ligne de commande.
+
+- File d'attente à priorités : les uploads interactifs (priorité 0) passent
+  devant les traitements par lot (priorité plus élevée = moins urgent).
+- Cache des résultats par empreinte SHA-256 : un même fichier n'est extrait
+  qu'une fois, et les soumissions simultanées du même fichier sont fusionnées.
+- Un job en échec reste consultable (avec son erreur) jusqu'à sa lecture ;
+  une nouvelle soumission du fichier relance l'extraction.
+
+API :
+    POST /jobs?filename=cv.pdf&priority=0   (corps : contenu du fichier)
+    GET  /jobs/<id>?wait=30                 (attend le résultat jusqu'à 30 s)
+    GET  /health
+
+Utilisation :
+    python extraction_worker.py serve --port 8765 --workers 4
+    python extraction_worker.py extract cv1.pdf cv2.docx --url http://127.0.0.1:8765
+
+Dans l'application, définir EXTRACTION_WORKER_URL=http://127.0.0.1:8765.
+"""
+
+import os
+import json
+import heapq
+import argparse
+import tempfile
+import threading
+from itertools import count
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+import requests
+
+from cv_extraction import SUPPORTED_EXTENSIONS, get_file_extension
+from cv_store import compute_sha256
+from ingestion_daemon import process_cv_file
+from upload_spool import MAX_FILE_SIZE, format_size
+
+# URL du service utilisée par l'application (extraction locale si absente)
+WORKER_URL = os.environ.get('EXTRACTION_WORKER_URL')
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+
+# Priorités usuelles (plus petit = plus urgent)
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BATCH = 10
+
+# Nombre de résultats conservés en cache
+RESULT_CACHE_SIZE = 256
+
+# Attente maximale côté serveur d'une requête GET /jobs/<id>?wait=... (secondes)
+MAX_WAIT = 60
+
+class Job:
+    """Extraction demandée pour un fichier (identifiée par son empreinte)"""
+
+    def __init__(self, job_id, filename, path, priority):
+        self.job_id = job_id
+        self.filename = filename
+        self.path = path
+        self.priority = priority
+        self.status = 'queued'
+        self.result = None
+        self.error = None
+        self.done = threading.Event()
+
+    def to_dict(self):
+        """Représentation JSON du job"""
+        payload = {'job_id': self.job_id, 'status': self.status, 'filename': self.filename}
+        if self.status == 'done':
+            payload.update(self.result)
+        elif self.status == 'error':
+            payload['error'] = self.error
+        return payload
+
+class ExtractionService:
+    """
+    File d'attente à priorités alimentant un pool de processus
+
+    Un thread répartiteur ne confie au pool que `workers` jobs à la fois : les
+    jobs en attente restent dans le tas, où un job urgent peut doubler les autres.
+    """
+
+    def __init__(self, workers=None, spool_dir=None, cache_size=RESULT_CACHE_SIZE):
+        self.workers = workers or os.cpu_count() or 2
+        self.executor = ProcessPoolExecutor(max_workers=self.workers)
+        self.spool_dir = spool_dir or tempfile.mkdtemp(prefix='cv-worker-')
+        self.cache_size = cache_size
+        self._slots = threading.BoundedSemaphore(self.workers)
+        self._lock = threading.Condition()
+        self._queue = []
+        self._sequence = count()
+        self._jobs = {}
+        self._results = OrderedDict()
+        # Jobs en échec, conservés jusqu'à leur lecture (get)
+        self._failures = OrderedDict()
+        self._dispatcher = threading.Thread(target=self._dispatch, daemon=True)
+        self._dispatcher.start()
+
+    def submit(self, data, filename, priority=PRIORITY_BATCH):
+        """
+        Ajoute un fichier à la file (ou retourne le job existant)
+
+        Returns:
+            Job ou dictionnaire du résultat en cache
+        """
+        job_id = compute_sha256(data)
+        with self._lock:
+            if job_id in self._results:
+                self._results.move_to_end(job_id)
+                return self._results[job_id]
+            job = self._jobs.get(job_id)
+            if job is not None:
+                # Soumission plus urgente d'un job en attente : nouvelle entrée dans le tas
+                if job.status == 'queued' and priority < job.priority:
+                    job.priority = priority
+                    heapq.heappush(self._queue, (priority, next(self._sequence), job))
+                    self._lock.notify()
+                return job
+
+            self._failures.pop(job_id, None)
+            path = os.path.join(self.spool_dir, f"{job_id}.{get_file_extension(filename)}")
+            with open(path, 'wb') as f:
+                f.write(data)
+            job = Job(job_id, filename, path, priority)
+            self._jobs[job_id] = job
+            heapq.heappush(self._queue, (priority, next(self._sequence), job))
+            self._lock.notify()
+            return job
+
+    def get(self, job_id):
+        """Retourne le job en cours, le résultat en cache ou l'échec non encore lu, None si inconnu"""
+        with self._lock:
+            if job_id in self._results:
+                return self._results[job_id]
+            if job_id in self._failures:
+                return self._failures.pop(job_id)
+            return self._jobs.get(job_id)
+
+    def _dispatch(self):
+        """Confie les jobs au pool, par priorité, au fur et à mesure des places libres"""
+        while True:
+            self._slots.acquire()
+            with self._lock:
+                while True:
+                    while not self._queue:
+                        self._lock.wait()
+                    _, _, job = heapq.heappop(self._queue)
+                    # Entrée périmée (job déjà confié via une entrée plus prioritaire)
+                    if job.status == 'queued':
+                        break
+                job.status = 'running'
+            executor = self.executor
+            try:
+                future = executor.submit(process_cv_file, job.path)
+            except Exception as e:
+                # Pool inutilisable (BrokenProcessPool...) : le job échoue, le pool est recréé
+                self._reset_pool(executor)
+                self._finish(job, error=e)
+                continue
+            future.add_done_callback(lambda future, job=job, executor=executor: self._on_done(job, executor, future))
+
+    def _reset_pool(self, executor):
+        """Remplace le pool s'il est encore celui qui a échoué (un worker a planté)"""
+        with self._lock:
+            if self.executor is not executor:
+                return
+            self.executor = ProcessPoolExecutor(max_workers=self.workers)
+        executor.shutdown(wait=False, cancel_futures=True)
+        print("⚠️ Pool d'extraction interrompu : nouveau pool démarré")
+
+    def _on_done(self, job, executor, future):
+        """Enregistre le résultat d'une extraction"""
+        try:
+            text, fields, terms = future.result()
+        except BrokenProcessPool as e:
+            self._reset_pool(executor)
+            self._finish(job, error=e)
+        except Exception as e:
+            self._finish(job, error=e)
+        else:
+            self._finish(job, result={'filename': job.filename, 'text': text, 'fields': fields, 'terms': terms})
+
+    def _finish(self, job, result=None, error=None):
+        """Termine un job : résultat mis en cache, ou échec conservé jusqu'à sa lecture"""
+        if error is None:
+            job.result = result
+            job.status = 'done'
+        else:
+            job.error = str(error) or type(error).__name__
+            job.status = 'error'
+        self._slots.release()
+        try:
+            os.remove(job.path)
+        except OSError:
+            pass
+
+        with self._lock:
+            del self._jobs[job.job_id]
+            cache = self._results if job.status == 'done' else self._failures
+            cache[job.job_id] = job.to_dict()
+            while len(cache) > self.cache_size:
+                cache.popitem(last=False)
+        job.done.set()
+
+    def stats(self):
+        """État du service (file, jobs en cours, cache)"""
+        with self._lock:
+            return {
+                'workers': self.workers,
+                'queued': sum(1 for job in self._jobs.values() if job.status == 'queued'),
+                'running': sum(1 for job in self._jobs.values() if job.status == 'running'),
+                'cached': len(self._results),
+                'failed': len(self._failures),
+            }
+
+    def shutdown(self):
+        """Arrête le pool"""
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+class JobRequestHandler(BaseHTTPRequestHandler):
+    """Routes HTTP de l'API de jobs"""
+
+    server_version = "LiziaExtraction/1.0"
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if url.path != '/jobs':
+            self._send_json(404, {'error': "route inconnue"})
+            return
+        params = parse_qs(url.query)
+        filename = params.get('filename', [''])[0]
+        if get_file_extension(filename) not in SUPPORTED_EXTENSIONS:
+            self._send_json(415, {'error': f"format non supporté : {filename}"})
+            return
+        length = int(self.headers.get('Content-Length', 0))
+        if length > MAX_FILE_SIZE:
+            self._send_json(413, {'error': f"fichier supérieur à {format_size(MAX_FILE_SIZE)}"})
+            return
+        try:
+            priority = int(params.get('priority', [PRIORITY_BATCH])[0])
+        except ValueError:
+            self._send_json(400, {'error': "priorité invalide"})
+            return
+
+        job = self.server.service.submit(self.rfile.read(length), filename, priority)
+        payload = job if isinstance(job, dict) else job.to_dict()
+        self._send_json(200 if payload['status'] == 'done' else 202, payload)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == '/health':
+            self._send_json(200, self.server.service.stats())
+            return
+        if not url.path.startswith('/jobs/'):
+            self._send_json(404, {'error': "route inconnue"})
+            return
+
+        job = self.server.service.get(url.path[len('/jobs/'):])
+        if job is None:
+            self._send_json(404, {'error': "job inconnu"})
+            return
+        if not isinstance(job, dict):
+            try:
+                wait = min(float(parse_qs(url.query).get('wait', [0])[0]), MAX_WAIT)
+            except ValueError:
+                wait = 0
+            if wait > 0:
+                job.done.wait(wait)
+            job = job.to_dict()
+        self._send_json(200, job)
+
+    def log_message(self, format, *args):
+        # Requêtes non journalisées (une par job et par attente)
+        pass
+
+class ExtractionClient:
+    """Client de l'API de jobs (application Streamlit, outils en ligne de commande)"""
+
+    def __init__(self, url=None, timeout=120):
+        self.url = (url or WORKER_URL or f"http://{DEFAULT_HOST}:{DEFAULT_PORT}").rstrip('/')
+        self.timeout = timeout
+
+    def submit(self, data, filename, priority=PRIORITY_BATCH):
+        """Soumet un fichier ; retourne le job (résultat inclus s'il est déjà en cache)"""
+        response = requests.post(
+            f"{self.url}/jobs", params={'filename': filename, 'priority': priority},
+            data=data, timeout=10
+        )
+        response.raise_for_status()
+        return response.json()
+
+    def wait(self, job_id, timeout=None):
+        """Attend la fin d'un job (long polling)"""
+        deadline = self.timeout if timeout is None else timeout
+        waited = 0
+        while True:
+            wait = min(MAX_WAIT, max(deadline - waited, 0))
+            response = requests.get(f"{self.url}/jobs/{job_id}", params={'wait': wait}, timeout=wait + 10)
+            response.raise_for_status()
+            job = response.json()
+            waited += wait
+            if job['status'] in ('done', 'error') or waited >= deadline:
+                return job
+
+    def extract(self, data, filename, priority=PRIORITY_INTERACTIVE):
+        """
+        Extrait un CV via le service
+
+        Returns:
+            Tuple (texte, champs), ou (None, None) si le format n'est pas supporté
+
+        Raises:
+            RuntimeError: si l'extraction échoue ou n'aboutit pas à temps
+            requests.RequestException: si le service est injoignable
+        """
+        try:
+            job = self.submit(data, filename, priority)
+        except requests.HTTPError as e:
+            if e.response is not None and e.response.status_code == 415:
+                return None, None
+            raise
+        if job['status'] not in ('done', 'error'):
+            job = self.wait(job['job_id'])
+        if job['status'] != 'done':
+            raise RuntimeError(job.get('error') or f"extraction non terminée ({job['status']})")
+        return job['text'], job['fields']
+
+    def health(self):
+        """État du service"""
+        response = requests.get(f"{self.url}/health", timeout=5)
+        response.raise_for_status()
+        return response.json()
+
+def serve(args):
+    """Lance le service"""
+    service = ExtractionService(workers=args.workers)
+    server = ThreadingHTTPServer((args.host, args.port), JobRequestHandler)
+    server.daemon_threads = True
+    server.service = service
+    print("🚀 Service d'extraction des CV - Lizia")
+    print(f"⚙️ {service.workers} workers, http://{args.host}:{args.port}")
+    print("🛑 Appuyez sur Ctrl+C pour arrêter le service")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n👋 Arrêt du service...")
+    finally:
+        server.server_close()
+        service.shutdown()
+
+def extract_files(args):
+    """Extrait des fichiers via le service et affiche les champs"""
+    client = ExtractionClient(args.url)
+    for path in args.files:
+        with open(path, 'rb') as f:
+            data = f.read()
+        try:
+            text, fields = client.extract(data, os.path.basename(path), priority=args.priority)
+        except (requests.RequestException, RuntimeError) as e:
+            print(f"❌ {path}: {e}")
+            continue
+        if text is None:
+            print(f"⚠️ {path}: format non supporté")
+            continue
+        print(f"✅ {path}: {json.dumps(fields, ensure_ascii=False)}")
+
+def main():
+    """Fonction principale"""
+    parser = argparse.ArgumentParser(description="Service local d'extraction des CV")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    serve_parser = subparsers.add_parser('serve', help="Lance le service")
+    serve_parser.add_argument('--host', default=DEFAULT_HOST, help="Adresse d'écoute (défaut : 127.0.0.1)")
+    serve_parser.add_argument('--port', type=int, default=DEFAULT_PORT, help="Port d'écoute")
+    serve_parser.add_argument('--workers', type=int, help="Nombre de processus d'extraction")
+
+    extract_parser = subparsers.add_parser('extract', help="Extrait des fichiers via le service")
+    extract_parser.add_argument('files', nargs='+', help="Fichiers PDF/DOCX")
+    extract_parser.add_argument('--url', help="URL du service (défaut : EXTRACTION_WORKER_URL)")
+    extract_parser.add_argument('--priority', type=int, default=PRIORITY_BATCH, help="Priorité (0 = urgent)")
+
+    args = parser.parse_args()
+    if args.command == 'serve':
+        serve(args)
+    else:
+        extract_files(args)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,271 @@
+"""
+Couche d'appel commune aux API Google (Calendar, Gmail)
+
+Chaque requête passe par `execute_request`, qui applique :
+- un timeout réseau par appel (client httplib2 construit par `build_service`) ;
+- des réessais avec backoff exponentiel et jitter sur 429, 5xx et timeouts,
+  dans un budget de temps total par appel (court par défaut : une session
+  Streamlit ne reste pas bloquée le temps de tous les réessais) ;
+- un disjoncteur par API : après plusieurs échecs consécutifs, les appels
+  échouent immédiatement pendant un délai de refroidissement au lieu de
+  bloquer chaque session Streamlit ;
+- la fusion des requêtes identiques simultanées (même clé, même compte) : un seul appel
+  part vers Google, les autres appelants reçoivent son résultat.
+
+Les disjoncteurs, les appels en cours et les clients construits sont partagés
+par tous les threads du processus (une session Streamlit = un thread).
+"""
+
+import os
+import time
+import random
+import threading
+
+import httplib2
+from google_auth_httplib2 import AuthorizedHttp
+from googleapiclient.discovery import build
+from googleapiclient.errors import HttpError
+from googleapiclient.http import HttpRequest
+
+# Paramètres (surchargeables par variables d'environnement)
+CALL_TIMEOUT = float(os.environ.get('GOOGLE_API_TIMEOUT', 10))  # secondes par appel
+MAX_RETRIES = int(os.environ.get('GOOGLE_API_MAX_RETRIES', 3))
+# Budget total d'un appel, réessais compris (secondes) : interface, outils en arrière-plan
+CALL_DEADLINE = float(os.environ.get('GOOGLE_API_DEADLINE', 15))
+BACKGROUND_DEADLINE = float(os.environ.get('GOOGLE_API_BACKGROUND_DEADLINE', 120))
+BACKOFF_BASE = 0.5  # secondes
+BACKOFF_MAX = 8.0  # secondes
+BREAKER_THRESHOLD = int(os.environ.get('GOOGLE_API_BREAKER_THRESHOLD', 5))  # échecs consécutifs
+BREAKER_COOLDOWN = float(os.environ.get('GOOGLE_API_BREAKER_COOLDOWN', 30))  # secondes
+
+# Statuts HTTP transitoires
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+# Statuts pour lesquels la requête n'a pas été traitée : réessai sans risque de doublon
+NOT_PROCESSED_STATUSES = {429, 503}
+
+class CircuitOpenError(Exception):
+    """Appel refusé car le disjoncteur de l'API est ouvert"""
+
+    def __init__(self, api, retry_in):
+        super().__init__(f"API {api} indisponible, nouvel essai dans {retry_in:.0f}s")
+        self.api = api
+        self.retry_in = retry_in
+
+class CircuitBreaker:
+    """
+    Disjoncteur : fermé (appels autorisés), ouvert (appels refusés) puis
+    semi-ouvert après le refroidissement (un appel d'essai autorisé)
+    """
+
+    def __init__(self, api, threshold=BREAKER_THRESHOLD, cooldown=BREAKER_COOLDOWN):
+        self.api = api
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._probing = False
+
+    def before_call(self):
+        """Vérifie qu'un appel est autorisé, sinon lève CircuitOpenError"""
+        with self._lock:
+            if self._opened_at is None:
+                return
+            elapsed = time.monotonic() - self._opened_at
+            if elapsed < self.cooldown or self._probing:
+                raise CircuitOpenError(self.api, max(self.cooldown - elapsed, 0))
+            # Semi-ouvert : un seul appel d'essai à la fois
+            self._probing = True
+
+    def record_success(self):
+        """Referme le disjoncteur"""
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._probing = False
+
+    def record_failure(self):
+        """Compte un échec ; ouvre le disjoncteur au-delà du seuil"""
+        with self._lock:
+            self._failures += 1
+            if self._probing or self._failures >= self.threshold:
+                self._opened_at = time.monotonic()
+            self._probing = False
+
+    @property
+    def is_open(self):
+        """Indique si le disjoncteur est ouvert (ou semi-ouvert)"""
+        with self._lock:
+            return self._opened_at is not None
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+def get_breaker(api):
+    """Retourne le disjoncteur partagé d'une API ('calendar', 'gmail'...)"""
+    with _breakers_lock:
+        if api not in _breakers:
+            _breakers[api] = CircuitBreaker(api)
+        return _breakers[api]
+
+class _Call:
+    """Appel en cours partagé entre les appelants d'une même clé"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+_in_flight = {}
+_in_flight_lock = threading.Lock()
+
+_services = {}
+_services_lock = threading.Lock()
+
+def get_account_key(credentials):
+    """Identifie le compte associé à des credentials (OAuth ou compte de service)"""
+    return (
+        getattr(credentials, 'refresh_token', None)
+        or getattr(credentials, 'service_account_email', None)
+        or id(credentials)
+    )
+
+def get_request_account_key(request):
+    """Identifie le compte qui exécute une requête (credentials de sa connexion)"""
+    http = getattr(request, 'http', None)
+    credentials = getattr(http, 'credentials', None)
+    if credentials is None:
+        # Connexion sans credentials identifiables : jamais fusionnée avec une autre
+        return ('request', id(request))
+    return get_account_key(credentials)
+
+def build_service(api, version, credentials, timeout=CALL_TIMEOUT):
+    """
+    Retourne le client d'API Google partagé par le processus pour ce compte
+
+    Le client (document de découverte, ressources) n'est construit qu'une fois
+    par API et par compte, au lieu d'une fois par exécution de script et par
+    session. Il est partagé entre threads : chaque requête reçoit sa propre
+    connexion httplib2 (non thread-safe) avec les credentials les plus récents
+    et un timeout.
+    """
+    cache_key = (api, version)
+    account_key = get_account_key(credentials)
+    with _services_lock:
+        cached = _services.get(cache_key)
+        if cached and cached['account_key'] == account_key:
+            # Même compte : credentials rechargés (jeton rafraîchi) pour les prochaines requêtes
+            cached['credentials'] = credentials
+            return cached['service']
+
+        holder = {'account_key': account_key, 'credentials': credentials}
+
+        def request_builder(http, *args, **kwargs):
+            authorized_http = AuthorizedHttp(holder['credentials'], http=httplib2.Http(timeout=timeout))
+            return HttpRequest(authorized_http, *args, **kwargs)
+
+        http = AuthorizedHttp(credentials, http=httplib2.Http(timeout=timeout))
+        holder['service'] = build(
+            api, version, http=http, requestBuilder=request_builder, cache_discovery=False
+        )
+        _services[cache_key] = holder
+        return holder['service']
+
+def clear_service_cache():
+    """Oublie les clients construits (déconnexion, changement de compte)"""
+    with _services_lock:
+        _services.clear()
+
+def is_retryable(error, idempotent=True):
+    """Indique si une erreur est transitoire et si l'appel peut être réessayé"""
+    if isinstance(error, HttpError):
+        statuses = RETRYABLE_STATUSES if idempotent else NOT_PROCESSED_STATUSES
+        return error.resp.status in statuses
+    # Timeout, coupure, DNS : la requête a pu être traitée côté Google
+    return idempotent and isinstance(error, (OSError, httplib2.HttpLib2Error))
+
+def get_retry_delay(error, attempt):
+    """Délai avant réessai : Retry-After si fourni, sinon backoff exponentiel avec jitter"""
+    if isinstance(error, HttpError):
+        retry_after = error.resp.get('retry-after')
+        if retry_after and retry_after.isdigit():
+            return min(float(retry_after), BACKOFF_MAX)
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+
+def _execute_with_retries(request, api, idempotent, max_retries, deadline):
+    """Exécute une requête avec disjoncteur et réessais, dans la limite de `deadline` secondes"""
+    breaker = get_breaker(api)
+    give_up_at = None if deadline is None else time.monotonic() + deadline
+    attempt = 0
+    while True:
+        breaker.before_call()
+        try:
+            result = request.execute()
+        except Exception as e:
+            transient = is_retryable(e, idempotent=True)
+            if transient:
+                breaker.record_failure()
+            else:
+                # Erreur métier (400, 404...) : l'API répond, le disjoncteur reste fermé
+                breaker.record_success()
+            if not is_retryable(e, idempotent) or attempt >= max_retries:
+                raise
+            delay = get_retry_delay(e, attempt)
+            if give_up_at is not None and time.monotonic() + delay >= give_up_at:
+                # Budget épuisé : l'erreur est remontée sans nouvel essai
+                raise
+            time.sleep(delay)
+            attempt += 1
+            continue
+        breaker.record_success()
+        return result
+
+def execute_request(request, api, key=None, idempotent=True, max_retries=MAX_RETRIES, deadline=CALL_DEADLINE):
+    """
+    Exécute une requête googleapiclient de façon résiliente
+
+    Args:
+        request: Requête non exécutée (ex: service.events().list(...))
+        api: Nom de l'API pour le disjoncteur ('calendar', 'gmail')
+        key: Clé de fusion ; les appels simultanés de même clé et du même compte
+            partagent un seul appel ('primary' désigne un agenda différent par compte)
+        idempotent: False pour les requêtes à effet de bord non rejouables
+            (envoi d'email) : seuls les refus explicites (429, 503) sont réessayés
+        max_retries: Nombre maximal de réessais
+        deadline: Budget total en secondes (réessais et attentes compris) au-delà
+            duquel aucun nouvel essai n'est tenté ; None pour ne pas limiter.
+            Court par défaut (interface) ; BACKGROUND_DEADLINE pour les outils
+            en ligne de commande
+
+    Returns:
+        Réponse de l'API
+
+    Raises:
+        CircuitOpenError: si l'API est en échec répété
+        HttpError, TimeoutError...: si l'appel échoue après les réessais
+    """
+    if key is None:
+        return _execute_with_retries(request, api, idempotent, max_retries, deadline)
+
+    key = (api, get_request_account_key(request), key)
+    with _in_flight_lock:
+        call = _in_flight.get(key)
+        leader = call is None
+        if leader:
+            call = _in_flight[key] = _Call()
+    if not leader:
+        call.done.wait()
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    try:
+        call.result = _execute_with_retries(request, api, idempotent, max_retries, deadline)
+        return call.result
+    except Exception as e:
+        call.error = e
+        raise
+    finally:
+        with _in_flight_lock:
+            del _in_flight[key]
+        call.done.set()
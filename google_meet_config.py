@@ -9,19 +9,25 @@ import streamlit as st
 from google.oauth2 import service_account
 from google_auth_oauthlib.flow import Flow
 from google.auth.transport.requests import Request
-from googleapiclient.discovery import build
+from googleapiclient.errors import HttpError
 from datetime import datetime, timedelta
 import base64
+import uuid
 import secrets
 import random
 import string
 from email.mime.text import MIMEText
 
+from google_calls import CircuitOpenError, build_service, clear_service_cache, execute_request
+from business_calendar import SLOT_MINUTES, get_free_slots, is_business_day
+
 # Configuration des scopes nécessaires pour Google Calendar
 SCOPES = [
     'https://www.googleapis.com/auth/calendar',
     'https://www.googleapis.com/auth/calendar.events',
-    'https://www.googleapis.com/auth/gmail.send'
+    'https://www.googleapis.com/auth/gmail.send',
+    # Lecture des pièces jointes par le démon d'ingestion (ingestion_daemon.py)
+    'https://www.googleapis.com/auth/gmail.readonly'
 ]
 
 # Fichier pour stocker les tokens OAuth
@@ -151,14 +157,14 @@ def create_google_calendar_service(client_id=None, client_secret=None, redirect_
             credentials = service_account.Credentials.from_service_account_file(
                 credentials_file, scopes=SCOPES
             )
-            service = build('calendar', 'v3', credentials=credentials)
+            service = build_service('calendar', 'v3', credentials)
             return service
         else:
             # Utilisation d'OAuth 2.0 avec gestion Streamlit
             credentials = get_stored_credentials()
             
             if credentials:
-                service = build('calendar', 'v3', credentials=credentials)
+                service = build_service('calendar', 'v3', credentials)
                 return service
             else:
                 # Pas de credentials stockés, demander l'authentification
@@ -184,7 +190,7 @@ def handle_oauth_authentication():
     st.write(f"DEBUG: State généré (avant bouton) : {state}")
 
     # Vérifier si on a reçu un code d'autorisation
-   try:
+    try:
         # Essayer d'abord st.query_params (Streamlit 1.28+)
         if hasattr(st, 'query_params'):
             query_params = st.query_params
@@ -237,7 +243,60 @@ def handle_oauth_authentication():
     st.info("💡 Cliquez sur le bouton ci-dessus pour vous authentifier avec Google")
     return None
 
-def create_google_meet_event(service, meeting_title, start_time, duration_minutes=60, timezone='Europe/Paris'):
+def new_event_id():
+    """
+    Identifiant d'événement fixé côté client (uuid4 en base32hex, sans collision)
+
+    Sert aussi de requestId de la conférence Meet : un réessai de la même
+    création ne crée ni un second événement ni une seconde conférence.
+    """
+    return uuid.uuid4().hex
+
+def build_event_times(start_time, duration_minutes, timezone='Europe/Paris'):
+    """
+    Champs start/end d'un événement Google Calendar
+
+    Args:
+        start_time: Heure de début (format: "YYYY-MM-DD HH:MM")
+        duration_minutes: Durée en minutes
+        timezone: Fuseau horaire
+
+    Returns:
+        Dictionnaire {'start': ..., 'end': ...}
+    """
+    start_datetime = datetime.strptime(start_time, "%Y-%m-%d %H:%M")
+    end_datetime = start_datetime + timedelta(minutes=duration_minutes)
+    # Format pour l'API Google Calendar (sans 'Z', on précise le timeZone)
+    return {
+        'start': {'dateTime': start_datetime.isoformat(), 'timeZone': timezone},
+        'end': {'dateTime': end_datetime.isoformat(), 'timeZone': timezone},
+    }
+
+def build_event_body(event_id, meeting_title, start_time, duration_minutes=60, timezone='Europe/Paris'):
+    """Corps d'un événement avec demande de conférence Meet (requestId = identifiant de l'événement)"""
+    return {
+        'id': event_id,
+        'summary': meeting_title,
+        **build_event_times(start_time, duration_minutes, timezone),
+        'conferenceData': {
+            'createRequest': {
+                'requestId': event_id,
+                'conferenceSolutionKey': {
+                    'type': 'hangoutsMeet'
+                }
+            }
+        }
+    }
+
+def get_meet_link(event):
+    """Lien Meet d'un événement, ou None"""
+    for entry_point in event.get('conferenceData', {}).get('entryPoints', []):
+        if entry_point.get('entryPointType') == 'video':
+            return entry_point.get('uri')
+    return None
+
+def create_google_meet_event(service, meeting_title, start_time, duration_minutes=60, timezone='Europe/Paris',
+                             event_id=None):
     """
     Crée un événement Google Calendar avec lien Meet
     
@@ -247,123 +306,137 @@ def create_google_meet_event(service, meeting_title, start_time, duration_minute
         start_time: Heure de début (format: "YYYY-MM-DD HH:MM")
         duration_minutes: Durée en minutes
         timezone: Fuseau horaire
+        event_id: Identifiant de l'événement (new_event_id() par défaut), à
+            conserver pour replanifier ou annuler l'entretien
     
     Returns:
         Lien Meet ou None si erreur
     """
     try:
-        # Parser la date et heure
-        start_datetime = datetime.strptime(start_time, "%Y-%m-%d %H:%M")
-        end_datetime = start_datetime + timedelta(minutes=duration_minutes)
-        
-        # Format pour l'API Google Calendar (sans 'Z', on précise le timeZone)
-        start_time_rfc = start_datetime.isoformat()
-        end_time_rfc = end_datetime.isoformat()
-        
+        # Identifiant fixé côté client : un réessai après timeout ne crée pas de doublon
+        event_id = event_id or new_event_id()
+
         # Créer l'événement
-        event = {
-            'summary': meeting_title,
-            'start': {
-                'dateTime': start_time_rfc,
-                'timeZone': timezone,
-            },
-            'end': {
-                'dateTime': end_time_rfc,
-                'timeZone': timezone,
-            },
-            'conferenceData': {
-                'createRequest': {
-                    'requestId': f"meet-{datetime.now().strftime('%Y%m%d-%H%M%S')}",
-                    'conferenceSolutionKey': {
-                        'type': 'hangoutsMeet'
-                    }
-                }
-            }
-        }
+        event = build_event_body(event_id, meeting_title, start_time, duration_minutes, timezone)
         
         # Insérer l'événement
-        event = service.events().insert(
-            calendarId='primary',
-            body=event,
-            conferenceDataVersion=1
-        ).execute()
+        try:
+            event = execute_request(
+                service.events().insert(calendarId='primary', body=event, conferenceDataVersion=1),
+                'calendar'
+            )
+        except HttpError as e:
+            if e.resp.status != 409:
+                raise
+            # Déjà créé par une tentative précédente dont la réponse a été perdue
+            event = execute_request(
+                service.events().get(calendarId='primary', eventId=event_id), 'calendar'
+            )
         
         # Extraire le lien Meet
-        if 'conferenceData' in event and 'entryPoints' in event['conferenceData']:
-            for entry_point in event['conferenceData']['entryPoints']:
-                if entry_point['entryPointType'] == 'video':
-                    return entry_point['uri']
+        return get_meet_link(event)
         
+    except CircuitOpenError as e:
+        st.warning(f"⏸️ Google Calendar ne répond pas : {e}. Aucun événement n'a été créé.")
         return None
-        
     except Exception as e:
         st.error(f"❌ Erreur lors de la création de l'événement Meet: {e}")
         return None
 
-def get_available_slots(service, date, start_hour=9, end_hour=20):
+def reschedule_google_meet_event(service, event_id, meeting_title, start_time, duration_minutes=60,
+                                 timezone='Europe/Paris'):
+    """
+    Déplace un événement existant (le lien Meet est conservé)
+
+    Returns:
+        Événement mis à jour ; {'id': ..., 'status': 'cancelled'} s'il a été
+        supprimé de l'agenda ; None en cas d'erreur (message affiché)
+    """
+    try:
+        event = execute_request(
+            service.events().patch(
+                calendarId='primary',
+                eventId=event_id,
+                body={'summary': meeting_title, **build_event_times(start_time, duration_minutes, timezone)}
+            ),
+            'calendar'
+        )
+        return event
+    except CircuitOpenError as e:
+        st.warning(f"⏸️ Google Calendar ne répond pas : {e}. L'entretien n'a pas été déplacé.")
+        return None
+    except HttpError as e:
+        if e.resp.status in (404, 410):
+            return {'id': event_id, 'status': 'cancelled'}
+        st.error(f"❌ Erreur lors du déplacement de l'événement Meet: {e}")
+        return None
+    except Exception as e:
+        st.error(f"❌ Erreur lors du déplacement de l'événement Meet: {e}")
+        return None
+
+def get_available_slots(service, date, interviewer=None, duration_minutes=SLOT_MINUTES):
     """
     Récupère les créneaux disponibles pour une date donnée
     
     Args:
         service: Service Google Calendar
         date: Date au format YYYY-MM-DD
-        start_hour: Heure de début (défaut: 9)
-        end_hour: Heure de fin (défaut: 20)
+        interviewer: Interviewer dont on applique les horaires (business_calendar)
+        duration_minutes: Durée de l'entretien (défaut : un créneau de la grille)
     
     Returns:
-        Liste des créneaux disponibles
+        Liste des heures de début auxquelles l'entretien entier est libre (vide les jours non travaillés ou
+        complets), ou None si l'agenda n'a pas pu être lu
     """
     try:
+        day_start = datetime.strptime(date, "%Y-%m-%d")
+        if not is_business_day(day_start.date(), interviewer):
+            return []
+
         # Créer la plage de temps pour la journée
         start_date = f"{date}T00:00:00Z"
         end_date = f"{date}T23:59:59Z"
         
-        # Récupérer les événements existants
-        events_result = service.events().list(
-            calendarId='primary',
-            timeMin=start_date,
-            timeMax=end_date,
-            singleEvents=True,
-            orderBy='startTime'
-        ).execute()
+        # Récupérer les événements existants (un seul appel pour les sessions
+        # qui demandent la même date au même moment avec le même compte)
+        events_result = execute_request(
+            service.events().list(
+                calendarId='primary',
+                timeMin=start_date,
+                timeMax=end_date,
+                singleEvents=True,
+                orderBy='startTime'
+            ),
+            'calendar',
+            key=('events.list', 'primary', date)
+        )
         
         events = events_result.get('items', [])
         
-        # Créer tous les créneaux possibles
-        all_slots = []
-        for hour in range(start_hour, end_hour):
-            for minute in [0, 15, 30, 45]:
-                slot_time = f"{hour:02d}:{minute:02d}"
-                all_slots.append(slot_time)
-        
-        # Filtrer les créneaux occupés
-        available_slots = all_slots.copy()
-        
+        # Plages occupées en minutes depuis minuit, filtrées sur la grille précalculée
+        minute = timedelta(minutes=1)
+        busy_intervals = []
         for event in events:
             if 'start' in event and 'dateTime' in event['start']:
                 event_start = datetime.fromisoformat(event['start']['dateTime'].replace('Z', '+00:00')).replace(tzinfo=None)
                 event_end = datetime.fromisoformat(event['end']['dateTime'].replace('Z', '+00:00')).replace(tzinfo=None)
-                
-                # Supprimer les créneaux qui chevauchent cet événement
-                for slot in all_slots:
-                    slot_hour, slot_minute = map(int, slot.split(':'))
-                    slot_datetime = datetime.strptime(f"{date} {slot_hour:02d}:{slot_minute:02d}", "%Y-%m-%d %H:%M")
-                    
-                    if slot_datetime < event_end and slot_datetime + timedelta(minutes=15) > event_start:
-                        if slot in available_slots:
-                            available_slots.remove(slot)
+                busy_intervals.append(((event_start - day_start) // minute, -((day_start - event_end) // minute)))
         
-        return available_slots
+        return get_free_slots(busy_intervals, interviewer, duration_minutes)
         
+    except CircuitOpenError as e:
+        st.warning(f"⏸️ Google Calendar ne répond pas : {e}")
+        return None
     except Exception as e:
         st.error(f"❌ Erreur lors de la récupération des créneaux: {e}")
-        return []
+        return None
 
 def clear_oauth_tokens():
     """
     Supprime les tokens OAuth stockés
     """
     try:
+        clear_service_cache()
         if os.path.exists(TOKEN_FILE):
             os.remove(TOKEN_FILE)
             st.success("✅ Tokens OAuth supprimés")
@@ -405,8 +478,14 @@ def send_gmail_message(service, to, subject, body, sender=None):
             message["from"] = sender
         raw = base64.urlsafe_b64encode(message.as_bytes()).decode()
         message_body = {"raw": raw}
-        sent_message = service.users().messages().send(userId="me", body=message_body).execute()
+        # Envoi non rejouable : réessai uniquement si Gmail a refusé la requête (429, 503)
+        execute_request(
+            service.users().messages().send(userId="me", body=message_body), 'gmail', idempotent=False
+        )
         return True
+    except CircuitOpenError as e:
+        st.error(f"❌ Gmail ne répond pas : {e}. Le message n'a pas été envoyé.")
+        return False
     except Exception as e:
         import streamlit as st
         import traceback
@@ -418,7 +497,7 @@ def send_gmail_message(service, to, subject, body, sender=None):
 def create_gmail_service():
     credentials = get_stored_credentials()
     if credentials:
-        return build('gmail', 'v1', credentials=credentials)
+        return build_service('gmail', 'v1', credentials)
     else:
         import streamlit as st
         st.error("❌ Authentification Google requise pour Gmail")
@@ -0,0 +1,459 @@
+#!/usr/bin/env python3
+"""
+Démon d'ingestion des CV
+
+Surveille un dossier partagé (inotify via watchdog, ou scrutation périodique)
+et, en option, un label Gmail. Chaque nouveau CV est extrait dans un pool de
+processus puis enregistré dans la base SQLite (cv_store), de sorte que les CV
+sont déjà traités lorsqu'un recruteur les ouvre.
+
+Utilisation :
+    python ingestion_daemon.py --watch /chemin/vers/dossier
+    python ingestion_daemon.py --watch ./inbox --gmail-label "Candidatures"
+"""
+
+import os
+import sys
+import time
+import base64
+import argparse
+import tempfile
+import threading
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from cv_extraction import (
+    SUPPORTED_EXTENSIONS,
+    extract_text,
+    extract_fields,
+    get_extractor_versions,
+    get_file_extension
+)
+from cv_store import CVStore, compute_file_sha256
+from skill_index import extract_terms, get_matcher
+from upload_spool import mapped_file
+from google_calls import BACKGROUND_DEADLINE, execute_request
+
+# watchdog utilise inotify sous Linux ; à défaut on scrute le dossier
+try:
+    from watchdog.observers import Observer
+    from watchdog.events import FileSystemEventHandler
+    WATCHDOG_AVAILABLE = True
+except ImportError:
+    WATCHDOG_AVAILABLE = False
+
+# Intervalle de scrutation par défaut (secondes)
+DEFAULT_POLL_INTERVAL = 5
+DEFAULT_GMAIL_INTERVAL = 60
+
+# Nouvelles soumissions d'un fichier après l'arrêt brutal d'un worker (tous les
+# fichiers en cours échouent alors, pas seulement celui qui l'a provoqué)
+MAX_POOL_RETRIES = 2
+
+def is_supported_file(path):
+    """Vérifie que le fichier est un CV exploitable (PDF/DOCX, non caché)"""
+    filename = os.path.basename(path)
+    if filename.startswith('.') or filename.startswith('~$'):
+        return False
+    return get_file_extension(filename) in SUPPORTED_EXTENSIONS
+
+def wait_until_stable(path, interval=0.5, timeout=30):
+    """Attend que la taille du fichier ne change plus (copie terminée)"""
+    deadline = time.monotonic() + timeout
+    last_size = -1
+    while time.monotonic() < deadline:
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            return False
+        if size == last_size and size > 0:
+            return True
+        last_size = size
+        time.sleep(interval)
+    return False
+
+def process_cv_file(path):
+    """
+    Extrait le texte, les champs et les termes d'un CV (exécuté dans un processus du pool)
+
+    Returns:
+        Tuple (texte brut, champs extraits, termes {catégorie: {terme: occurrences}})
+    """
+    filename = os.path.basename(path)
+    if get_file_extension(filename) == 'pdf':
+        # Lecture via mmap : pas de copie du fichier dans la mémoire du worker
+        with mapped_file(path) as cv_file:
+            text = extract_text(cv_file, filename) or ""
+    else:
+        text = extract_text(path, filename) or ""
+    return text, extract_fields(text), extract_terms(text)
+
+class IngestionDaemon:
+    """
+    Pool de workers alimenté par les sources (dossier, Gmail)
+
+    La contre-pression est assurée par un sémaphore : au-delà de
+    `max_pending` fichiers en cours, `submit` bloque la source.
+
+    Si un worker s'arrête brutalement (mémoire, PDF corrompu), le pool est
+    recréé et les fichiers en cours sont soumis à nouveau.
+
+    Un email Gmail n'est marqué comme ingéré qu'une fois toutes ses pièces
+    jointes extraites et enregistrées : en cas d'échec, il est relu au
+    prochain passage (voir begin_message / end_message).
+    """
+
+    def __init__(self, store, workers=None, max_pending=None):
+        self.store = store
+        self.workers = workers or os.cpu_count() or 2
+        self.executor = ProcessPoolExecutor(max_workers=self.workers)
+        self._pending = threading.BoundedSemaphore(max_pending or self.workers * 2)
+        self._in_flight = set()
+        # Emails en cours : {message_id: [pièces jointes restantes, échec, label]}
+        self._messages = {}
+        self._lock = threading.Lock()
+
+    def begin_message(self, message_id, label=None):
+        """Commence le suivi des pièces jointes d'un email (référence tenue jusqu'à end_message)"""
+        with self._lock:
+            self._messages[message_id] = [1, False, label]
+
+    def end_message(self, message_id, success=True):
+        """Termine la soumission des pièces jointes d'un email"""
+        self._message_done(message_id, success)
+
+    def is_message_pending(self, message_id):
+        """Indique si des pièces jointes de l'email sont encore en cours de traitement"""
+        with self._lock:
+            return message_id in self._messages
+
+    def _message_done(self, message_id, success):
+        """Décompte une pièce jointe ; marque l'email lorsque la dernière a réussi"""
+        with self._lock:
+            entry = self._messages[message_id]
+            entry[0] -= 1
+            entry[1] = entry[1] or not success
+            if entry[0]:
+                return
+            del self._messages[message_id]
+        _, failed, label = entry
+        if failed:
+            print(f"⚠️ Email {message_id} : pièce jointe en échec, il sera relu au prochain passage")
+        else:
+            self.store.mark_message(message_id, label=label)
+
+    def submit(self, path, source=None, delete_after=False, message_id=None):
+        """
+        Soumet un fichier au pool s'il n'a pas déjà été traité
+
+        Args:
+            message_id: Email Gmail d'origine (voir begin_message), marqué comme
+                ingéré une fois toutes ses pièces jointes enregistrées
+
+        Returns:
+            True si le fichier a été soumis, False sinon
+        """
+        if not is_supported_file(path):
+            return False
+        try:
+            sha256 = compute_file_sha256(path)
+        except OSError as e:
+            print(f"⚠️ Fichier illisible {path}: {e}")
+            return False
+
+        with self._lock:
+            if sha256 in self._in_flight or self.store.has_candidate(sha256):
+                already_known = True
+            else:
+                already_known = False
+                self._in_flight.add(sha256)
+        if already_known:
+            if delete_after:
+                os.remove(path)
+            return False
+
+        # Contre-pression : bloque tant que la file est pleine
+        self._pending.acquire()
+        if message_id is not None:
+            with self._lock:
+                self._messages[message_id][0] += 1
+        try:
+            self._start(path, sha256, source, delete_after, message_id)
+        except Exception:
+            self._release(sha256)
+            if message_id is not None:
+                self._message_done(message_id, False)
+            raise
+        return True
+
+    def _start(self, path, sha256, source, delete_after, message_id, attempt=0):
+        """Confie un fichier au pool (recréé une fois s'il est inutilisable)"""
+        executor = self.executor
+        try:
+            future = executor.submit(process_cv_file, path)
+        except BrokenProcessPool:
+            self._reset_pool(executor)
+            executor = self.executor
+            future = executor.submit(process_cv_file, path)
+        future.add_done_callback(
+            partial(self._on_done, path, sha256, source, delete_after, message_id, executor, attempt)
+        )
+
+    def _reset_pool(self, executor):
+        """Remplace le pool s'il est encore celui qui a échoué (un worker a planté)"""
+        with self._lock:
+            if self.executor is not executor:
+                return
+            self.executor = ProcessPoolExecutor(max_workers=self.workers)
+        executor.shutdown(wait=False, cancel_futures=True)
+        print("⚠️ Pool d'extraction interrompu : nouveau pool démarré")
+
+    def _release(self, sha256):
+        with self._lock:
+            self._in_flight.discard(sha256)
+        self._pending.release()
+
+    def _on_done(self, path, sha256, source, delete_after, message_id, executor, attempt, future):
+        """Enregistre le résultat d'une extraction"""
+        filename = os.path.basename(path)
+        success = False
+        try:
+            try:
+                text, fields, terms = future.result()
+            except BrokenProcessPool:
+                self._reset_pool(executor)
+                if attempt >= MAX_POOL_RETRIES:
+                    raise
+                print(f"🔁 {filename} : worker interrompu, nouvelle soumission")
+                self._start(path, sha256, source, delete_after, message_id, attempt + 1)
+                # Le fichier reste en cours : rien à libérer pour cette tentative
+                return
+            self.store.save_candidate(sha256, filename, text, fields, source=source,
+                                      versions=get_extractor_versions())
+            self.store.save_terms_many([(sha256, terms)], get_matcher()[1])
+            print(f"✅ {filename} : {fields['email'] or 'email ?'} / {fields['contract_type']}")
+            success = True
+        except Exception as e:
+            print(f"❌ Erreur lors du traitement de {filename}: {e}")
+        self._finish(path, sha256, delete_after, message_id, success)
+
+    def _finish(self, path, sha256, delete_after, message_id, success):
+        """Libère la place d'un fichier traité (ou abandonné)"""
+        self._release(sha256)
+        if delete_after:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        if message_id is not None:
+            self._message_done(message_id, success)
+
+    def shutdown(self):
+        """Attend la fin des extractions en cours et arrête le pool"""
+        while True:
+            executor = self.executor
+            executor.shutdown(wait=True)
+            # Pool recréé pendant l'attente (worker interrompu) : on attend aussi le nouveau
+            if self.executor is executor:
+                return
+
+class DirectoryScanner:
+    """Scrutation périodique d'un dossier (repli sans inotify)"""
+
+    def __init__(self, daemon, directory):
+        self.daemon = daemon
+        self.directory = directory
+        self._seen = {}
+
+    def scan(self):
+        """Soumet les fichiers nouveaux ou modifiés depuis le dernier passage"""
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if not entry.is_file() or not is_supported_file(entry.path):
+                    continue
+                stat = entry.stat()
+                signature = (stat.st_mtime, stat.st_size)
+                if self._seen.get(entry.path) == signature:
+                    continue
+                self._seen[entry.path] = signature
+                if wait_until_stable(entry.path):
+                    self.daemon.submit(entry.path, source=f"dossier:{self.directory}")
+
+if WATCHDOG_AVAILABLE:
+    class CVFolderHandler(FileSystemEventHandler):
+        """Soumet au démon les CV créés ou déplacés dans le dossier surveillé"""
+
+        def __init__(self, daemon, directory):
+            super().__init__()
+            self.daemon = daemon
+            self.source = f"dossier:{directory}"
+
+        def _handle(self, path):
+            if is_supported_file(path) and wait_until_stable(path):
+                try:
+                    self.daemon.submit(path, source=self.source)
+                except Exception as e:
+                    print(f"⚠️ Erreur lors de la soumission de {path}: {e}")
+
+        def on_created(self, event):
+            if not event.is_directory:
+                self._handle(event.src_path)
+
+        def on_moved(self, event):
+            if not event.is_directory:
+                self._handle(event.dest_path)
+
+def scan_directory(scanner):
+    """Passage de scrutation du dossier (une erreur n'arrête pas le démon)"""
+    try:
+        scanner.scan()
+    except Exception as e:
+        print(f"⚠️ Erreur lors de la scrutation du dossier: {e}")
+
+def find_gmail_label_id(service, label_name):
+    """Retourne l'identifiant d'un label Gmail à partir de son nom"""
+    labels = execute_request(
+        service.users().labels().list(userId='me'), 'gmail', deadline=BACKGROUND_DEADLINE
+    ).get('labels', [])
+    for label in labels:
+        if label['name'] == label_name:
+            return label['id']
+    return None
+
+def iter_attachment_parts(payload):
+    """Parcourt récursivement les parties d'un message Gmail ayant une pièce jointe"""
+    if payload.get('filename') and payload.get('body', {}).get('attachmentId'):
+        yield payload
+    for part in payload.get('parts', []):
+        yield from iter_attachment_parts(part)
+
+def poll_gmail_label(daemon, service, label_name, label_id, spool_dir):
+    """
+    Télécharge les pièces jointes PDF/DOCX des nouveaux emails du label
+
+    Les pièces jointes sont écrites dans `spool_dir` puis soumises au démon,
+    qui les supprime après traitement. L'email est marqué comme ingéré par le
+    démon, une fois toutes ses pièces jointes enregistrées.
+    """
+    source = f"gmail:{label_name}"
+    page_token = None
+    while True:
+        response = execute_request(service.users().messages().list(
+            userId='me', labelIds=[label_id], q='has:attachment', pageToken=page_token
+        ), 'gmail', deadline=BACKGROUND_DEADLINE)
+        for message_ref in response.get('messages', []):
+            message_id = message_ref['id']
+            if daemon.is_message_pending(message_id) or daemon.store.has_message(message_id):
+                continue
+            daemon.begin_message(message_id, label=label_name)
+            try:
+                message = execute_request(
+                    service.users().messages().get(userId='me', id=message_id), 'gmail',
+                    deadline=BACKGROUND_DEADLINE
+                )
+                for part in iter_attachment_parts(message.get('payload', {})):
+                    if not is_supported_file(part['filename']):
+                        continue
+                    attachment = execute_request(service.users().messages().attachments().get(
+                        userId='me', messageId=message_id, id=part['body']['attachmentId']
+                    ), 'gmail', deadline=BACKGROUND_DEADLINE)
+                    data = base64.urlsafe_b64decode(attachment['data'])
+                    path = os.path.join(spool_dir, f"{message_id}-{os.path.basename(part['filename'])}")
+                    with open(path, 'wb') as f:
+                        f.write(data)
+                    daemon.submit(path, source=source, delete_after=True, message_id=message_id)
+            except Exception:
+                daemon.end_message(message_id, success=False)
+                raise
+            daemon.end_message(message_id)
+        page_token = response.get('nextPageToken')
+        if not page_token:
+            return
+
+def main():
+    """Fonction principale"""
+    parser = argparse.ArgumentParser(description="Démon d'ingestion des CV")
+    parser.add_argument('--watch', help="Dossier à surveiller")
+    parser.add_argument('--gmail-label', help="Label Gmail dont les pièces jointes sont ingérées")
+    parser.add_argument('--db', help="Fichier de base SQLite (défaut : CV_DB_PATH ou cv_data.db)")
+    parser.add_argument('--workers', type=int, help="Nombre de processus d'extraction")
+    parser.add_argument('--max-pending', type=int, help="Nombre maximal de fichiers en attente")
+    parser.add_argument('--poll-interval', type=float, default=DEFAULT_POLL_INTERVAL,
+                        help="Intervalle de scrutation du dossier sans inotify (secondes)")
+    parser.add_argument('--gmail-interval', type=float, default=DEFAULT_GMAIL_INTERVAL,
+                        help="Intervalle de scrutation du label Gmail (secondes)")
+    args = parser.parse_args()
+
+    if not args.watch and not args.gmail_label:
+        parser.error("indiquez au moins --watch ou --gmail-label")
+    if args.watch and not os.path.isdir(args.watch):
+        parser.error(f"dossier introuvable : {args.watch}")
+
+    print("🚀 Démarrage du démon d'ingestion des CV - Lizia")
+    print("=" * 50)
+
+    store = CVStore(args.db)
+    daemon = IngestionDaemon(store, workers=args.workers, max_pending=args.max_pending)
+    print(f"⚙️ {daemon.workers} workers, base : {store.db_file}")
+
+    gmail_service = None
+    gmail_label_id = None
+    spool_dir = None
+    if args.gmail_label:
+        from google_meet_config import create_gmail_service
+        gmail_service = create_gmail_service()
+        if gmail_service is None:
+            print("❌ Authentification Google requise : connectez-vous depuis l'application")
+            sys.exit(1)
+        gmail_label_id = find_gmail_label_id(gmail_service, args.gmail_label)
+        if gmail_label_id is None:
+            print(f"❌ Label Gmail introuvable : {args.gmail_label}")
+            sys.exit(1)
+        spool_dir = tempfile.mkdtemp(prefix='cv-gmail-')
+        print(f"📧 Label Gmail surveillé : {args.gmail_label}")
+
+    observer = None
+    scanner = None
+    if args.watch:
+        scanner = DirectoryScanner(daemon, args.watch)
+        if WATCHDOG_AVAILABLE:
+            # Observateur démarré avant le rattrapage : aucun fichier déposé entre les
+            # deux n'est manqué (ceux vus deux fois sont écartés par leur SHA-256)
+            observer = Observer()
+            observer.schedule(CVFolderHandler(daemon, args.watch), args.watch, recursive=False)
+            observer.start()
+            print(f"📂 Dossier surveillé (inotify) : {args.watch}")
+        else:
+            print(f"📂 Dossier surveillé (scrutation {args.poll_interval}s) : {args.watch}")
+        # Rattrapage des fichiers déjà présents
+        scan_directory(scanner)
+        if observer:
+            scanner = None
+
+    print("🛑 Appuyez sur Ctrl+C pour arrêter le démon")
+    print("-" * 50)
+
+    next_gmail_poll = 0
+    try:
+        while True:
+            if scanner:
+                scan_directory(scanner)
+            if gmail_service and time.monotonic() >= next_gmail_poll:
+                try:
+                    poll_gmail_label(daemon, gmail_service, args.gmail_label, gmail_label_id, spool_dir)
+                except Exception as e:
+                    print(f"⚠️ Erreur lors de la lecture du label Gmail: {e}")
+                next_gmail_poll = time.monotonic() + args.gmail_interval
+            time.sleep(args.poll_interval)
+    except KeyboardInterrupt:
+        print("\n👋 Arrêt du démon...")
+    finally:
+        if observer:
+            observer.stop()
+            observer.join()
+        daemon.shutdown()
+        store.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Détection de la langue des CV (français / anglais)
+
+Modèle bayésien naïf sur les trigrammes de caractères, construit à partir de
+textes de référence inclus ci-dessous : aucun appel réseau, résultat
+déterministe. Seul le début du texte est analysé, ce qui suffit à départager
+les deux langues et borne le coût de la détection.
+"""
+
+import re
+import math
+import hashlib
+from collections import Counter
+from functools import lru_cache
+
+# Langues reconnues (la première est la langue par défaut)
+LANGUAGES = ('fr', 'en')
+DEFAULT_LANGUAGE = 'fr'
+
+# Nombre de caractères analysés au début du texte
+SAMPLE_CHARS = 3000
+
+# Lissage additif des fréquences de trigrammes
+SMOOTHING = 0.5
+
+# Textes de référence (vocabulaire courant des CV et des candidatures)
+LANGUAGE_SAMPLES = {
+    'fr': """
+Curriculum vitae. Expérience professionnelle, formation, compétences, langues,
+centres d'intérêt. Développeur web en alternance depuis septembre dans une
+entreprise de conseil. Stage de six mois au sein de l'équipe marketing :
+analyse des ventes, création de tableaux de bord, suivi des campagnes et
+rédaction de rapports. Recherche un contrat à durée indéterminée ou un poste
+en CDD à partir du mois de janvier. Diplômé d'un master en gestion de projet,
+licence d'informatique à l'université de Lyon, baccalauréat scientifique avec
+mention. Maîtrise des outils de bureautique, gestion des bases de données,
+travail en équipe, autonomie, rigueur et sens de l'organisation. Anglais
+courant, espagnol notions. Permis de conduire. Responsable de la mise en place
+d'une nouvelle application pour les clients et de la formation des
+utilisateurs. Participation à des projets associatifs et sportifs. Je suis
+disponible immédiatement et je serais ravi de vous rencontrer pour un
+entretien. Veuillez trouver ci-joint mon curriculum vitae ainsi que ma lettre
+de motivation. Chargée de recrutement, assistante de direction, comptable,
+ingénieur d'études, technicien de maintenance, conseiller clientèle.
+""",
+    'en': """
+Curriculum vitae. Professional experience, education, skills, languages and
+interests. Web developer working on a part-time apprenticeship since September
+at a consulting company. Six month internship with the marketing team: sales
+analysis, building dashboards, monitoring campaigns and writing reports.
+Looking for a permanent position or a fixed-term contract starting in January.
+Graduated with a master's degree in project management, bachelor of computer
+science at the University of London, high school diploma with honors.
+Proficient in office software, database management, teamwork, self-motivated,
+detail oriented and strong organizational skills. Fluent English, basic
+Spanish. Driving licence. Responsible for the rollout of a new customer
+application and for training the users. Involved in community and sports
+projects. I am available immediately and would be delighted to meet you for
+an interview. Please find attached my resume and my cover letter. Recruitment
+officer, executive assistant, accountant, research engineer, maintenance
+technician, customer advisor.
+""",
+}
+
+# Tout ce qui n'est pas une lettre sépare les mots
+NON_LETTER_REGEX = re.compile(r"[^a-zàâäçéèêëîïôöùûüÿœæ]+")
+
+def get_trigrams(text):
+    """Trigrammes de caractères d'un texte, mots encadrés par des espaces"""
+    normalized = ' ' + NON_LETTER_REGEX.sub(' ', text.lower()).strip() + ' '
+    return Counter(normalized[i:i + 3] for i in range(len(normalized) - 2))
+
+@lru_cache(maxsize=1)
+def get_language_model():
+    """
+    Construit le modèle à partir des textes de référence (mis en cache)
+
+    Returns:
+        Tuple ({langue: {trigramme: log-probabilité}}, {langue: log-probabilité d'un trigramme inconnu})
+    """
+    counts = {language: get_trigrams(LANGUAGE_SAMPLES[language]) for language in LANGUAGES}
+    vocabulary_size = len(set().union(*counts.values()))
+    log_probs = {}
+    unknown = {}
+    for language, trigrams in counts.items():
+        denominator = math.log(sum(trigrams.values()) + SMOOTHING * vocabulary_size)
+        log_probs[language] = {
+            trigram: math.log(count + SMOOTHING) - denominator
+            for trigram, count in trigrams.items()
+        }
+        unknown[language] = math.log(SMOOTHING) - denominator
+    return log_probs, unknown
+
+def compute_model_version():
+    """Empreinte courte du modèle (textes de référence et paramètres)"""
+    digest = hashlib.sha256(repr((LANGUAGES, SAMPLE_CHARS, SMOOTHING, LANGUAGE_SAMPLES)).encode('utf-8'))
+    return digest.hexdigest()[:12]
+
+LANGUAGE_MODEL_VERSION = compute_model_version()
+
+def detect_language(text):
+    """
+    Détecte la langue d'un texte
+
+    Returns:
+        Code de langue ('fr' ou 'en'), DEFAULT_LANGUAGE si le texte ne contient pas de lettres
+    """
+    trigrams = get_trigrams(text[:SAMPLE_CHARS])
+    if not trigrams:
+        return DEFAULT_LANGUAGE
+    log_probs, unknown = get_language_model()
+    scores = {
+        language: sum(
+            count * log_probs[language].get(trigram, unknown[language])
+            for trigram, count in trigrams.items()
+        )
+        for language in LANGUAGES
+    }
+    return max(LANGUAGES, key=scores.get)
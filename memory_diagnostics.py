@@ -0,0 +1,222 @@
+"""
+Diagnostic mémoire et éviction des sessions inactives
+
+- Les valeurs volumineuses d'une session (texte extrait du CV, messages
+  générés, créneaux mémoïsés) sont conservées dans un stock partagé par le
+  processus, indexé par identifiant de session. Les sessions inactives depuis
+  SESSION_IDLE_TTL secondes (onglet resté ouvert, par exemple) sont purgées à
+  chaque exécution de script de n'importe quelle session.
+- En mode diagnostic (MEMORY_DIAGNOSTICS=1), chaque extraction est encadrée
+  par deux instantanés tracemalloc ; les plus fortes allocations et la
+  mémoire résidente (RSS) sont conservées pour affichage dans l'application.
+"""
+
+import os
+import sys
+import time
+import threading
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager
+
+# Mode diagnostic (tracemalloc ralentit l'extraction : désactivé par défaut)
+DIAGNOSTICS_ENABLED = os.environ.get('MEMORY_DIAGNOSTICS', '') == '1'
+
+# Délai d'inactivité avant purge des données d'une session (secondes)
+SESSION_IDLE_TTL = float(os.environ.get('SESSION_IDLE_TTL', 1800))
+
+# Profondeur des piles enregistrées et nombre de lignes par rapport
+TRACEMALLOC_FRAMES = 10
+TOP_ALLOCATIONS = 10
+
+# Derniers rapports d'allocation (extraction la plus récente en dernier)
+ALLOCATION_REPORTS = deque(maxlen=20)
+
+def get_rss():
+    """Mémoire résidente actuelle du processus (octets)"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        # Hors Linux : pic de mémoire résidente (ko sous Linux, octets sous macOS)
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
+
+def deep_sizeof(obj):
+    """Taille approximative d'un objet et de son contenu (octets)"""
+    seen = set()
+    stack = [obj]
+    size = 0
+    while stack:
+        current = stack.pop()
+        if id(current) in seen:
+            continue
+        seen.add(id(current))
+        memory_usage = getattr(current, 'memory_usage', None)
+        if callable(memory_usage) and hasattr(current, 'columns'):
+            # DataFrame pandas
+            size += int(memory_usage(deep=True).sum())
+            continue
+        size += sys.getsizeof(current)
+        if isinstance(current, dict):
+            stack.extend(current.keys())
+            stack.extend(current.values())
+        elif isinstance(current, (list, tuple, set, frozenset, deque)):
+            stack.extend(current)
+    return size
+
+def format_bytes(size):
+    """Formate une taille en octets pour l'affichage"""
+    for unit in ('o', 'Ko', 'Mo'):
+        if abs(size) < 1024:
+            return f"{size:.0f} {unit}"
+        size /= 1024
+    return f"{size:.1f} Go"
+
+@contextmanager
+def track_allocations(label):
+    """
+    Mesure les allocations d'un bloc de code (mode diagnostic uniquement)
+
+    Le rapport (plus fortes allocations restantes par ligne de code, RSS
+    avant/après, durée) est ajouté à ALLOCATION_REPORTS.
+    """
+    if not DIAGNOSTICS_ENABLED:
+        yield
+        return
+
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(TRACEMALLOC_FRAMES)
+    ignore_tracemalloc = (tracemalloc.Filter(False, tracemalloc.__file__),)
+    before = tracemalloc.take_snapshot().filter_traces(ignore_tracemalloc)
+    rss_before = get_rss()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        after = tracemalloc.take_snapshot().filter_traces(ignore_tracemalloc)
+        current, peak = tracemalloc.get_traced_memory()
+        ALLOCATION_REPORTS.append({
+            'label': label,
+            'elapsed': elapsed,
+            'rss_before': rss_before,
+            'rss_after': get_rss(),
+            'traced_current': current,
+            'traced_peak': peak,
+            'top': [
+                (str(stat.traceback[0]), stat.size_diff, stat.count_diff)
+                for stat in after.compare_to(before, 'lineno')[:TOP_ALLOCATIONS]
+            ],
+        })
+        tracemalloc.reset_peak()
+
+class IdleSessionStore:
+    """
+    Valeurs volumineuses des sessions, purgées après inactivité
+
+    Thread-safe : chaque session Streamlit s'exécute dans son propre thread.
+    """
+
+    def __init__(self, ttl=SESSION_IDLE_TTL):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._sessions = {}
+
+    def touch(self, session_id, now=None):
+        """Marque une session comme active"""
+        with self._lock:
+            entry = self._sessions.setdefault(session_id, [0, {}])
+            entry[0] = time.monotonic() if now is None else now
+
+    def get(self, session_id, key, default=None):
+        """Valeur d'une session, `default` si absente ou purgée (l'accès marque la session active)"""
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is None:
+                return default
+            entry[0] = time.monotonic()
+            return entry[1].get(key, default)
+
+    def set(self, session_id, key, value, now=None):
+        """Enregistre une valeur (la session est marquée active)"""
+        with self._lock:
+            entry = self._sessions.setdefault(session_id, [0, {}])
+            entry[0] = time.monotonic() if now is None else now
+            entry[1][key] = value
+
+    def pop(self, session_id, key):
+        """Supprime une valeur d'une session"""
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry:
+                entry[1].pop(key, None)
+
+    def items(self, session_id):
+        """Copie des valeurs d'une session"""
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            return dict(entry[1]) if entry else {}
+
+    def evict_idle(self, now=None):
+        """
+        Supprime les sessions inactives depuis plus de `ttl` secondes
+
+        Returns:
+            Nombre de sessions purgées
+        """
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            idle = [sid for sid, (last_seen, _) in self._sessions.items() if now - last_seen > self.ttl]
+            for session_id in idle:
+                del self._sessions[session_id]
+        return len(idle)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._sessions)
+
+    def total_size(self):
+        """Taille approximative de toutes les sessions (octets)"""
+        with self._lock:
+            values = [values for _, values in self._sessions.values()]
+        return sum(deep_sizeof(session_values) for session_values in values)
+
+SESSION_STORE = IdleSessionStore()
+
+def get_session_id():
+    """Identifiant de la session Streamlit courante"""
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+    ctx = get_script_run_ctx()
+    return ctx.session_id if ctx else 'default'
+
+def get_session_value(key, default=None):
+    """Valeur volumineuse de la session courante"""
+    return SESSION_STORE.get(get_session_id(), key, default)
+
+def set_session_value(key, value):
+    """Enregistre une valeur volumineuse pour la session courante"""
+    SESSION_STORE.set(get_session_id(), key, value)
+
+def pop_session_value(key):
+    """Supprime une valeur volumineuse de la session courante"""
+    SESSION_STORE.pop(get_session_id(), key)
+
+def start_session_run():
+    """À appeler en début de script : marque la session active et purge les sessions inactives"""
+    SESSION_STORE.touch(get_session_id())
+    return SESSION_STORE.evict_idle()
+
+def session_size_report(session_state):
+    """
+    Taille des valeurs de la session courante
+
+    Returns:
+        Liste de tuples (clé, taille en octets), par taille décroissante
+    """
+    sizes = [(f"session_state.{key}", deep_sizeof(value)) for key, value in session_state.items()]
+    sizes += [(f"stock.{key}", deep_sizeof(value))
+              for key, value in SESSION_STORE.items(get_session_id()).items()]
+    return sorted(sizes, key=lambda item: item[1], reverse=True)
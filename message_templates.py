@@ -0,0 +1,231 @@
+"""
+Templates des messages envoyés aux candidats
+
+Les templates utilisent la syntaxe de string.Template ($contract_phrase,
+${date}...). Chaque template est compilé une seule fois en chaîne de format
+(str.format_map, implémenté en C) puis mis en cache, ce qui permet de générer
+des milliers de messages personnalisés depuis un DataFrame.
+
+Des variantes par type de contrat et par campagne peuvent être fournies dans
+un fichier JSON (variable MESSAGE_TEMPLATES_FILE) :
+
+    {
+        "reception": {"Stage": "Bonjour,\\n\\nMerci pour votre candidature de stage..."},
+        "entretien": {"default": "..."}
+    }
+"""
+
+import os
+import json
+import string
+from datetime import date, datetime
+from functools import lru_cache
+import pandas as pd
+
+# Fichier de templates de campagne (optionnel)
+TEMPLATES_FILE = os.environ.get('MESSAGE_TEMPLATES_FILE')
+
+# Templates par défaut : {type de message: {type de contrat ou 'default': template}}
+DEFAULT_TEMPLATES = {
+    'reception': {
+        'default': """Bonjour,
+
+Merci pour votre candidature. Nous avons bien reçu votre CV pour $contract_phrase.
+
+Nous reviendrons vers vous sous peu.
+
+Cordialement,
+L'équipe RH""",
+    },
+    'entretien': {
+        'default': """Bonjour,
+
+Merci pour votre candidature pour $contract_phrase.
+
+Nous avons le plaisir de vous convier à un entretien :
+📅 Date : $date
+🕐 Heure : $time
+👤 Avec : $interviewer
+
+🔗 Lien Visio : $visio_link
+
+En cas d'impossibilité, merci de nous contacter au plus vite.
+
+Cordialement,
+L'équipe RH""",
+    },
+}
+
+# Variables utilisables dans les templates
+PLACEHOLDERS = (
+    'email', 'contract_type', 'contract_phrase', 'duration',
+    'date', 'date_long', 'time', 'interviewer', 'visio_link',
+)
+
+# Noms des jours et des mois par langue (indépendant de la locale système)
+DAY_NAMES = {
+    'fr': ['lundi', 'mardi', 'mercredi', 'jeudi', 'vendredi', 'samedi', 'dimanche'],
+    'en': ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday'],
+}
+MONTH_NAMES = {
+    'fr': ['janvier', 'février', 'mars', 'avril', 'mai', 'juin', 'juillet',
+           'août', 'septembre', 'octobre', 'novembre', 'décembre'],
+    'en': ['January', 'February', 'March', 'April', 'May', 'June', 'July',
+           'August', 'September', 'October', 'November', 'December'],
+}
+SHORT_DATE_FORMATS = {
+    'fr': "%d/%m/%Y",
+    'en': "%m/%d/%Y",
+}
+
+# Correspondance colonnes du DataFrame -> variables des templates (export CSV de l'app)
+DEFAULT_COLUMN_MAP = {
+    'Email': 'email',
+    'Type de contrat': 'contract_type',
+    'Durée': 'duration',
+    'Date entretien': 'date',
+    'Heure entretien': 'time',
+    'Interviewer': 'interviewer',
+    'Lien Visio': 'visio_link',
+}
+
+def get_contract_phrase(contract_type):
+    """Formule désignant le poste selon le type de contrat"""
+    if not contract_type or contract_type == "À compléter":
+        return "un poste"
+    return f"un poste en {contract_type}"
+
+@lru_cache(maxsize=1024)
+def parse_date(value):
+    """Convertit une date "YYYY-MM-DD" en objet date (résultat mis en cache)"""
+    return datetime.strptime(value, "%Y-%m-%d").date()
+
+@lru_cache(maxsize=4096)
+def format_date(value, locale='fr'):
+    """
+    Formate une date dans la langue demandée
+
+    Args:
+        value: Date (objet date ou chaîne "YYYY-MM-DD")
+        locale: Langue ('fr' ou 'en')
+
+    Returns:
+        Tuple (format court, format long), ex: ("03/03/2025", "lundi 3 mars 2025")
+    """
+    if value is None or value == "" or (isinstance(value, float) and pd.isna(value)):
+        return "", ""
+    if isinstance(value, datetime):
+        value = value.date()
+    elif not isinstance(value, date):
+        value = parse_date(str(value)[:10])
+    short = value.strftime(SHORT_DATE_FORMATS[locale])
+    day_name = DAY_NAMES[locale][value.weekday()]
+    month_name = MONTH_NAMES[locale][value.month - 1]
+    if locale == 'en':
+        long = f"{day_name}, {month_name} {value.day}, {value.year}"
+    else:
+        long = f"{day_name} {value.day} {month_name} {value.year}"
+    return short, long
+
+def compile_template(source):
+    """
+    Compile un template string.Template en chaîne pour str.format_map
+
+    Raises:
+        ValueError: si le template contient une variable inconnue ou un $ invalide
+    """
+    parts = []
+    position = 0
+    for match in string.Template.pattern.finditer(source):
+        parts.append(source[position:match.start()].replace('{', '{{').replace('}', '}}'))
+        position = match.end()
+        if match.group('escaped') is not None:
+            parts.append('$')
+            continue
+        name = match.group('named') or match.group('braced')
+        if name is None:
+            raise ValueError(f"$ invalide à la position {match.start()} du template")
+        if name not in PLACEHOLDERS:
+            raise ValueError(f"Variable inconnue dans le template : {name}")
+        parts.append('{' + name + '}')
+    parts.append(source[position:].replace('{', '{{').replace('}', '}}'))
+    return ''.join(parts)
+
+@lru_cache(maxsize=8)
+def load_templates(templates_file=None):
+    """
+    Charge les templates par défaut complétés par ceux d'un fichier JSON
+
+    Returns:
+        Dictionnaire {type de message: {type de contrat: template compilé}}
+    """
+    templates = {kind: dict(variants) for kind, variants in DEFAULT_TEMPLATES.items()}
+    if templates_file:
+        with open(templates_file, 'r', encoding='utf-8') as f:
+            for kind, variants in json.load(f).items():
+                templates.setdefault(kind, {}).update(variants)
+    return {
+        kind: {variant: compile_template(source) for variant, source in variants.items()}
+        for kind, variants in templates.items()
+    }
+
+def get_template(kind, contract_type=None, templates_file=TEMPLATES_FILE):
+    """Retourne le template compilé pour un type de message et de contrat"""
+    variants = load_templates(templates_file)[kind]
+    return variants.get(contract_type) or variants['default']
+
+def build_context(values, locale='fr'):
+    """Complète les valeurs d'un message avec les variables dérivées"""
+    context = dict.fromkeys(PLACEHOLDERS, "")
+    context.update({key: value for key, value in values.items() if value is not None})
+    context['contract_phrase'] = get_contract_phrase(values.get('contract_type'))
+    context['date'], context['date_long'] = format_date(values.get('date'), locale)
+    return context
+
+def render_message(kind, locale='fr', templates_file=TEMPLATES_FILE, **values):
+    """
+    Génère un message à partir de son template
+
+    Args:
+        kind: Type de message ('reception', 'entretien' ou type de campagne)
+        locale: Langue des dates
+        templates_file: Fichier JSON de templates de campagne
+        **values: Variables du message (email, contract_type, date, time...)
+
+    Returns:
+        Message rendu
+    """
+    template = get_template(kind, values.get('contract_type'), templates_file)
+    return template.format_map(build_context(values, locale))
+
+def render_bulk(df, kind, column_map=None, locale='fr', templates_file=TEMPLATES_FILE):
+    """
+    Génère un message personnalisé par ligne d'un DataFrame de candidats
+
+    Args:
+        df: DataFrame des candidats (colonnes de l'export CSV par défaut)
+        kind: Type de message
+        column_map: Correspondance colonnes -> variables (défaut : DEFAULT_COLUMN_MAP)
+        locale: Langue des dates
+        templates_file: Fichier JSON de templates de campagne
+
+    Returns:
+        Series des messages, alignée sur l'index du DataFrame
+    """
+    column_map = column_map or DEFAULT_COLUMN_MAP
+    columns = [(column, name) for column, name in column_map.items() if column in df.columns]
+    names = [name for _, name in columns]
+    variants = load_templates(templates_file)[kind]
+    default_template = variants['default']
+
+    messages = []
+    # Valeurs manquantes (NaN) -> None : remplacées par "" dans build_context
+    rows = zip(*(df[column].astype(object).where(df[column].notna(), None).tolist() for column, _ in columns))
+    if not columns:
+        # Aucune colonne connue : variables vides pour chaque ligne
+        rows = [()] * len(df)
+    for row in rows:
+        values = dict(zip(names, row))
+        template = variants.get(values.get('contract_type'), default_template)
+        messages.append(template.format_map(build_context(values, locale)))
+    return pd.Series(messages, index=df.index, name='Message')
@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+Classement des CV par rapport à une offre d'emploi (BM25)
+
+Les textes bruts des CV stockés (cv_store) sont indexés dans un index inversé
+NumPy : pour chaque mot, la liste des CV qui le contiennent et le nombre
+d'occurrences. L'index est sauvegardé sur disque (RANKING_INDEX_FILE) et mis à
+jour de façon incrémentale : seuls les CV ajoutés depuis la dernière mise à
+jour sont lus, ceux supprimés de la base sont retirés.
+
+Le score BM25 d'une offre n'examine que les listes des mots de l'offre, ce qui
+donne le top-k en quelques millisecondes sur toute l'archive. Les résultats
+peuvent être filtrés par type de contrat et durée (champs extraits en base).
+
+Utilisation :
+    python ranking.py --update
+    python ranking.py --job offre.txt --top 10 --contract Stage --duration "6 mois"
+"""
+
+import os
+import time
+import argparse
+from collections import Counter
+import numpy as np
+
+from cv_store import CVStore
+from skill_index import tokenize
+
+# Fichier de l'index (surchargeable par variable d'environnement)
+INDEX_FILE = os.environ.get('RANKING_INDEX_FILE', 'cv_ranking.npz')
+
+# Paramètres BM25
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Mots vides non indexés (présents dans tous les CV, sans valeur de classement)
+STOPWORDS = frozenset("""
+a au aux avec ce ces dans de des du en et il elle je la le les leur lui ma mais
+me mes mon ne nos notre nous on ou par pas pour qu que qui sa se ses son sur ta
+te tes ton tu un une vos votre vous d l j n s c y est sont ete etre
+an and are as at be by for from has have in is it its of on or that the their
+this to was were will with
+""".split())
+
+def get_document_terms(text):
+    """Mots indexés d'un texte (normalisés, sans mots vides)"""
+    return [token for token in tokenize(text) if token not in STOPWORDS]
+
+class RankingIndex:
+    """
+    Index inversé BM25 des CV
+
+    Les listes de documents sont stockées au format CSC : les occurrences du
+    mot i sont doc_ids[indptr[i]:indptr[i + 1]] et term_counts[...].
+    """
+
+    def __init__(self, path=None):
+        self.path = path or INDEX_FILE
+        self.vocabulary = []
+        self.term_ids = {}
+        self.indptr = np.zeros(1, dtype=np.int64)
+        self.doc_ids = np.zeros(0, dtype=np.int32)
+        self.term_counts = np.zeros(0, dtype=np.float32)
+        self.documents = []
+        self.document_ids = {}
+        self.document_lengths = np.zeros(0, dtype=np.float32)
+        if os.path.exists(self.path):
+            self.load()
+
+    def __len__(self):
+        return len(self.documents)
+
+    def load(self):
+        """Charge l'index depuis le disque"""
+        with np.load(self.path, allow_pickle=False) as data:
+            self.vocabulary = data['vocabulary'].tolist()
+            self.indptr = data['indptr']
+            self.doc_ids = data['doc_ids']
+            self.term_counts = data['term_counts']
+            self.documents = data['documents'].tolist()
+            self.document_lengths = data['document_lengths']
+        self.term_ids = {term: i for i, term in enumerate(self.vocabulary)}
+        self.document_ids = {sha256: i for i, sha256 in enumerate(self.documents)}
+
+    def save(self):
+        """Sauvegarde l'index (écriture atomique)"""
+        temp_path = self.path + '.tmp'
+        with open(temp_path, 'wb') as f:
+            np.savez(
+                f,
+                vocabulary=np.array(self.vocabulary, dtype=str),
+                indptr=self.indptr,
+                doc_ids=self.doc_ids,
+                term_counts=self.term_counts,
+                documents=np.array(self.documents, dtype=str),
+                document_lengths=self.document_lengths,
+            )
+        os.replace(temp_path, self.path)
+
+    def update(self, store):
+        """
+        Synchronise l'index avec la base : ajoute les nouveaux CV, retire les CV supprimés
+
+        Returns:
+            Tuple (nombre de CV ajoutés, nombre de CV retirés)
+        """
+        stored = set(store.list_sha256())
+        removed = np.array([sha256 not in stored for sha256 in self.documents], dtype=bool)
+        added = sorted(stored.difference(self.documents))
+        if not added and not removed.any():
+            return 0, 0
+
+        # Occurrences existantes au format (mot, document, nombre), sans les CV retirés
+        terms = np.repeat(np.arange(len(self.vocabulary), dtype=np.int64), np.diff(self.indptr))
+        keep = ~removed[self.doc_ids]
+        new_doc_ids = np.cumsum(~removed) - 1
+        terms = [terms[keep]]
+        docs = [new_doc_ids[self.doc_ids[keep]]]
+        counts = [self.term_counts[keep]]
+        self.documents = [sha256 for sha256, gone in zip(self.documents, removed) if not gone]
+        lengths = [self.document_lengths[~removed]]
+
+        # Occurrences des nouveaux CV
+        for sha256 in added:
+            candidate = store.get_candidate(sha256)
+            term_counter = Counter(get_document_terms(candidate['raw_text'] or ""))
+            doc_id = len(self.documents)
+            self.documents.append(sha256)
+            ids = [self.term_ids.setdefault(term, len(self.term_ids)) for term in term_counter]
+            terms.append(np.array(ids, dtype=np.int64))
+            docs.append(np.full(len(ids), doc_id, dtype=np.int64))
+            counts.append(np.array(list(term_counter.values()), dtype=np.float32))
+            lengths.append(np.array([sum(term_counter.values())], dtype=np.float32))
+
+        self.vocabulary = list(self.term_ids)
+        terms = np.concatenate(terms)
+        docs = np.concatenate(docs)
+        # Tri stable par mot : dans chaque liste, les CV existants (déjà triés)
+        # précèdent les nouveaux, ajoutés par identifiant croissant
+        order = np.argsort(terms, kind='stable')
+        self.doc_ids = docs[order].astype(np.int32)
+        self.term_counts = np.concatenate(counts)[order]
+        self.indptr = np.concatenate(([0], np.cumsum(np.bincount(terms, minlength=len(self.vocabulary)))))
+        self.document_ids = {sha256: i for i, sha256 in enumerate(self.documents)}
+        self.document_lengths = np.concatenate(lengths)
+        return len(added), int(removed.sum())
+
+    def score(self, job_text):
+        """Scores BM25 de tous les CV pour le texte d'une offre"""
+        scores = np.zeros(len(self.documents), dtype=np.float32)
+        if not self.documents:
+            return scores
+        total = len(self.documents)
+        length_norm = BM25_K1 * (1 - BM25_B + BM25_B * self.document_lengths / max(self.document_lengths.mean(), 1))
+        for term in set(get_document_terms(job_text)):
+            term_id = self.term_ids.get(term)
+            if term_id is None:
+                continue
+            start, end = self.indptr[term_id], self.indptr[term_id + 1]
+            if start == end:
+                continue
+            docs = self.doc_ids[start:end]
+            counts = self.term_counts[start:end]
+            idf = np.log(1 + (total - (end - start) + 0.5) / (end - start + 0.5))
+            # Chaque CV apparaît au plus une fois par liste : addition vectorisée
+            scores[docs] += idf * counts * (BM25_K1 + 1) / (counts + length_norm[docs])
+        return scores
+
+    def search(self, job_text, top_k=10, store=None, contract_type=None, duration=None):
+        """
+        Retourne les meilleurs CV pour une offre
+
+        Args:
+            job_text: Texte de l'offre d'emploi
+            top_k: Nombre de résultats
+            store: Base des CV (requise pour les filtres)
+            contract_type: Type de contrat exigé (ex: "Stage")
+            duration: Durée exigée (ex: "6 mois")
+
+        Returns:
+            Liste de tuples (sha256, score) par score décroissant
+
+        Raises:
+            ValueError: si un filtre est demandé sans base des CV
+        """
+        if (contract_type or duration) and store is None:
+            raise ValueError("les filtres contract_type/duration nécessitent la base des CV (store)")
+        scores = self.score(job_text)
+        if contract_type or duration:
+            allowed = np.zeros(len(self.documents), dtype=bool)
+            ids = [self.document_ids[sha256]
+                   for sha256 in store.filter_sha256(contract_type=contract_type, duration=duration)
+                   if sha256 in self.document_ids]
+            allowed[ids] = True
+            scores[~allowed] = 0
+        candidates = np.flatnonzero(scores > 0)
+        if len(candidates) > top_k:
+            candidates = candidates[np.argpartition(-scores[candidates], top_k - 1)[:top_k]]
+        candidates = candidates[np.argsort(-scores[candidates], kind='stable')]
+        return [(self.documents[i], float(scores[i])) for i in candidates]
+
+def main():
+    """Fonction principale"""
+    parser = argparse.ArgumentParser(description="Classement des CV pour une offre d'emploi")
+    parser.add_argument('--db', help="Fichier de base SQLite (défaut : CV_DB_PATH ou cv_data.db)")
+    parser.add_argument('--index', help="Fichier de l'index (défaut : RANKING_INDEX_FILE ou cv_ranking.npz)")
+    parser.add_argument('--update', action='store_true', help="Met à jour l'index sans recherche")
+    parser.add_argument('--job', help="Fichier texte de l'offre d'emploi")
+    parser.add_argument('--top', type=int, default=10, help="Nombre de CV affichés")
+    parser.add_argument('--contract', help="Filtre sur le type de contrat (ex: Stage)")
+    parser.add_argument('--duration', help="Filtre sur la durée (ex: \"6 mois\")")
+    args = parser.parse_args()
+
+    if not args.update and not args.job:
+        parser.error("indiquez --update et/ou --job")
+
+    store = CVStore(args.db)
+    index = RankingIndex(args.index)
+    start = time.perf_counter()
+    added, removed = index.update(store)
+    if added or removed:
+        index.save()
+    print(f"📚 Index : {len(index)} CV ({added} ajoutés, {removed} retirés) en {time.perf_counter() - start:.1f}s")
+
+    if args.job:
+        with open(args.job, 'r', encoding='utf-8') as f:
+            job_text = f.read()
+        start = time.perf_counter()
+        results = index.search(job_text, top_k=args.top, store=store,
+                               contract_type=args.contract, duration=args.duration)
+        elapsed = (time.perf_counter() - start) * 1000
+        print(f"🔎 {len(results)} CV en {elapsed:.1f} ms")
+        for rank, (sha256, score) in enumerate(results, 1):
+            candidate = store.get_candidate(sha256)
+            print(f"   {rank:>2}. {score:6.2f} | {candidate['email'] or '-'} | "
+                  f"{candidate['contract_type']} | {candidate['filename']}")
+    store.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Ré-extraction incrémentale des CV stockés
+
+Lorsque les règles d'un extracteur changent (mots-clés de contrat, patterns de
+téléphone ou de durée...), seule sa version change. Ce script recalcule
+uniquement les champs dont la version stockée diffère de la version courante,
+à partir du texte brut en base : aucun PDF n'est relu.
+
+Utilisation :
+    python reextraction.py            # met à jour les champs obsolètes
+    python reextraction.py --dry-run  # affiche ce qui serait recalculé
+"""
+
+import json
+import time
+import argparse
+from collections import Counter
+
+from cv_extraction import extract_fields, get_extractor_versions
+from cv_store import CVStore
+
+# Nombre de mises à jour regroupées par transaction
+BATCH_SIZE = 500
+
+def get_stale_fields(candidate, current_versions):
+    """Retourne les champs dont la version stockée n'est pas la version courante"""
+    stored_versions = json.loads(candidate.get('field_versions') or '{}')
+    return [
+        field for field, version in current_versions.items()
+        if stored_versions.get(field) != version
+    ]
+
+def reextract_store(store, dry_run=False, batch_size=BATCH_SIZE):
+    """
+    Recalcule les champs obsolètes de tous les CV de la base
+
+    Returns:
+        Counter {champ: nombre de CV recalculés}
+    """
+    current_versions = get_extractor_versions()
+    recomputed = Counter()
+    batch = []
+    for candidate in store.iter_candidates():
+        stale_fields = get_stale_fields(candidate, current_versions)
+        if not stale_fields:
+            continue
+        recomputed.update(stale_fields)
+        if dry_run:
+            continue
+        fields = extract_fields(candidate['raw_text'] or "", stale_fields)
+        batch.append((candidate['sha256'], fields, current_versions))
+        if len(batch) >= batch_size:
+            store.update_fields_many(batch)
+            batch = []
+    if batch:
+        store.update_fields_many(batch)
+    return recomputed
+
+def main():
+    """Fonction principale"""
+    parser = argparse.ArgumentParser(description="Ré-extraction incrémentale des CV stockés")
+    parser.add_argument('--db', help="Fichier de base SQLite (défaut : CV_DB_PATH ou cv_data.db)")
+    parser.add_argument('--dry-run', action='store_true', help="N'écrit rien, affiche seulement le bilan")
+    args = parser.parse_args()
+
+    store = CVStore(args.db)
+    print(f"🔄 Ré-extraction sur {store.count_candidates()} CV ({store.db_file})")
+    for field, version in get_extractor_versions().items():
+        print(f"   {field} : version {version}")
+
+    start = time.perf_counter()
+    recomputed = reextract_store(store, dry_run=args.dry_run)
+    elapsed = time.perf_counter() - start
+    store.close()
+
+    if not recomputed:
+        print("✅ Tous les champs sont à jour")
+        return
+    action = "à recalculer" if args.dry_run else "recalculés"
+    for field, count in recomputed.items():
+        print(f"   {field} : {count} CV {action}")
+    print(f"✅ Terminé en {elapsed:.1f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Extraction des compétences, langues, diplômes et localisations des CV
+
+Les termes d'un dictionnaire configurable (skills_dictionary.json ou fichier
+indiqué par SKILLS_DICTIONARY_FILE) et leurs synonymes sont compilés en un
+automate d'Aho-Corasick sur les mots : un seul passage sur le texte suffit,
+quelle que soit la taille du dictionnaire. Le texte et les termes sont
+normalisés (minuscules, sans accents) avant comparaison.
+
+Le vecteur de termes de chaque CV est stocké dans la base (cv_store) pour le
+filtrage et le classement sur toute l'archive.
+
+Utilisation :
+    python skill_index.py --reindex
+    python skill_index.py --search "python docker anglais"
+"""
+
+import os
+import re
+import json
+import hashlib
+import argparse
+import unicodedata
+from collections import Counter, deque
+from functools import lru_cache
+
+from cv_store import CVStore
+
+# Dictionnaire par défaut, à côté de ce module
+DICTIONARY_FILE = os.environ.get(
+    'SKILLS_DICTIONARY_FILE',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'skills_dictionary.json')
+)
+
+# Mots : lettres/chiffres, suivis éventuellement de + ou # (C++, C#), ou ".net"
+TOKEN_REGEX = re.compile(r"[a-z0-9]+[+#]*|\.net\b")
+
+def build_fold_table():
+    """Table de translittération des caractères accentués vers l'ASCII"""
+    table = {}
+    for code in range(0x00C0, 0x0250):
+        char = chr(code)
+        decomposed = unicodedata.normalize('NFKD', char)
+        base = ''.join(c for c in decomposed if not unicodedata.combining(c))
+        if base != char and base.isascii():
+            table[code] = base.lower()
+    table.update({ord('œ'): 'oe', ord('æ'): 'ae', ord('ß'): 'ss', ord('’'): "'"})
+    return table
+
+FOLD_TABLE = build_fold_table()
+
+def fold_text(text):
+    """Met le texte en minuscules et supprime les accents"""
+    return text.lower().translate(FOLD_TABLE)
+
+def tokenize(text):
+    """Découpe un texte normalisé en mots"""
+    return TOKEN_REGEX.findall(fold_text(text))
+
+class TermMatcher:
+    """Automate d'Aho-Corasick dont l'alphabet est l'ensemble des mots des termes"""
+
+    def __init__(self, dictionary):
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [()]
+        for category, terms in dictionary.items():
+            for canonical, synonyms in terms.items():
+                for variant in [canonical, *synonyms]:
+                    tokens = tokenize(variant)
+                    if tokens:
+                        self._add(tokens, (len(tokens), category, canonical))
+        self._build()
+
+    def _add(self, tokens, payload):
+        """Ajoute la séquence de mots d'un terme au trie"""
+        node = 0
+        for token in tokens:
+            child = self._goto[node].get(token)
+            if child is None:
+                child = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append(())
+                self._goto[node][token] = child
+            node = child
+        if payload not in self._output[node]:
+            self._output[node] += (payload,)
+
+    def _build(self):
+        """Calcule les liens d'échec (parcours en largeur)"""
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for token, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and token not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(token, 0)
+                self._output[child] += self._output[self._fail[child]]
+
+    def find(self, text):
+        """
+        Recherche les termes du dictionnaire dans un texte
+
+        Les correspondances qui se chevauchent sont résolues en gardant la plus
+        longue à partir de la position la plus à gauche.
+
+        Returns:
+            Liste de tuples (catégorie, terme canonique), dans l'ordre du texte
+        """
+        goto, fail, output = self._goto, self._fail, self._output
+        matches = []
+        node = 0
+        for position, token in enumerate(tokenize(text)):
+            while node and token not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(token, 0)
+            for length, category, canonical in output[node]:
+                matches.append((position - length + 1, -position, category, canonical))
+
+        matches.sort()
+        found = []
+        last_end = -1
+        for start, negative_end, category, canonical in matches:
+            if start > last_end:
+                found.append((category, canonical))
+                last_end = -negative_end
+        return found
+
+def load_dictionary(path=DICTIONARY_FILE):
+    """Charge le dictionnaire {catégorie: {terme canonique: [synonymes]}}"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+@lru_cache(maxsize=4)
+def get_matcher(path=DICTIONARY_FILE):
+    """
+    Retourne l'automate compilé et la version du dictionnaire (mis en cache)
+
+    Returns:
+        Tuple (TermMatcher, empreinte du dictionnaire)
+    """
+    dictionary = load_dictionary(path)
+    version = hashlib.sha256(
+        json.dumps(dictionary, sort_keys=True, ensure_ascii=False).encode('utf-8')
+    ).hexdigest()[:12]
+    return TermMatcher(dictionary), version
+
+def extract_terms(text, path=DICTIONARY_FILE):
+    """
+    Extrait le vecteur de termes d'un CV
+
+    Returns:
+        Dictionnaire {catégorie: {terme canonique: nombre d'occurrences}}
+    """
+    matcher, _ = get_matcher(path)
+    terms = {}
+    for (category, canonical), count in Counter(matcher.find(text)).items():
+        terms.setdefault(category, {})[canonical] = count
+    return terms
+
+def canonicalize_query(query, path=DICTIONARY_FILE):
+    """Convertit une requête libre en termes canoniques (synonymes, accents...)"""
+    matcher, _ = get_matcher(path)
+    return list(dict.fromkeys(canonical for _, canonical in matcher.find(query)))
+
+def index_store(store, reindex_all=False, path=DICTIONARY_FILE, batch_size=500):
+    """
+    Calcule le vecteur de termes des CV dont l'index est obsolète
+
+    Returns:
+        Nombre de CV indexés
+    """
+    _, version = get_matcher(path)
+    count = 0
+    batch = []
+    for candidate in store.iter_candidates():
+        if not reindex_all and candidate.get('terms_version') == version:
+            continue
+        batch.append((candidate['sha256'], extract_terms(candidate['raw_text'] or "", path)))
+        if len(batch) >= batch_size:
+            store.save_terms_many(batch, version)
+            count += len(batch)
+            batch = []
+    if batch:
+        store.save_terms_many(batch, version)
+        count += len(batch)
+    return count
+
+def main():
+    """Fonction principale"""
+    parser = argparse.ArgumentParser(description="Index des compétences des CV")
+    parser.add_argument('--db', help="Fichier de base SQLite (défaut : CV_DB_PATH ou cv_data.db)")
+    parser.add_argument('--reindex', action='store_true', help="Indexe les CV nouveaux ou obsolètes")
+    parser.add_argument('--all', action='store_true', help="Avec --reindex : réindexe tous les CV")
+    parser.add_argument('--search', help="Termes recherchés (ex: \"python docker anglais\")")
+    parser.add_argument('--any', action='store_true', help="Avec --search : au moins un terme suffit")
+    parser.add_argument('--limit', type=int, default=20, help="Nombre de résultats affichés")
+    args = parser.parse_args()
+
+    if not args.reindex and not args.search:
+        parser.error("indiquez --reindex et/ou --search")
+
+    store = CVStore(args.db)
+    if args.reindex:
+        count = index_store(store, reindex_all=args.all)
+        print(f"✅ {count} CV indexés")
+    if args.search:
+        terms = canonicalize_query(args.search)
+        if not terms:
+            print("❌ Aucun terme du dictionnaire dans la recherche")
+        else:
+            print(f"🔎 Recherche : {', '.join(terms)}")
+            for result in store.search_terms(terms, match_all=not args.any, limit=args.limit):
+                print(f"   {result['matched']}/{len(terms)} termes | {result['email'] or '-'} | {result['filename']}")
+    store.close()
+
+if __name__ == "__main__":
+    main()
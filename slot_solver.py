@@ -0,0 +1,239 @@
+"""
+Affectation automatique des créneaux d'entretien pour les journées de campagne
+
+Les créneaux libres des interviewers (au format de get_available_slots :
+"HH:MM" toutes les 15 minutes) sont découpés en blocs consécutifs de la durée
+de l'entretien, puis les candidats sont affectés aux blocs par un couplage
+biparti de coût minimal (algorithme hongrois). Le coût favorise les blocs en
+début de plage libre, ce qui enchaîne les entretiens sans trou, et pénalise
+les préférences non respectées.
+"""
+
+from collections import defaultdict
+import numpy as np
+
+from business_calendar import SLOT_MINUTES, minutes_to_time, time_to_minutes
+
+try:
+    from scipy.optimize import linear_sum_assignment
+except ImportError:
+    linear_sum_assignment = None
+
+# Durées d'entretien proposées dans l'application
+DURATION_MAP = {
+    "15 minutes": 15,
+    "30 minutes": 30,
+    "45 minutes": 45,
+    "1 heure": 60,
+    "1h30": 90
+}
+
+# Pondérations du coût d'une affectation
+GAP_COST = 1  # par bloc précédent libre dans la même plage
+PREFERENCE_PENALTY = 100  # par préférence (date, interviewer) non respectée
+INFEASIBLE = 1e9  # contrainte impérative violée
+
+def get_duration_minutes(duration):
+    """Durée en minutes à partir d'un libellé de DURATION_MAP ou d'un entier"""
+    if isinstance(duration, str):
+        return DURATION_MAP.get(duration, 60)
+    return int(duration)
+
+def get_duration_label(minutes):
+    """Libellé de DURATION_MAP correspondant à une durée en minutes"""
+    for label, value in DURATION_MAP.items():
+        if value == minutes:
+            return label
+    return f"{minutes} minutes"
+
+def build_blocks(free_minutes, duration):
+    """
+    Découpe les plages libres en blocs consécutifs de `duration` minutes
+
+    Args:
+        free_minutes: {(interviewer, date): ensemble des débuts de créneaux libres en minutes}
+        duration: Durée de l'entretien en minutes
+
+    Returns:
+        Liste de tuples (interviewer, date, début en minutes, rang dans la plage)
+    """
+    slots_needed = -(-duration // SLOT_MINUTES)
+    blocks = []
+    for (interviewer, date), minutes in sorted(free_minutes.items()):
+        run = []
+        for minute in sorted(minutes) + [None]:
+            if run and (minute is None or minute != run[-1] + SLOT_MINUTES):
+                for rank in range(len(run) // slots_needed):
+                    blocks.append((interviewer, date, run[rank * slots_needed], rank))
+                run = []
+            if minute is not None:
+                run.append(minute)
+    return blocks
+
+def candidate_block_cost(candidate, block, duration):
+    """Coût de l'affectation d'un candidat à un bloc"""
+    interviewer, date, start, rank = block
+    if candidate.get('dates') and date not in candidate['dates']:
+        return INFEASIBLE
+    if candidate.get('interviewers') and interviewer not in candidate['interviewers']:
+        return INFEASIBLE
+    if candidate.get('earliest') and start < time_to_minutes(candidate['earliest']):
+        return INFEASIBLE
+    if candidate.get('latest') and start + duration > time_to_minutes(candidate['latest']):
+        return INFEASIBLE
+
+    cost = rank * GAP_COST
+    if candidate.get('preferred_dates') and date not in candidate['preferred_dates']:
+        cost += PREFERENCE_PENALTY
+    if candidate.get('preferred_interviewers') and interviewer not in candidate['preferred_interviewers']:
+        cost += PREFERENCE_PENALTY
+    return cost
+
+def hungarian(cost):
+    """
+    Couplage de coût minimal (algorithme hongrois, chemins augmentants)
+
+    Version vectorisée NumPy utilisée lorsque SciPy n'est pas installé.
+
+    Args:
+        cost: Matrice n x m avec n <= m
+
+    Returns:
+        Tuple (indices de lignes, indices de colonnes) comme linear_sum_assignment
+    """
+    n, m = cost.shape
+    u = np.zeros(n + 1)
+    v = np.zeros(m + 1)
+    # assigned_row[j] : ligne (indexée à partir de 1) affectée à la colonne j, 0 si libre
+    assigned_row = np.zeros(m + 1, dtype=int)
+    way = np.zeros(m + 1, dtype=int)
+    for row in range(1, n + 1):
+        assigned_row[0] = row
+        column = 0
+        min_values = np.full(m + 1, np.inf)
+        used = np.zeros(m + 1, dtype=bool)
+        while True:
+            used[column] = True
+            current_row = assigned_row[column]
+            reduced = cost[current_row - 1] - u[current_row] - v[1:]
+            free = ~used[1:]
+            improved = free & (reduced < min_values[1:])
+            min_values[1:][improved] = reduced[improved]
+            way[1:][improved] = column
+            candidates = np.where(free, min_values[1:], np.inf)
+            next_column = int(np.argmin(candidates)) + 1
+            delta = candidates[next_column - 1]
+            u[assigned_row[used]] += delta
+            v[used] -= delta
+            min_values[~used] -= delta
+            column = next_column
+            if assigned_row[column] == 0:
+                break
+        # Inversion du chemin augmentant
+        while column:
+            previous = way[column]
+            assigned_row[column] = assigned_row[previous]
+            column = previous
+    columns = np.nonzero(assigned_row[1:])[0]
+    rows = assigned_row[1:][columns] - 1
+    order = np.argsort(rows)
+    return rows[order], columns[order]
+
+def solve_assignment(cost):
+    """Résout le problème d'affectation (SciPy si disponible, sinon NumPy)"""
+    if linear_sum_assignment is not None:
+        return linear_sum_assignment(cost)
+    if cost.shape[0] > cost.shape[1]:
+        columns, rows = hungarian(cost.T)
+        order = np.argsort(rows)
+        return rows[order], columns[order]
+    return hungarian(cost)
+
+def assign_interviews(candidates, free_slots):
+    """
+    Calcule un planning sans conflit pour une liste de candidats
+
+    Args:
+        candidates: Liste de dictionnaires avec les clés
+            - email : identifiant du candidat (obligatoire)
+            - duration : libellé de DURATION_MAP ou minutes (défaut : "45 minutes")
+            - dates, interviewers : valeurs autorisées (contraintes impératives)
+            - earliest, latest : fenêtre horaire "HH:MM" (contraintes impératives)
+            - preferred_dates, preferred_interviewers : préférences
+        free_slots: {(interviewer, "YYYY-MM-DD"): liste de créneaux "HH:MM"}
+            tels que retournés par get_available_slots
+
+    Returns:
+        Tuple (planning, candidats non placés). Le planning est une liste de
+        dictionnaires au format de l'export CSV des entretiens.
+    """
+    free_minutes = {
+        key: {time_to_minutes(slot) for slot in slots}
+        for key, slots in free_slots.items()
+    }
+
+    # Les entretiens les plus longs sont placés en premier (plus contraints)
+    by_duration = defaultdict(list)
+    for candidate in candidates:
+        by_duration[get_duration_minutes(candidate.get('duration', "45 minutes"))].append(candidate)
+
+    schedule = []
+    unassigned = []
+    for duration in sorted(by_duration, reverse=True):
+        group = by_duration[duration]
+        blocks = build_blocks(free_minutes, duration)
+        if not blocks:
+            unassigned.extend(candidate['email'] for candidate in group)
+            continue
+
+        cost = np.array([
+            [candidate_block_cost(candidate, block, duration) for block in blocks]
+            for candidate in group
+        ])
+        rows, columns = solve_assignment(cost)
+
+        placed = set()
+        for row, column in zip(rows, columns):
+            if cost[row, column] >= INFEASIBLE:
+                continue
+            interviewer, date, start, _ = blocks[column]
+            placed.add(row)
+            schedule.append({
+                'Email': group[row]['email'],
+                'Date entretien': date,
+                'Heure entretien': minutes_to_time(start),
+                'Durée': get_duration_label(duration),
+                'Interviewer': interviewer,
+            })
+            # Le bloc n'est plus disponible pour les groupes suivants
+            for minute in range(start, start + duration, SLOT_MINUTES):
+                free_minutes[(interviewer, date)].discard(minute)
+        unassigned.extend(candidate['email'] for row, candidate in enumerate(group) if row not in placed)
+
+    schedule.sort(key=lambda item: (item['Date entretien'], item['Interviewer'], item['Heure entretien']))
+    return schedule, unassigned
+
+def collect_free_slots(services, dates):
+    """
+    Récupère les créneaux libres de chaque interviewer via Google Calendar
+
+    Les horaires et jours travaillés de chaque interviewer (business_calendar)
+    sont appliqués : aucun créneau les jours fériés ou non travaillés.
+
+    Args:
+        services: {interviewer: service Google Calendar}
+        dates: Liste de dates "YYYY-MM-DD"
+
+    Returns:
+        {(interviewer, date): liste de créneaux "HH:MM"} ; les journées dont
+        l'agenda n'a pas pu être lu sont omises (aucun créneau proposé)
+    """
+    from google_meet_config import get_available_slots
+
+    free_slots = {}
+    for interviewer, service in services.items():
+        for date in dates:
+            slots = get_available_slots(service, date, interviewer)
+            if slots is not None:
+                free_slots[(interviewer, date)] = slots
+    return free_slots
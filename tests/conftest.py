@@ -0,0 +1,8 @@
+"""
+Configuration des tests : les modules de l'application sont à la racine du dépôt
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
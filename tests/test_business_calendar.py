@@ -0,0 +1,26 @@
+"""
+Tests de la grille des créneaux : durée des entretiens et fin de journée
+"""
+
+from business_calendar import get_free_slots, get_slot_grid, time_to_minutes
+
+def test_last_slot_leaves_room_for_the_whole_interview():
+    assert get_slot_grid('09:00', '20:00')[-1] == '19:45'
+    assert get_slot_grid('09:00', '20:00', 60)[-1] == '19:00'
+    assert get_free_slots([], duration_minutes=60)[-1] == '19:00'
+    assert get_free_slots([], duration_minutes=90)[-1] == '18:30'
+
+def test_interview_must_not_overlap_a_later_event():
+    busy = [(time_to_minutes('10:00'), time_to_minutes('10:30'))]
+    slots = get_free_slots(busy, duration_minutes=45)
+    assert '09:00' in slots
+    assert '09:15' in slots
+    assert '09:30' not in slots
+    assert '10:15' not in slots
+    assert '10:30' in slots
+
+def test_duration_rounded_up_to_the_grid():
+    busy = [(time_to_minutes('10:00'), time_to_minutes('11:00'))]
+    slots = get_free_slots(busy, duration_minutes=20)
+    assert '09:30' in slots
+    assert '09:45' not in slots
@@ -0,0 +1,48 @@
+"""
+Tests de non-régression de l'extraction (téléphone, type de contrat)
+"""
+
+import pytest
+
+from cv_extraction import detect_contract_type, extract_fields, extract_phone, extract_phones
+from language_detection import detect_language
+
+@pytest.mark.parametrize('text, expected', [
+    ("Tél : 06 12 34 56 78", '+33612345678'),
+    ("Tél : 06.12.34.56.78", '+33612345678'),
+    ("Tél : 0612345678", '+33612345678'),
+    ("Tél : +33 6 12 34 56 78", '+33612345678'),
+    ("Tél : +33612345678", '+33612345678'),
+    ("Tél : +33 (0)6 12 34 56 78", '+33612345678'),
+    ("Tél : +33 06 12 34 56 78", '+33612345678'),
+    ("Tél : 0033 6 12 34 56 78", '+33612345678'),
+    ("Tél : 0033 06 12 34 56 78", '+33612345678'),
+    ("Phone: +44 20 7946 0958", '+442079460958'),
+    ("Phone: +1 (415) 555-1234", '+14155551234'),
+    ("Tel: 0049 30 1234567", '+49301234567'),
+    ("Promotion 2019-2021, 75011 Paris", ''),
+])
+def test_extract_phone(text, expected):
+    assert extract_phone(text) == expected
+
+def test_extract_phones_deduplicates():
+    text = "Portable : +33 06 12 34 56 78 / 06 12 34 56 78, fixe : 01 23 45 67 89"
+    assert extract_phones(text) == ['+33612345678', '+33123456789']
+
+@pytest.mark.parametrize('text, expected', [
+    ("Software engineer with five years of experience in Python and cloud "
+     "infrastructure. Looking for a CDI in Paris.", 'CDI'),
+    ("Data analyst, experienced with SQL and dashboards. Open to a CDD "
+     "or a fixed-term role.", 'CDD'),
+    ("Business school student looking for an alternance (apprentissage) "
+     "starting in September.", 'Alternance'),
+    # "stage" seul est un mot anglais courant : pas de faux positif
+    ("Led the project from an early stage and presented it on stage "
+     "to the whole company.", 'À compléter'),
+])
+def test_contract_type_english_cv(text, expected):
+    assert detect_language(text) == 'en'
+    assert extract_fields(text)['contract_type'] == expected
+
+def test_contract_type_french_cv():
+    assert detect_contract_type("Étudiant en master, je recherche un stage de six mois.") == 'Stage'
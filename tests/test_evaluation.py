@@ -0,0 +1,43 @@
+"""
+Tests des métriques de l'évaluation des extracteurs
+"""
+
+from cv_extraction import extract_fields
+from evaluation import compute_field_metrics, normalize_value
+
+FIELDS = ['email', 'phone', 'contract_type', 'duration']
+
+def make_document(text, expected):
+    fields = extract_fields(text)
+    return {
+        'filename': 'cv.pdf',
+        'expected': expected,
+        'predicted': fields,
+        'timings': dict.fromkeys(fields, 0.001),
+    }
+
+def test_normalize_value():
+    assert normalize_value('phone', '06 12 34 56 78') == normalize_value('phone', '+33612345678')
+    assert normalize_value('phone', '0612345678') == '+33612345678'
+    assert normalize_value('contract_type', 'À compléter') == ''
+    assert normalize_value('duration', ' 6  Mois ') == '6 mois'
+
+def test_correct_extraction_scores_full_precision():
+    documents = [
+        make_document(
+            "Jean Dupont - jean@example.com - 06 12 34 56 78\nRecherche un stage de 6 mois",
+            {'email': 'jean@example.com', 'phone': '0612345678', 'contract_type': 'Stage', 'duration': '6 mois'},
+        ),
+        # Ni type de contrat ni durée : cellules vides dans les annotations
+        make_document(
+            "Marie Martin - marie@example.com - +33 6 98 76 54 32\nDéveloppeuse Python",
+            {'email': 'marie@example.com', 'phone': '06 98 76 54 32', 'contract_type': '', 'duration': ''},
+        ),
+    ]
+    metrics = compute_field_metrics(documents, FIELDS)
+    for field in FIELDS:
+        assert metrics[field]['fp'] == 0, field
+        assert metrics[field]['fn'] == 0, field
+        assert metrics[field]['precision'] == 1.0, field
+        assert metrics[field]['recall'] == 1.0, field
+        assert metrics[field]['correct'] == 2, field
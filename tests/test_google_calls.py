@@ -0,0 +1,54 @@
+"""
+Tests de la couche d'appel Google : budget de temps des réessais
+"""
+
+import pytest
+
+import google_calls
+from google_calls import execute_request
+
+class FakeClock:
+    """Horloge simulée : sleep() avance le temps sans attendre"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+class TimingOutRequest:
+    """Requête qui échoue par timeout après `duration` secondes simulées"""
+
+    def __init__(self, clock, duration):
+        self.clock = clock
+        self.duration = duration
+        self.calls = 0
+
+    def execute(self):
+        self.calls += 1
+        self.clock.sleep(self.duration)
+        raise TimeoutError("timed out")
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(google_calls, 'time', clock)
+    monkeypatch.setattr(google_calls, 'get_retry_delay', lambda error, attempt: 2.0)
+    return clock
+
+def test_retries_stop_when_deadline_is_spent(clock):
+    request = TimingOutRequest(clock, duration=10)
+    with pytest.raises(TimeoutError):
+        execute_request(request, 'test-deadline', max_retries=3, deadline=15)
+    # 10 s + 2 s d'attente + 10 s : un nouvel essai dépasserait le budget
+    assert request.calls == 2
+    assert clock.now == 22
+
+def test_without_deadline_all_retries_run(clock):
+    request = TimingOutRequest(clock, duration=10)
+    with pytest.raises(TimeoutError):
+        execute_request(request, 'test-no-deadline', max_retries=3, deadline=None)
+    assert request.calls == 4
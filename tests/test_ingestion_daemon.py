@@ -0,0 +1,60 @@
+"""
+Tests du démon d'ingestion : reprise après l'arrêt brutal d'un worker
+"""
+
+import os
+import time
+
+import ingestion_daemon
+from ingestion_daemon import IngestionDaemon
+
+class MemoryStore:
+    """Base minimale en mémoire (interface utilisée par le démon)"""
+
+    def __init__(self):
+        self.saved = {}
+
+    def has_candidate(self, sha256):
+        return sha256 in self.saved
+
+    def save_candidate(self, sha256, filename, text, fields, source=None, versions=None):
+        self.saved[sha256] = filename
+
+    def save_terms_many(self, items, version):
+        pass
+
+    def mark_message(self, message_id, label=None):
+        pass
+
+def crash_or_extract(path):
+    """Tue le worker sur les fichiers "crash", extraction factice sinon"""
+    if os.path.basename(path).startswith('crash'):
+        os._exit(1)
+    return "texte", {'email': 'a@example.com', 'contract_type': 'Stage'}, {}
+
+def wait_for(condition, timeout=30):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "délai dépassé"
+        time.sleep(0.05)
+
+def test_worker_crash_does_not_stop_ingestion(tmp_path, monkeypatch):
+    monkeypatch.setattr(ingestion_daemon, 'process_cv_file', crash_or_extract)
+    crash = tmp_path / 'crash.pdf'
+    crash.write_bytes(b'%PDF crash')
+    later = tmp_path / 'cv.pdf'
+    later.write_bytes(b'%PDF ok')
+
+    store = MemoryStore()
+    daemon = IngestionDaemon(store, workers=1)
+    try:
+        broken_pool = daemon.executor
+        assert daemon.submit(str(crash))
+        # Fichier abandonné après MAX_POOL_RETRIES nouvelles soumissions
+        wait_for(lambda: not daemon._in_flight)
+        assert daemon.executor is not broken_pool
+        assert daemon.submit(str(later))
+        wait_for(lambda: not daemon._in_flight)
+    finally:
+        daemon.shutdown()
+    assert list(store.saved.values()) == ['cv.pdf']
@@ -0,0 +1,25 @@
+"""
+Tests du rendu des messages en masse
+"""
+
+import pandas as pd
+
+from message_templates import render_bulk, render_message
+
+def test_render_bulk_matches_render_message():
+    df = pd.DataFrame({
+        'Email': ['a@example.com', 'b@example.com'],
+        'Type de contrat': ['Stage', None],
+        'Durée': ['6 mois', None],
+    })
+    messages = render_bulk(df, 'reception')
+    assert list(messages.index) == list(df.index)
+    assert messages.iloc[0] == render_message('reception', email='a@example.com',
+                                              contract_type='Stage', duration='6 mois')
+    assert messages.iloc[1] == render_message('reception', email='b@example.com')
+
+def test_render_bulk_without_known_columns():
+    df = pd.DataFrame({'Nom': ['Alice', 'Bob']}, index=[10, 20])
+    messages = render_bulk(df, 'reception')
+    assert list(messages.index) == [10, 20]
+    assert list(messages) == [render_message('reception')] * 2
@@ -0,0 +1,96 @@
+"""
+Gestion des fichiers uploadés : limites de taille par fichier et par session
+
+Les uploads Streamlit sont déjà entièrement en mémoire (UploadedFile est un
+BytesIO) : ils sont passés tels quels aux parseurs, sans copie. Seuls les
+outils qui lisent des fichiers du disque (démon d'ingestion, évaluation)
+utilisent mmap (voir mapped_file), pour ne pas charger le fichier dans la
+mémoire du processus.
+"""
+
+import os
+import mmap
+from contextlib import contextmanager
+import streamlit as st
+
+MB = 1024 * 1024
+
+# Limites configurables par variables d'environnement (en Mo)
+MAX_FILE_SIZE = int(float(os.environ.get('UPLOAD_MAX_FILE_MB', 20)) * MB)
+MAX_SESSION_SIZE = int(float(os.environ.get('UPLOAD_MAX_SESSION_MB', 100)) * MB)
+
+def format_size(size):
+    """Formate une taille en octets pour l'affichage"""
+    return f"{size / MB:.1f} Mo"
+
+def get_upload_key(uploaded_file):
+    """Identifiant stable d'un upload (identique d'un rerun à l'autre)"""
+    return getattr(uploaded_file, 'file_id', None) or f"{uploaded_file.name}:{uploaded_file.size}"
+
+def check_upload_limits(uploaded_file):
+    """
+    Vérifie les limites de taille par fichier et par session
+
+    Le volume de la session est comptabilisé dans st.session_state par
+    identifiant d'upload : une seule fois par fichier même si le script est
+    réexécuté, et libéré quand le fichier quitte l'uploader (release_uploads).
+
+    Returns:
+        True si l'upload est accepté, False sinon (message affiché)
+    """
+    size = uploaded_file.size
+    if size > MAX_FILE_SIZE:
+        st.error(f"❌ Fichier trop volumineux ({format_size(size)}, maximum {format_size(MAX_FILE_SIZE)})")
+        return False
+
+    session_uploads = st.session_state.setdefault('upload_sizes', {})
+    key = get_upload_key(uploaded_file)
+    if key not in session_uploads:
+        session_total = sum(session_uploads.values())
+        if session_total + size > MAX_SESSION_SIZE:
+            st.error(f"❌ Quota de la session atteint ({format_size(session_total)} déjà uploadés, "
+                     f"maximum {format_size(MAX_SESSION_SIZE)})")
+            return False
+        session_uploads[key] = size
+    return True
+
+def release_uploads(uploaded_files):
+    """Libère le quota des fichiers qui ne sont plus dans l'uploader (remplacés ou retirés)"""
+    session_uploads = st.session_state.get('upload_sizes')
+    if not session_uploads:
+        return
+    active = {get_upload_key(uploaded_file) for uploaded_file in uploaded_files}
+    for key in list(session_uploads):
+        if key not in active:
+            del session_uploads[key]
+
+@contextmanager
+def checked_upload(uploaded_file):
+    """
+    Fournit un upload Streamlit aux parseurs s'il respecte les limites
+
+    Produit l'objet UploadedFile lui-même (rembobiné), ou None si l'upload
+    dépasse les limites configurées.
+
+    Exemple :
+        with checked_upload(uploaded_file) as cv_file:
+            text = extract_text(cv_file, uploaded_file.name)
+    """
+    if not check_upload_limits(uploaded_file):
+        yield None
+        return
+    uploaded_file.seek(0)
+    yield uploaded_file
+
+@contextmanager
+def mapped_file(path):
+    """Ouvre un fichier du disque en lecture via mmap (fichiers non vides)"""
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            yield f
+            return
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            yield mapped
+        finally:
+            mapped.close()